@@ -0,0 +1,21 @@
+"""Headless stand-in for the Fusion ``adsk`` package.
+
+Only the subset of ``adsk.core`` and ``adsk.fusion`` used by the add-in is
+modelled. Every public property read and method call on an API object counts
+as one round trip and can be given a simulated latency, see ``adsk.core.set_latency``.
+
+The benchmarks in bench/ put this folder's parent first on sys.path, so the
+add-in imports it in place of Fusion's own module. Helpers that stand in for
+the user, such as ``Command._change_input`` or ``Application._process_custom_events``,
+are underscore-prefixed so they never collide with the real API.
+"""
+from . import core
+from . import fusion
+
+
+def autoTerminate(value: bool):
+    pass
+
+
+def doEvents():
+    core.Application.get()._process_custom_events()
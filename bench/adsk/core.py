@@ -0,0 +1,1516 @@
+"""Headless stand-in for ``adsk.core``.
+
+Objects follow the shape of the real SWIG wrappers closely enough for the
+command modules to run unchanged: collections expose ``itemById``/``count``,
+events expose ``add``/``remove`` with a string ``handler`` annotation and the
+command inputs carry the properties the samples read and write.
+"""
+import collections
+import time
+import types
+
+# ******************************** Simulated API cost ********************************
+
+# Number of round trips per attribute name since the last reset_api_stats()
+api_calls = collections.Counter()
+
+_default_latency = 0.0
+_latency = {}
+
+
+def set_latency(default: float = 0.0, **per_name: float):
+    """Sets the simulated cost in seconds of every API round trip.
+
+    Arguments:
+    default -- Latency applied to every attribute access on an API object.
+    per_name -- Overrides for individual attribute names, e.g. itemById=0.0002.
+    """
+    global _default_latency, _latency
+    _default_latency = default
+    _latency = dict(per_name)
+
+
+def reset_api_stats():
+    api_calls.clear()
+
+
+def _tick(name):
+    api_calls[name] += 1
+    delay = _latency.get(name, _default_latency)
+    if delay:
+        end = time.perf_counter() + delay
+        while time.perf_counter() < end:
+            pass
+
+
+class _ApiMethod:
+    """A bound API method. Like a SWIG proxy method, looking it up is free and every call is a round trip."""
+    __slots__ = ('_name', '_method')
+
+    def __init__(self, name, method):
+        self._name = name
+        self._method = method
+
+    def __call__(self, *args, **kwargs):
+        _tick(self._name)
+        return self._method(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._method, name)
+
+
+class Base:
+    """Root of every fake API object. Public property reads and method calls count as API calls."""
+    _class_type = 'adsk::core::Base'
+
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if name[0] != '_':
+            if type(value) is types.MethodType:
+                return _ApiMethod(name, value)
+            _tick(name)
+        return value
+
+    @classmethod
+    def classType(cls):
+        return cls._class_type
+
+    @classmethod
+    def cast(cls, obj):
+        return obj if isinstance(obj, cls) else None
+
+    @property
+    def objectType(self):
+        return type(self)._class_type
+
+    @property
+    def isValid(self):
+        return not self._deleted
+
+    _deleted = False
+
+
+def _class_type(name):
+    return f'adsk::core::{name}'
+
+
+# ******************************** Enums ********************************
+
+class LogLevels:
+    InfoLogLevel = 0
+    WarningLogLevel = 1
+    ErrorLogLevel = 2
+
+
+class LogTypes:
+    ConsoleLogType = 0
+    FileLogType = 1
+
+
+class DropDownStyles:
+    LabeledIconDropDownStyle = 0
+    CheckBoxDropDownStyle = 1
+    TextListDropDownStyle = 2
+
+
+class DialogResults:
+    DialogOK = 0
+    DialogCancel = 1
+    DialogYes = 2
+    DialogNo = 3
+    DialogError = -1
+
+
+class CommandTerminationReason:
+    UnknownTerminationReason = 0
+    CompletedTerminationReason = 1
+    CancelledTerminationReason = 2
+
+
+# ******************************** Geometry and values ********************************
+
+class Point3D(Base):
+    _class_type = _class_type('Point3D')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self._xyz = (x, y, z)
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Point3D(x, y, z)
+
+    @property
+    def x(self):
+        return self._xyz[0]
+
+    @property
+    def y(self):
+        return self._xyz[1]
+
+    @property
+    def z(self):
+        return self._xyz[2]
+
+
+class Vector3D(Point3D):
+    _class_type = _class_type('Vector3D')
+
+    @staticmethod
+    def create(x=0.0, y=0.0, z=0.0):
+        return Vector3D(x, y, z)
+
+
+class Plane(Base):
+    _class_type = _class_type('Plane')
+
+    def __init__(self, origin=None, normal=None):
+        self._origin = origin or Point3D()
+        self._normal = normal or Vector3D(0, 0, 1)
+
+    @property
+    def origin(self):
+        return self._origin
+
+    @property
+    def normal(self):
+        return self._normal
+
+
+class ValueInput(Base):
+    _class_type = _class_type('ValueInput')
+
+    def __init__(self, real=None, string=None):
+        self._real = real
+        self._string = string
+
+    @staticmethod
+    def createByReal(value):
+        return ValueInput(real=float(value))
+
+    @staticmethod
+    def createByString(value):
+        return ValueInput(string=value)
+
+    @property
+    def realValue(self):
+        return self._real if self._real is not None else _parse_real(self._string)
+
+    @property
+    def stringValue(self):
+        return self._string if self._string is not None else ''
+
+    @property
+    def valueType(self):
+        return 0 if self._real is not None else 1
+
+
+def _parse_real(expression):
+    try:
+        return float(str(expression).split()[0])
+    except (ValueError, IndexError):
+        return 0.0
+
+
+# ******************************** Events ********************************
+
+class EventHandler(Base):
+    def __init__(self):
+        pass
+
+    def notify(self, args):
+        pass
+
+
+class CommandCreatedEventHandler(EventHandler):
+    _class_type = _class_type('CommandCreatedEventHandler')
+
+
+class CommandEventHandler(EventHandler):
+    _class_type = _class_type('CommandEventHandler')
+
+
+class InputChangedEventHandler(EventHandler):
+    _class_type = _class_type('InputChangedEventHandler')
+
+
+class ValidateInputsEventHandler(EventHandler):
+    _class_type = _class_type('ValidateInputsEventHandler')
+
+
+class HTMLEventHandler(EventHandler):
+    _class_type = _class_type('HTMLEventHandler')
+
+
+class CustomEventHandler(EventHandler):
+    _class_type = _class_type('CustomEventHandler')
+
+
+class Event(Base):
+    _class_type = _class_type('Event')
+
+    def __init__(self, name=''):
+        self._name = name
+        self._handlers = []
+
+    @property
+    def name(self):
+        return self._name
+
+    def remove(self, handler) -> bool:
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+            return True
+        return False
+
+    def _fire(self, args):
+        for handler in list(self._handlers):
+            handler.notify(args)
+        return args
+
+
+# The handler annotations are strings, as in the SWIG generated API, so
+# event_utils.add_handler can resolve the handler type from the event class.
+
+class CommandCreatedEvent(Event):
+    _class_type = _class_type('CommandCreatedEvent')
+
+    def add(self, handler: 'CommandCreatedEventHandler') -> 'bool':
+        self._handlers.append(handler)
+        return True
+
+
+class CommandEvent(Event):
+    _class_type = _class_type('CommandEvent')
+
+    def add(self, handler: 'CommandEventHandler') -> 'bool':
+        self._handlers.append(handler)
+        return True
+
+
+class InputChangedEvent(Event):
+    _class_type = _class_type('InputChangedEvent')
+
+    def add(self, handler: 'InputChangedEventHandler') -> 'bool':
+        self._handlers.append(handler)
+        return True
+
+
+class ValidateInputsEvent(Event):
+    _class_type = _class_type('ValidateInputsEvent')
+
+    def add(self, handler: 'ValidateInputsEventHandler') -> 'bool':
+        self._handlers.append(handler)
+        return True
+
+
+class HTMLEvent(Event):
+    _class_type = _class_type('HTMLEvent')
+
+    def add(self, handler: 'HTMLEventHandler') -> 'bool':
+        self._handlers.append(handler)
+        return True
+
+
+class CustomEvent(Event):
+    _class_type = _class_type('CustomEvent')
+
+    def add(self, handler: 'CustomEventHandler') -> 'bool':
+        self._handlers.append(handler)
+        return True
+
+
+class EventArgs(Base):
+    _class_type = _class_type('EventArgs')
+
+    def __init__(self, firing_event=None):
+        self._firing_event = firing_event
+
+    @property
+    def firingEvent(self):
+        return self._firing_event
+
+
+class CommandCreatedEventArgs(EventArgs):
+    _class_type = _class_type('CommandCreatedEventArgs')
+
+    def __init__(self, command, firing_event=None):
+        super().__init__(firing_event)
+        self._command = command
+
+    @property
+    def command(self):
+        return self._command
+
+
+class CommandEventArgs(CommandCreatedEventArgs):
+    _class_type = _class_type('CommandEventArgs')
+
+    def __init__(self, command, firing_event=None, termination_reason=0):
+        super().__init__(command, firing_event)
+        self._termination_reason = termination_reason
+        self.isValidResult = True
+
+    @property
+    def terminationReason(self):
+        return self._termination_reason
+
+
+class InputChangedEventArgs(EventArgs):
+    _class_type = _class_type('InputChangedEventArgs')
+
+    def __init__(self, changed_input, inputs, firing_event=None):
+        super().__init__(firing_event)
+        self._input = changed_input
+        self._inputs = inputs
+
+    @property
+    def input(self):
+        return self._input
+
+    @property
+    def inputs(self):
+        return self._inputs
+
+
+class HTMLEventArgs(EventArgs):
+    _class_type = _class_type('HTMLEventArgs')
+
+    def __init__(self, action, data, browser_input=None, firing_event=None):
+        super().__init__(firing_event)
+        self._action = action
+        self._data = data
+        self._browser_input = browser_input
+        self.returnData = ''
+
+    @property
+    def action(self):
+        return self._action
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def browserCommandInput(self):
+        return self._browser_input
+
+
+class CustomEventArgs(EventArgs):
+    _class_type = _class_type('CustomEventArgs')
+
+    def __init__(self, additional_info='', firing_event=None):
+        super().__init__(firing_event)
+        self._info = additional_info
+
+    @property
+    def additionalInfo(self):
+        return self._info
+
+
+# ******************************** Selection ********************************
+
+class Selection(Base):
+    _class_type = _class_type('Selection')
+
+    def __init__(self, entity, point=None):
+        self._entity = entity
+        self._point = point or Point3D()
+
+    @property
+    def entity(self):
+        return self._entity
+
+    @property
+    def point(self):
+        return self._point
+
+
+# ******************************** Command inputs ********************************
+
+class ListItem(Base):
+    _class_type = _class_type('ListItem')
+
+    def __init__(self, parent, name, is_selected, icon=''):
+        self._parent = parent
+        self._name = name
+        self._is_selected = is_selected
+        self._icon = icon
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def index(self):
+        return self._parent._items.index(self)
+
+    @property
+    def isSelected(self):
+        return self._is_selected
+
+    @isSelected.setter
+    def isSelected(self, value):
+        if value and self._parent._single_select:
+            for item in self._parent._items:
+                item._is_selected = False
+        self._is_selected = value
+
+    def deleteMe(self):
+        self._parent._items.remove(self)
+        return True
+
+
+class ListItems(Base):
+    _class_type = _class_type('ListItems')
+
+    def __init__(self, single_select=True):
+        self._items = []
+        self._single_select = single_select
+
+    def add(self, name, isSelected, icon='', beforeIndex=-1):
+        item = ListItem(self, name, False, icon)
+        if beforeIndex < 0:
+            self._items.append(item)
+        else:
+            self._items.insert(beforeIndex, item)
+        item.isSelected = isSelected
+        return item
+
+    def item(self, index):
+        return self._items[index]
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    def clear(self):
+        self._items.clear()
+        return True
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+
+class CommandInput(Base):
+    _class_type = _class_type('CommandInput')
+
+    def __init__(self, owner, input_id, name):
+        self._owner = owner
+        self._id = input_id
+        self._name = name
+        self.isEnabled = True
+        self.isVisible = True
+        self.isFullWidth = False
+        self.tooltip = ''
+        self.tooltipDescription = ''
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def parentCommand(self):
+        return self._owner._command
+
+    @property
+    def commandInputs(self):
+        return self._owner
+
+    @property
+    def parentCommandInput(self):
+        return self._owner._parent_input
+
+    def deleteMe(self):
+        self._owner._remove(self)
+        self._deleted = True
+        return True
+
+
+class _ValueMixin:
+    def _init_value(self, value_input, units='cm'):
+        self._units = units
+        if value_input is None:
+            self._value, self._expression = 0.0, f'0.0 {units}'
+        elif value_input._real is not None:
+            self._value = value_input._real
+            self._expression = f'{value_input._real} {units}'
+        else:
+            self._value = _parse_real(value_input._string)
+            self._expression = value_input._string
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = float(value)
+        self._expression = f'{value} {self._units}'
+
+    @property
+    def expression(self):
+        return self._expression
+
+    @expression.setter
+    def expression(self, expression):
+        self._expression = expression
+        self._value = _parse_real(expression)
+
+    @property
+    def unitType(self):
+        return self._units
+
+    def setManipulator(self, *args):
+        self._manipulator = args
+        return True
+
+
+class TextBoxCommandInput(CommandInput):
+    _class_type = _class_type('TextBoxCommandInput')
+
+    def __init__(self, owner, input_id, name, text, num_rows, is_read_only):
+        super().__init__(owner, input_id, name)
+        self._text = text
+        self.numRows = num_rows
+        self.isReadOnly = is_read_only
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, value):
+        self._text = value
+
+    @property
+    def formattedText(self):
+        return self._text
+
+    @formattedText.setter
+    def formattedText(self, value):
+        self._text = value
+
+
+class ValueCommandInput(_ValueMixin, CommandInput):
+    _class_type = _class_type('ValueCommandInput')
+
+    def __init__(self, owner, input_id, name, units, value_input):
+        super().__init__(owner, input_id, name)
+        self._init_value(value_input, units)
+
+
+class DistanceValueCommandInput(ValueCommandInput):
+    _class_type = _class_type('DistanceValueCommandInput')
+
+    def __init__(self, owner, input_id, name, value_input):
+        super().__init__(owner, input_id, name, 'cm', value_input)
+        self.minimumValue = None
+        self.maximumValue = None
+        self.isMinimumValueInclusive = True
+        self.isMaximumValueInclusive = True
+
+
+class AngleValueCommandInput(ValueCommandInput):
+    _class_type = _class_type('AngleValueCommandInput')
+
+    def __init__(self, owner, input_id, name, value_input):
+        super().__init__(owner, input_id, name, 'rad', value_input)
+        self.minimumValue = None
+        self.maximumValue = None
+        self.isMinimumValueInclusive = True
+        self.isMaximumValueInclusive = True
+
+
+class StringValueCommandInput(CommandInput):
+    _class_type = _class_type('StringValueCommandInput')
+
+    def __init__(self, owner, input_id, name, value):
+        super().__init__(owner, input_id, name)
+        self.value = value
+        self.isPassword = False
+        self.isReadOnly = False
+
+
+class BoolValueCommandInput(CommandInput):
+    _class_type = _class_type('BoolValueCommandInput')
+
+    def __init__(self, owner, input_id, name, is_check_box, resource_folder, initial_value):
+        super().__init__(owner, input_id, name)
+        self.isCheckBox = is_check_box
+        self.resourceFolder = resource_folder
+        self.value = initial_value
+        self.text = ''
+
+
+class _ListMixin:
+    @property
+    def listItems(self):
+        return self._list_items
+
+    @property
+    def selectedItem(self):
+        for item in self._list_items._items:
+            if item._is_selected:
+                return item
+        return None
+
+
+class ButtonRowCommandInput(_ListMixin, CommandInput):
+    _class_type = _class_type('ButtonRowCommandInput')
+
+    def __init__(self, owner, input_id, name, is_multi_select):
+        super().__init__(owner, input_id, name)
+        self.isMultiSelectEnabled = is_multi_select
+        self._list_items = ListItems(not is_multi_select)
+
+
+class DropDownCommandInput(_ListMixin, CommandInput):
+    _class_type = _class_type('DropDownCommandInput')
+
+    def __init__(self, owner, input_id, name, style):
+        super().__init__(owner, input_id, name)
+        self.dropDownStyle = style
+        self._list_items = ListItems(style != DropDownStyles.CheckBoxDropDownStyle)
+
+
+class RadioButtonGroupCommandInput(_ListMixin, CommandInput):
+    _class_type = _class_type('RadioButtonGroupCommandInput')
+
+    def __init__(self, owner, input_id, name):
+        super().__init__(owner, input_id, name)
+        self._list_items = ListItems(True)
+
+
+class DirectionCommandInput(CommandInput):
+    _class_type = _class_type('DirectionCommandInput')
+
+    def __init__(self, owner, input_id, name, resource_folder='', use_default_images=True):
+        super().__init__(owner, input_id, name)
+        self.resourceFolder = resource_folder
+        self.isDirectionFlipped = False
+        self._manipulator = None
+
+    def setManipulator(self, *args):
+        self._manipulator = args
+        return True
+
+
+class SelectionCommandInput(CommandInput):
+    _class_type = _class_type('SelectionCommandInput')
+
+    def __init__(self, owner, input_id, name, prompt):
+        super().__init__(owner, input_id, name)
+        self.commandPrompt = prompt
+        self._filters = []
+        self._limits = (1, 0)
+        self._selections = []
+
+    def addSelectionFilter(self, filter_name):
+        self._filters.append(filter_name)
+        return True
+
+    def clearSelectionFilter(self):
+        self._filters.clear()
+        return True
+
+    def setSelectionLimits(self, minimum, maximum=0):
+        self._limits = (minimum, maximum)
+        return True
+
+    @property
+    def selectionCount(self):
+        return len(self._selections)
+
+    def selection(self, index):
+        return self._selections[index]
+
+    def addSelection(self, entity):
+        self._selections.append(entity if isinstance(entity, Selection) else Selection(entity))
+        return True
+
+    def clearSelection(self):
+        self._selections.clear()
+        return True
+
+
+class _SliderMixin:
+    def _init_slider(self, minimum, maximum, has_two_sliders):
+        self.minimumValue = minimum
+        self.maximumValue = maximum
+        self.hasTwoSliders = has_two_sliders
+        self.valueOne = minimum
+        self.valueTwo = maximum if has_two_sliders else None
+        self._text = ('', '')
+
+    def setText(self, left, right):
+        self._text = (left, right)
+        return True
+
+
+class FloatSliderCommandInput(_SliderMixin, CommandInput):
+    _class_type = _class_type('FloatSliderCommandInput')
+
+    def __init__(self, owner, input_id, name, units, minimum, maximum, has_two_sliders=False, values=None):
+        super().__init__(owner, input_id, name)
+        self.unitType = units
+        self.valueList = list(values) if values else []
+        self._init_slider(minimum, maximum, has_two_sliders)
+
+
+class IntegerSliderCommandInput(_SliderMixin, CommandInput):
+    _class_type = _class_type('IntegerSliderCommandInput')
+
+    def __init__(self, owner, input_id, name, minimum, maximum, has_two_sliders=False, values=None):
+        super().__init__(owner, input_id, name)
+        self.valueList = list(values) if values else []
+        self._init_slider(minimum, maximum, has_two_sliders)
+
+
+class FloatSpinnerCommandInput(CommandInput):
+    _class_type = _class_type('FloatSpinnerCommandInput')
+
+    def __init__(self, owner, input_id, name, units, minimum, maximum, step, initial):
+        super().__init__(owner, input_id, name)
+        self.unitType = units
+        self.minimumValue = minimum
+        self.maximumValue = maximum
+        self.spinStep = step
+        self.value = initial
+
+    @property
+    def expression(self):
+        return f'{self.value} {self.unitType}'
+
+    @expression.setter
+    def expression(self, expression):
+        self.value = float(expression.split()[0])
+
+
+class IntegerSpinnerCommandInput(CommandInput):
+    _class_type = _class_type('IntegerSpinnerCommandInput')
+
+    def __init__(self, owner, input_id, name, minimum, maximum, step, initial):
+        super().__init__(owner, input_id, name)
+        self.minimumValue = minimum
+        self.maximumValue = maximum
+        self.spinStep = step
+        self.value = initial
+
+
+class GroupCommandInput(CommandInput):
+    _class_type = _class_type('GroupCommandInput')
+
+    def __init__(self, owner, input_id, name):
+        super().__init__(owner, input_id, name)
+        self.isExpanded = True
+        self.isEnabledCheckBoxDisplayed = False
+        self._children = CommandInputs(owner._command, parent_input=self)
+
+    @property
+    def children(self):
+        return self._children
+
+
+class TableCommandInput(CommandInput):
+    _class_type = _class_type('TableCommandInput')
+
+    def __init__(self, owner, input_id, name, number_of_columns, column_ratio):
+        super().__init__(owner, input_id, name)
+        self.numberOfColumns = number_of_columns
+        self.columnRatio = column_ratio
+        self.maximumVisibleRows = 4
+        self.minimumVisibleRows = 2
+        self.selectedRow = -1
+        self._rows = []
+        self._toolbar = []
+        self._children = CommandInputs(owner._command, parent_input=self)
+
+    @property
+    def commandInputs(self):
+        return self._children
+
+    @property
+    def rowCount(self):
+        return len(self._rows)
+
+    def addCommandInput(self, command_input, row, column, rowSpan=0, columnSpan=0):
+        while len(self._rows) <= row:
+            self._rows.append({})
+        self._rows[row][column] = command_input
+        command_input._row = row
+        return True
+
+    def getInputAtPosition(self, row, column):
+        if 0 <= row < len(self._rows):
+            return self._rows[row].get(column)
+        return None
+
+    def getPosition(self, command_input):
+        for row_index, row in enumerate(self._rows):
+            for column, item in row.items():
+                if item is command_input:
+                    return True, row_index, column, 0, 0
+        return False, -1, -1, 0, 0
+
+    def deleteRow(self, row):
+        if not 0 <= row < len(self._rows):
+            return False
+        for command_input in self._rows.pop(row).values():
+            command_input._owner._remove(command_input)
+            command_input._deleted = True
+        if self.selectedRow >= len(self._rows):
+            self.selectedRow = -1
+        return True
+
+    def clear(self):
+        while self._rows:
+            self.deleteRow(len(self._rows) - 1)
+        return True
+
+    def addToolbarCommandInput(self, command_input):
+        self._toolbar.append(command_input)
+        return True
+
+    @property
+    def tablePresentationStyle(self):
+        return 0
+
+
+class BrowserCommandInput(CommandInput):
+    _class_type = _class_type('BrowserCommandInput')
+
+    def __init__(self, owner, input_id, name, html_file_url, minimum_height):
+        super().__init__(owner, input_id, name)
+        self.htmlFileURL = html_file_url
+        self.minimumHeight = minimum_height
+        self.maximumHeight = 0
+        # (action, data) pairs sent across the bridge, newest last
+        self._sent = []
+
+    def sendInfoToHTML(self, action, data):
+        self._sent.append((action, data))
+        return 'OK'
+
+
+class CommandInputs(Base):
+    _class_type = _class_type('CommandInputs')
+
+    def __init__(self, command, parent_input=None):
+        self._command = command
+        self._parent_input = parent_input
+        self._items = []
+
+    def __iter__(self):
+        return iter(list(self._items))
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def count(self):
+        return len(self._items)
+
+    @property
+    def command(self):
+        return self._command
+
+    def item(self, index):
+        return self._items[index]
+
+    def itemById(self, input_id):
+        # Like Fusion, ids are unique per command so nested inputs are found too.
+        return self._command._inputs_by_id.get(input_id)
+
+    def _add(self, command_input):
+        if command_input._id in self._command._inputs_by_id:
+            raise RuntimeError(f'3 : duplicate command input id: {command_input._id}')
+        self._command._inputs_by_id[command_input._id] = command_input
+        self._items.append(command_input)
+        return command_input
+
+    def _remove(self, command_input):
+        self._command._inputs_by_id.pop(command_input._id, None)
+        if command_input in self._items:
+            self._items.remove(command_input)
+
+    def addTextBoxCommandInput(self, input_id, name, formatted_text, num_rows, is_read_only):
+        return self._add(TextBoxCommandInput(self, input_id, name, formatted_text, num_rows, is_read_only))
+
+    def addValueInput(self, input_id, name, unit_type, initial_value):
+        return self._add(ValueCommandInput(self, input_id, name, unit_type, initial_value))
+
+    def addDistanceValueCommandInput(self, input_id, name, initial_value):
+        return self._add(DistanceValueCommandInput(self, input_id, name, initial_value))
+
+    def addAngleValueCommandInput(self, input_id, name, initial_value):
+        return self._add(AngleValueCommandInput(self, input_id, name, initial_value))
+
+    def addStringValueInput(self, input_id, name, initial_value=''):
+        return self._add(StringValueCommandInput(self, input_id, name, initial_value))
+
+    def addBoolValueInput(self, input_id, name, is_check_box, resource_folder='', initial_value=False):
+        return self._add(BoolValueCommandInput(self, input_id, name, is_check_box, resource_folder, initial_value))
+
+    def addButtonRowCommandInput(self, input_id, name, is_multi_select):
+        return self._add(ButtonRowCommandInput(self, input_id, name, is_multi_select))
+
+    def addDropDownCommandInput(self, input_id, name, drop_down_style):
+        return self._add(DropDownCommandInput(self, input_id, name, drop_down_style))
+
+    def addRadioButtonGroupCommandInput(self, input_id, name=''):
+        return self._add(RadioButtonGroupCommandInput(self, input_id, name))
+
+    def addDirectionCommandInput(self, input_id, name, resource_folder='', use_default_images=True):
+        return self._add(DirectionCommandInput(self, input_id, name, resource_folder, use_default_images))
+
+    def addSelectionInput(self, input_id, name, command_prompt):
+        return self._add(SelectionCommandInput(self, input_id, name, command_prompt))
+
+    def addGroupCommandInput(self, input_id, name):
+        return self._add(GroupCommandInput(self, input_id, name))
+
+    def addTableCommandInput(self, input_id, name, number_of_columns, column_ratio):
+        return self._add(TableCommandInput(self, input_id, name, number_of_columns, column_ratio))
+
+    def addBrowserCommandInput(self, input_id, name, html_file_url, minimum_height, maximum_height=0):
+        return self._add(BrowserCommandInput(self, input_id, name, html_file_url, minimum_height))
+
+    def addFloatSliderCommandInput(self, input_id, name, unit_type, minimum, maximum, has_two_sliders=False):
+        return self._add(FloatSliderCommandInput(self, input_id, name, unit_type, minimum, maximum, has_two_sliders))
+
+    def addFloatSliderListCommandInput(self, input_id, name, unit_type, value_list, has_two_sliders=False):
+        return self._add(FloatSliderCommandInput(
+            self, input_id, name, unit_type, min(value_list), max(value_list), has_two_sliders, value_list))
+
+    def addFloatSpinnerCommandInput(self, input_id, name, unit_type, minimum, maximum, spin_step, initial_value):
+        return self._add(FloatSpinnerCommandInput(
+            self, input_id, name, unit_type, minimum, maximum, spin_step, initial_value))
+
+    def addIntegerSliderCommandInput(self, input_id, name, minimum, maximum, has_two_sliders=False):
+        return self._add(IntegerSliderCommandInput(self, input_id, name, minimum, maximum, has_two_sliders))
+
+    def addIntegerSliderListCommandInput(self, input_id, name, value_list, has_two_sliders=False):
+        return self._add(IntegerSliderCommandInput(
+            self, input_id, name, min(value_list), max(value_list), has_two_sliders, value_list))
+
+    def addIntegerSpinnerCommandInput(self, input_id, name, minimum, maximum, spin_step, initial_value):
+        return self._add(IntegerSpinnerCommandInput(
+            self, input_id, name, minimum, maximum, spin_step, initial_value))
+
+
+# ******************************** Commands ********************************
+
+class Command(Base):
+    _class_type = _class_type('Command')
+
+    def __init__(self, definition):
+        self._definition = definition
+        self._inputs_by_id = {}
+        self._command_inputs = CommandInputs(self)
+        self._execute = CommandEvent('execute')
+        self._execute_preview = CommandEvent('executePreview')
+        self._destroy = CommandEvent('destroy')
+        self._input_changed = InputChangedEvent('inputChanged')
+        self._validate_inputs = ValidateInputsEvent('validateInputs')
+        self._incoming_from_html = HTMLEvent('incomingFromHTML')
+        self.isOKButtonVisible = True
+        self.okButtonText = 'OK'
+        self.cancelButtonText = 'Cancel'
+        self.isAutoExecute = False
+
+    @property
+    def parentCommandDefinition(self):
+        return self._definition
+
+    @property
+    def commandInputs(self):
+        return self._command_inputs
+
+    @property
+    def execute(self):
+        return self._execute
+
+    @property
+    def executePreview(self):
+        return self._execute_preview
+
+    @property
+    def destroy(self):
+        return self._destroy
+
+    @property
+    def inputChanged(self):
+        return self._input_changed
+
+    @property
+    def validateInputs(self):
+        return self._validate_inputs
+
+    @property
+    def incomingFromHTML(self):
+        return self._incoming_from_html
+
+    def doExecute(self, terminate=True):
+        self._execute._fire(CommandEventArgs(self, self._execute))
+        if terminate:
+            self._terminate(CommandTerminationReason.CompletedTerminationReason)
+        return True
+
+    def _change_input(self, command_input):
+        return self._input_changed._fire(InputChangedEventArgs(command_input, command_input._owner, self._input_changed))
+
+    def _send_html(self, browser_input, action, data):
+        return self._incoming_from_html._fire(HTMLEventArgs(action, data, browser_input, self._incoming_from_html))
+
+    def _terminate(self, reason=CommandTerminationReason.CancelledTerminationReason):
+        self._destroy._fire(CommandEventArgs(self, self._destroy, reason))
+        self._deleted = True
+
+
+class CommandDefinition(Base):
+    _class_type = _class_type('CommandDefinition')
+
+    def __init__(self, owner, definition_id, name, tooltip, resource_folder):
+        self._owner = owner
+        self._id = definition_id
+        self._name = name
+        self.tooltip = tooltip
+        self.resourceFolder = resource_folder
+        self._command_created = CommandCreatedEvent('commandCreated')
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def commandCreated(self):
+        return self._command_created
+
+    def execute(self, inputs=None):
+        command = Command(self)
+        self._command_created._fire(CommandCreatedEventArgs(command, self._command_created))
+        return command
+
+    def deleteMe(self):
+        self._owner._items.pop(self._id, None)
+        self._deleted = True
+        return True
+
+
+class CommandDefinitions(Base):
+    _class_type = _class_type('CommandDefinitions')
+
+    def __init__(self):
+        self._items = {}
+
+    def addButtonDefinition(self, definition_id, name, tooltip, resource_folder=''):
+        if definition_id in self._items:
+            raise RuntimeError(f'3 : command definition already exists: {definition_id}')
+        definition = CommandDefinition(self, definition_id, name, tooltip, resource_folder)
+        self._items[definition_id] = definition
+        return definition
+
+    def itemById(self, definition_id):
+        return self._items.get(definition_id)
+
+    @property
+    def count(self):
+        return len(self._items)
+
+
+# ******************************** Toolbars ********************************
+
+class CommandControl(Base):
+    _class_type = _class_type('CommandControl')
+
+    def __init__(self, owner, definition):
+        self._owner = owner
+        self._definition = definition
+        self.isPromoted = False
+        self.isPromotedByDefault = False
+        self.isVisible = True
+
+    @property
+    def id(self):
+        return self._definition._id
+
+    @property
+    def commandDefinition(self):
+        return self._definition
+
+    def deleteMe(self):
+        self._owner._items.pop(self._definition._id, None)
+        self._deleted = True
+        return True
+
+
+class ToolbarControls(Base):
+    _class_type = _class_type('ToolbarControls')
+
+    def __init__(self):
+        self._items = {}
+
+    def addCommand(self, command_definition, positionID='', isBefore=True):
+        control = CommandControl(self, command_definition)
+        self._items[command_definition._id] = control
+        return control
+
+    def itemById(self, control_id):
+        return self._items.get(control_id)
+
+    @property
+    def count(self):
+        return len(self._items)
+
+
+class ToolbarPanel(Base):
+    _class_type = _class_type('ToolbarPanel')
+
+    def __init__(self, owner, panel_id, name):
+        self._owner = owner
+        self._id = panel_id
+        self._name = name
+        self._controls = ToolbarControls()
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def controls(self):
+        return self._controls
+
+    def deleteMe(self):
+        self._owner._items.pop(self._id, None)
+        self._deleted = True
+        return True
+
+
+class ToolbarPanels(Base):
+    _class_type = _class_type('ToolbarPanels')
+
+    def __init__(self, workspace):
+        self._workspace = workspace
+        self._items = {}
+
+    def add(self, panel_id, name, positionID='', isBefore=True):
+        panel = ToolbarPanel(self, panel_id, name)
+        self._items[panel_id] = panel
+        return panel
+
+    def itemById(self, panel_id):
+        return self._items.get(panel_id)
+
+    @property
+    def count(self):
+        return len(self._items)
+
+
+class WorkspaceToolbarPanels(Base):
+    """All panels of a workspace, across its toolbar tabs."""
+    _class_type = _class_type('ToolbarPanelList')
+
+    def __init__(self, workspace):
+        self._workspace = workspace
+
+    def _all(self):
+        for tab in self._workspace._tabs._items.values():
+            yield from tab._panels._items.values()
+
+    def itemById(self, panel_id):
+        for panel in self._all():
+            if panel._id == panel_id:
+                return panel
+        return None
+
+    @property
+    def count(self):
+        return sum(1 for _ in self._all())
+
+
+class ToolbarTab(Base):
+    _class_type = _class_type('ToolbarTab')
+
+    def __init__(self, owner, tab_id, name):
+        self._owner = owner
+        self._id = tab_id
+        self._name = name
+        self._panels = ToolbarPanels(owner._workspace)
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def toolbarPanels(self):
+        return self._panels
+
+    def activate(self):
+        return True
+
+    def deleteMe(self):
+        self._owner._items.pop(self._id, None)
+        self._deleted = True
+        return True
+
+
+class ToolbarTabs(Base):
+    _class_type = _class_type('ToolbarTabs')
+
+    def __init__(self, workspace):
+        self._workspace = workspace
+        self._items = {}
+
+    def add(self, tab_id, name):
+        tab = ToolbarTab(self, tab_id, name)
+        self._items[tab_id] = tab
+        return tab
+
+    def itemById(self, tab_id):
+        return self._items.get(tab_id)
+
+    @property
+    def count(self):
+        return len(self._items)
+
+
+class Workspace(Base):
+    _class_type = _class_type('Workspace')
+
+    def __init__(self, workspace_id):
+        self._id = workspace_id
+        self._tabs = ToolbarTabs(self)
+        self._panels = WorkspaceToolbarPanels(self)
+
+    @property
+    def id(self):
+        return self._id
+
+    @property
+    def toolbarTabs(self):
+        return self._tabs
+
+    @property
+    def toolbarPanels(self):
+        return self._panels
+
+
+class Workspaces(Base):
+    _class_type = _class_type('Workspaces')
+
+    def __init__(self):
+        self._items = {}
+
+    def itemById(self, workspace_id):
+        # Every workspace exists in the stand-in, they are created on demand.
+        if workspace_id not in self._items:
+            self._items[workspace_id] = Workspace(workspace_id)
+        return self._items[workspace_id]
+
+
+class Palette(Base):
+    _class_type = _class_type('Palette')
+
+    def __init__(self, palette_id):
+        self._id = palette_id
+        self.isVisible = False
+
+    @property
+    def id(self):
+        return self._id
+
+
+class Palettes(Base):
+    _class_type = _class_type('Palettes')
+
+    def __init__(self):
+        self._items = {}
+
+    def itemById(self, palette_id):
+        if palette_id not in self._items:
+            self._items[palette_id] = Palette(palette_id)
+        return self._items[palette_id]
+
+
+class FileDialog(Base):
+    _class_type = _class_type('FileDialog')
+
+    def __init__(self, ui):
+        self._ui = ui
+        self.title = ''
+        self.filter = ''
+        self.filterIndex = 0
+        self.initialDirectory = ''
+        self.isMultiSelectEnabled = False
+        self.filename = ''
+
+    def _show(self):
+        # The stand-in answers with the next path queued in UserInterface._file_dialog_answers.
+        if not self._ui._file_dialog_answers:
+            return DialogResults.DialogCancel
+        self.filename = self._ui._file_dialog_answers.popleft()
+        return DialogResults.DialogOK
+
+    def showOpen(self):
+        return self._show()
+
+    def showSave(self):
+        return self._show()
+
+    @property
+    def filenames(self):
+        return [self.filename] if self.filename else []
+
+
+class UserInterface(Base):
+    _class_type = _class_type('UserInterface')
+
+    def __init__(self):
+        self._workspaces = Workspaces()
+        self._command_definitions = CommandDefinitions()
+        self._palettes = Palettes()
+        # The latest message box texts, newest last
+        self._messages = collections.deque(maxlen=100)
+        # Paths the next file dialogs return, any dialog shown with none queued is cancelled
+        self._file_dialog_answers = collections.deque()
+
+    @property
+    def workspaces(self):
+        return self._workspaces
+
+    @property
+    def commandDefinitions(self):
+        return self._command_definitions
+
+    @property
+    def palettes(self):
+        return self._palettes
+
+    def messageBox(self, text, title='', buttons=0, icon=0):
+        self._messages.append((title, text))
+        return DialogResults.DialogOK
+
+    def createFileDialog(self):
+        return FileDialog(self)
+
+
+# ******************************** Application ********************************
+
+class UnitsManager(Base):
+    _class_type = _class_type('UnitsManager')
+
+    @property
+    def defaultLengthUnits(self):
+        return 'cm'
+
+
+class Document(Base):
+    _class_type = _class_type('Document')
+
+    def __init__(self, name='Untitled', creation_id='00000000-0000-0000-0000-000000000000'):
+        self._name = name
+        self._creation_id = creation_id
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def creationId(self):
+        return self._creation_id
+
+
+class Product(Base):
+    _class_type = _class_type('Product')
+
+    def __init__(self):
+        self._units_manager = UnitsManager()
+
+    @property
+    def unitsManager(self):
+        return self._units_manager
+
+
+class Application(Base):
+    _class_type = _class_type('Application')
+    _instance = None
+
+    def __init__(self):
+        self._ui = UserInterface()
+        self._product = Product()
+        self._document = Document()
+        self._custom_events = {}
+        self._pending_custom_events = []
+        # The latest (message, level, log_type) tuples, newest last. Bounded so long benchmarks don't grow it.
+        self._log = collections.deque(maxlen=2000)
+        # Every message logged at ErrorLogLevel, kept apart so none is pushed out of _log
+        self._errors = []
+
+    @staticmethod
+    def get():
+        if Application._instance is None:
+            Application._instance = Application()
+        return Application._instance
+
+    @property
+    def userInterface(self):
+        return self._ui
+
+    @property
+    def activeProduct(self):
+        return self._product
+
+    @property
+    def activeDocument(self):
+        return self._document
+
+    def log(self, message, level=LogLevels.InfoLogLevel, type=LogTypes.ConsoleLogType):
+        self._log.append((message, level, type))
+        if level == LogLevels.ErrorLogLevel:
+            self._errors.append(message)
+
+    def registerCustomEvent(self, event_id):
+        event = self._custom_events.get(event_id)
+        if event is None:
+            event = self._custom_events[event_id] = CustomEvent(event_id)
+        return event
+
+    def unregisterCustomEvent(self, event_id):
+        return self._custom_events.pop(event_id, None) is not None
+
+    def fireCustomEvent(self, event_id, additionalInfo=''):
+        if event_id not in self._custom_events:
+            return False
+        # Fusion queues custom events and delivers them on the main thread later.
+        self._pending_custom_events.append((event_id, additionalInfo))
+        return True
+
+    def _process_custom_events(self):
+        """Delivers queued custom events, as Fusion's main loop would."""
+        delivered = 0
+        while self._pending_custom_events:
+            event_id, info = self._pending_custom_events.pop(0)
+            event = self._custom_events.get(event_id)
+            if event is not None:
+                event._fire(CustomEventArgs(info, event))
+                delivered += 1
+        return delivered
@@ -0,0 +1,94 @@
+"""Headless stand-in for ``adsk.fusion``, modelling the entities the samples select."""
+from .core import Base, Plane, Point3D, Vector3D
+
+
+def _class_type(name):
+    return f'adsk::fusion::{name}'
+
+
+class Component(Base):
+    _class_type = _class_type('Component')
+
+    def __init__(self, name='Component1'):
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def objectType(self):
+        return type(self)._class_type
+
+
+class BRepBody(Base):
+    _class_type = _class_type('BRepBody')
+
+    def __init__(self, name='Body1', parent_component=None):
+        self._name = name
+        self._parent_component = parent_component or Component()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def parentComponent(self):
+        return self._parent_component
+
+
+class BRepFace(Base):
+    _class_type = _class_type('BRepFace')
+
+    def __init__(self, body=None, geometry=None, name='Face1'):
+        self._body = body or BRepBody()
+        self._geometry = geometry or Plane(Point3D(), Vector3D(0, 0, 1))
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def body(self):
+        return self._body
+
+    @property
+    def geometry(self):
+        return self._geometry
+
+
+class ConstructionPlane(Base):
+    _class_type = _class_type('ConstructionPlane')
+
+    def __init__(self, name='Plane1', geometry=None):
+        self._name = name
+        self._geometry = geometry or Plane(Point3D(), Vector3D(0, 0, 1))
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def geometry(self):
+        return self._geometry
+
+
+class Occurrence(Base):
+    _class_type = _class_type('Occurrence')
+
+    def __init__(self, name='Component1:1', component=None):
+        self._name = name
+        self._component = component or Component()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def component(self):
+        return self._component
+
+
+class Design(Base):
+    _class_type = _class_type('Design')
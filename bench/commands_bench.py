@@ -0,0 +1,436 @@
+"""Benchmarks the add-in and every command against the headless adsk stand-in.
+
+Each repetition runs the add-in, then opens every command's dialog, changes
+each of its inputs in turn, sends a message from any HTML page, clicks OK and
+closes it, and finally stops the add-in. Every step is timed along with the
+number of simulated API round trips it made. Then every dialog is opened and
+closed many more times (--cycles, 500 by default) to check that memory
+stays flat, within --max-growth KiB, that no handler outlives its dialog and
+that none is left connected once the add-in stops. The exit code is 1 if any
+of those checks fail or if any error is logged during the run.
+
+A few metrics that matter most are also measured on their own and tracked:
+the time of commands.start(), the rows per second Table.add_row_to_table and
+Table.add_rows add, the time of Table.command_execute with those rows and
+the time of Everything.log_command_inputs and the time to reopen the Table
+from a snapshot of 500 rows. Dragging Everything's angle
+manipulator is measured as well, as a step per pointer-rate change, and
+so is changing the Browser's selection at that rate, along with the number
+of messages that crossed to its page and their size. With --store each run is saved
+keyed by git commit and the tracked metrics are compared against a baseline,
+see results_store.py. The exit code is also 1 if any of them regressed.
+
+Run from the repository root:
+
+    python bench/commands_bench.py [--repeat 20] [--latency 0.00005] [--output results.json]
+    python bench/commands_bench.py --store bench/results [--baseline auto] [--threshold 0.1]
+
+The stand-in in bench/adsk is imported in place of Fusion's module. With
+--latency every API round trip costs that many seconds, so changes that make
+fewer calls into Fusion show up in the timings.
+"""
+import argparse
+import contextlib
+import gc
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+
+# The stand-in must win over any adsk module that happens to be installed.
+sys.path[:0] = [str(BENCH_DIR), str(REPO_ROOT)]
+
+import adsk  # noqa: E402
+import adsk.core  # noqa: E402
+import adsk.fusion  # noqa: E402
+import results_store  # noqa: E402
+
+# Metrics gated by --store, and whether a lower or a higher value is better
+TRACKED_METRICS = {
+    'commands.start': 'lower',
+    'Table.add_row_to_table': 'higher',
+    'Table.add_rows': 'higher',
+    'Table.command_execute': 'lower',
+    'Everything.log_command_inputs': 'lower',
+    'Table.restore': 'lower',
+}
+
+# Rows of the Table snapshot when it is closed and restored when it is reopened
+RESTORE_ROWS = 500
+
+# Most memory the second half of the open/close cycles may retain beyond the first, in KiB.
+# A dialog whose handlers or inputs outlive it retains far more than this over a thousand cycles.
+SESSION_GROWTH_LIMIT_KIB = 64
+
+# Changes made while dragging an input, and the seconds between them (pointer rate)
+DRAG_EVENTS = 30
+DRAG_EVENT_INTERVAL = 1 / 240
+
+
+class Recorder:
+    """Collects the duration and API round trips of each repetition of a step."""
+
+    def __init__(self):
+        self.samples = {}
+        self.units = {}
+
+    @contextlib.contextmanager
+    def step(self, name):
+        calls_before = sum(adsk.core.api_calls.values())
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            calls = sum(adsk.core.api_calls.values()) - calls_before
+            self.samples.setdefault(name, []).append((elapsed, calls))
+
+    def rate(self, name, count, elapsed, calls=0):
+        """Records a throughput sample, count items in elapsed seconds."""
+        self.units[name] = 'per_s'
+        self.samples.setdefault(name, []).append((count / elapsed, calls / count))
+
+    def count(self, name, count):
+        """Records a sample that is a count of something rather than a duration."""
+        self.units[name] = 'count'
+        self.samples.setdefault(name, []).append((count, 0))
+
+    def clear(self):
+        self.samples.clear()
+        self.units.clear()
+
+    def summary(self):
+        results = {}
+        for name, samples in self.samples.items():
+            values = sorted(value for value, _ in samples)
+            results[name] = {
+                'unit': self.units.get(name, 's'),
+                'count': len(values),
+                'median': statistics.median(values),
+                'mad': results_store.median_absolute_deviation(values),
+                'mean': statistics.fmean(values),
+                'min': values[0],
+                'max': values[-1],
+                'p95': values[min(len(values) - 1, int(0.95 * len(values)))],
+                'api_calls': statistics.fmean(calls for _, calls in samples),
+                'samples': values,
+            }
+        return results
+
+
+def _select_something(command):
+    # Fusion only enables OK once every selection input has a selection.
+    for command_input in command._inputs_by_id.values():
+        if isinstance(command_input, adsk.core.SelectionCommandInput) and not command_input.selectionCount:
+            command_input.addSelection(adsk.core.Selection(adsk.fusion.ConstructionPlane()))
+
+
+def drive_command(recorder, definition, name):
+    """Opens a command dialog, uses every input, clicks OK and closes it."""
+    with recorder.step(f'{name}.command_created'):
+        command = definition.execute()
+
+    _select_something(command)
+    for command_input in list(command._inputs_by_id.values()):
+        with recorder.step(f'{name}.input_changed'):
+            command._change_input(command_input)
+
+    for command_input in list(command._inputs_by_id.values()):
+        if isinstance(command_input, adsk.core.BrowserCommandInput):
+            with recorder.step(f'{name}.incoming_from_html'):
+                command._send_html(command_input, 'formMessage', '{"formInputValue": "benchmark"}')
+
+    with recorder.step(f'{name}.execute'):
+        command.doExecute(terminate=False)
+
+    with recorder.step(f'{name}.destroy'):
+        command._terminate(adsk.core.CommandTerminationReason.CompletedTerminationReason)
+
+    # Deliver queued custom events such as log flushes, as Fusion's main loop would between dialogs.
+    adsk.doEvents()
+
+
+def run_repetition(recorder, addin, manifest, rows):
+    ui = adsk.core.Application.get().userInterface
+    with recorder.step('addin.run'):
+        addin.run({'IsApplicationStartup': True})
+    # Every repetition starts with dialogs that have no saved state.
+    sys.modules['python.lib.fusionAddInUtils'].get_dialog_state_cache().clear()
+    for command in manifest:
+        drive_command(recorder, ui.commandDefinitions.itemById(command.CMD_ID), command.CMD_NAME)
+    measure_tracked(recorder, addin, rows)
+    with recorder.step('addin.stop'):
+        addin.stop({})
+    adsk.doEvents()
+
+
+def measure_tracked(recorder, addin, rows):
+    """Measures the tracked metrics on their own, with the add-in running."""
+    commands = sys.modules['python.commands']
+    ui = adsk.core.Application.get().userInterface
+
+    commands.stop()
+    with recorder.step('commands.start'):
+        commands.start()
+
+    table = sys.modules['python.commands.Table.entry']
+    command = ui.commandDefinitions.itemById(table.CMD_ID).execute()
+    table_input = command.commandInputs.itemById('table')
+    calls_before = sum(adsk.core.api_calls.values())
+    start = time.perf_counter()
+    for _ in range(rows):
+        table.add_row_to_table(table_input)
+    recorder.rate('Table.add_row_to_table', rows, time.perf_counter() - start,
+                  sum(adsk.core.api_calls.values()) - calls_before)
+    command._terminate()
+
+    command = ui.commandDefinitions.itemById(table.CMD_ID).execute()
+    table_input = command.commandInputs.itemById('table')
+    records = [{'name': f'd{index}', 'value': index * 0.5, 'string': f'{index} mm', 'integer': index % 100}
+               for index in range(rows)]
+    calls_before = sum(adsk.core.api_calls.values())
+    start = time.perf_counter()
+    table.add_rows(table_input, records)
+    recorder.rate('Table.add_rows', rows, time.perf_counter() - start,
+                  sum(adsk.core.api_calls.values()) - calls_before)
+    with recorder.step('Table.command_execute'):
+        command.doExecute(terminate=False)
+    command._terminate()
+
+    # Close the Table with RESTORE_ROWS rows, which snapshots them, and reopen it from the snapshot.
+    futil = sys.modules['python.lib.fusionAddInUtils']
+    futil.get_dialog_state_cache().clear()
+    definition = ui.commandDefinitions.itemById(table.CMD_ID)
+    command = definition.execute()
+    table.add_rows(command.commandInputs.itemById('table'),
+                   [{'name': f'r{index}', 'value': index * 0.5, 'string': f'{index} mm', 'integer': index % 100}
+                    for index in range(RESTORE_ROWS)])
+    with recorder.step('Table.snapshot'):
+        command._terminate()
+    with recorder.step('Table.restore'):
+        command = definition.execute()
+    command._terminate()
+
+    everything = sys.modules['python.commands.Everything.entry']
+    command = ui.commandDefinitions.itemById(everything.CMD_ID).execute()
+    _select_something(command)
+    with recorder.step('Everything.log_command_inputs'):
+        everything.log_command_inputs(command.commandInputs)
+    command._terminate()
+    adsk.doEvents()
+
+    # Drag the angle manipulator, changing it at pointer rate. Fusion's main loop
+    # delivers custom events between the changes, as doEvents does here.
+    command = ui.commandDefinitions.itemById(everything.CMD_ID).execute()
+    angle_input = command.commandInputs.itemById('angle_value_input')
+    for _ in range(DRAG_EVENTS):
+        with recorder.step('Everything.drag_input_changed'):
+            command._change_input(angle_input)
+            adsk.doEvents()
+        time.sleep(DRAG_EVENT_INTERVAL)
+    time.sleep(everything.config.INPUT_COALESCE_INTERVAL)
+    with recorder.step('Everything.drag_input_changed'):
+        adsk.doEvents()
+    command._terminate()
+
+    # Change the Browser's selection at pointer rate, e.g. while hovering a body picked with
+    # preselection. Its messages to the page are queued and sent at most once per frame.
+    browser = sys.modules['python.commands.Browser.entry']
+    command = ui.commandDefinitions.itemById(browser.CMD_ID).execute()
+    selection_input = command.commandInputs.itemById('selection_input')
+    browser_input = command.commandInputs.itemById('browser_input')
+    for index in range(DRAG_EVENTS):
+        selection_input.clearSelection()
+        selection_input.addSelection(adsk.fusion.ConstructionPlane(f'Plane{index}'))
+        with recorder.step('Browser.selection_changed'):
+            command._change_input(selection_input)
+            adsk.doEvents()
+        time.sleep(DRAG_EVENT_INTERVAL)
+    time.sleep(browser.config.HTML_FLUSH_INTERVAL)
+    with recorder.step('Browser.selection_changed'):
+        adsk.doEvents()
+    recorder.count('Browser.selection_burst_crossings', len(browser_input._sent))
+    recorder.count('Browser.selection_burst_bytes', sum(len(data) for _, data in browser_input._sent))
+    command._terminate()
+
+
+def check_sessions(addin, manifest, futil, cycles, growth_limit_kib):
+    """Opens and closes every dialog repeatedly, checking that memory stays flat and no handler leaks.
+
+    :returns:
+        The measurements, with a list of the checks that failed under 'failures'.
+    """
+    app = adsk.core.Application.get()
+    ui = app.userInterface
+    addin.run({'IsApplicationStartup': True})
+    definitions = [ui.commandDefinitions.itemById(command.CMD_ID) for command in manifest]
+
+    def cycle(count):
+        for _ in range(count):
+            for definition in definitions:
+                definition.execute()._terminate()
+            adsk.doEvents()
+
+    def retained():
+        # The stand-in keeps the messages logged to it, they aren't the add-in's memory.
+        app._log.clear()
+        gc.collect()
+        return tracemalloc.get_traced_memory()
+
+    # Warm every cache before measuring, then compare two equally long runs.
+    cycle(max(1, cycles // 10))
+    tracemalloc.start()
+    cycle(cycles // 2)
+    first, _ = retained()
+    cycle(cycles // 2)
+    second, peak = retained()
+    tracemalloc.stop()
+
+    # Stopping closes any session still open, after which nothing may hold a handler.
+    addin.stop({})
+    adsk.doEvents()
+    open_handlers = {name: count for name, count in futil.get_handler_counts().items() if count}
+    leaked = futil.find_leaked_handlers()
+    growth_kib = (second - first) / 1024
+
+    failures = []
+    if leaked:
+        failures.append(f'handlers outlived their session: {leaked}')
+    if open_handlers:
+        failures.append(f'handlers still connected after stop: {open_handlers}')
+    if growth_kib > growth_limit_kib:
+        failures.append(f'{growth_kib:.1f} KiB retained growth, more than the {growth_limit_kib:g} KiB allowed')
+    return {
+        'cycles': cycles,
+        'retained_growth_kib': growth_kib,
+        'peak_kib': peak / 1024,
+        'open_handlers': open_handlers,
+        'leaked_handlers': leaked,
+        'failures': failures,
+    }
+
+
+def format_results(results):
+    lines = [f'{"median ms":>10} {"p95 ms":>10} {"max ms":>10} {"api calls":>10} {"count":>6}  step']
+    for name, row in results.items():
+        if row['unit'] == 'count':
+            lines.append(f'{row["median"]:>10.0f} {"":>10} {row["max"]:>10.0f} '
+                         f'{"":>10} {row["count"]:>6}  {name} (count)')
+            continue
+        if row['unit'] == 'per_s':
+            lines.append(f'{row["median"]:>10.0f} {"":>10} {row["max"]:>10.0f} '
+                         f'{row["api_calls"]:>10.1f} {row["count"]:>6}  {name} (per second, api calls per item)')
+            continue
+        lines.append(
+            f'{row["median"] * 1000:>10.3f} {row["p95"] * 1000:>10.3f} {row["max"] * 1000:>10.3f} '
+            f'{row["api_calls"]:>10.1f} {row["count"]:>6}  {name}'
+        )
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20, help='Measured repetitions of the whole run')
+    parser.add_argument('--warmup', type=int, default=1, help='Repetitions run before measuring, e.g. to import commands')
+    parser.add_argument('--latency', type=float, default=0.0, help='Simulated seconds per API round trip')
+    parser.add_argument('--cycles', type=int, default=500, help='Dialog open/close cycles of the session check')
+    parser.add_argument('--max-growth', type=float, default=SESSION_GROWTH_LIMIT_KIB,
+                        help='KiB the session check may retain between its halves before failing the run')
+    parser.add_argument('--rows', type=int, default=200, help='Rows added per Table.add_row_to_table sample')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--store', help='Save the results to this folder, keyed by git commit, and compare them')
+    parser.add_argument('--baseline', default='auto',
+                        help="Git revision or result file to compare with, 'auto' for the closest ancestor stored")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='Smallest regression of a tracked metric that fails the run, as a fraction')
+    options = parser.parse_args(argv)
+
+    adsk.core.set_latency(options.latency)
+    recorder = Recorder()
+
+    # The add-in logs to the console while DEBUG is set, which would swamp the report.
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        with recorder.step('addin.import'):
+            addin = importlib.import_module('python.JacksAddinPlayground')
+        import_results = recorder.summary()
+        recorder.clear()
+
+        futil = sys.modules['python.lib.fusionAddInUtils']
+        manifest = sys.modules['python.commands'].manifest
+
+        # Dialog snapshots are kept in memory, not written to the add-in's state file.
+        futil.get_dialog_state_cache().path = None
+
+        for _ in range(options.warmup):
+            run_repetition(recorder, addin, manifest, options.rows)
+        recorder.clear()
+        for _ in range(options.repeat):
+            run_repetition(recorder, addin, manifest, options.rows)
+
+        sessions = check_sessions(addin, manifest, futil, options.cycles, options.max_growth)
+
+        # Messages still buffered by log batching count too.
+        futil.flush_log()
+        errors = list(adsk.core.Application.get()._errors)
+
+    results = {**import_results, **recorder.summary()}
+
+    print(f'{options.repeat} repetitions, {options.latency * 1e6:g} us simulated per API call')
+    print(format_results(results))
+    print(f'\nsessions: {sessions["cycles"]} open/close cycles of every command, '
+          f'{sessions["retained_growth_kib"]:.1f} KiB retained growth, {sessions["peak_kib"]:.1f} KiB peak')
+    print(f'open handlers after stop: {sessions["open_handlers"] or "none"}, '
+          f'leaked: {sessions["leaked_handlers"] or "none"}')
+    for failure in sessions['failures']:
+        print(f'session check failed: {failure}')
+    if errors:
+        print(f'{len(errors)} errors were logged, the first was:\n{errors[0]}')
+
+    report = {
+        'created': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'options': vars(options),
+        'results': results,
+        'sessions': sessions,
+        'errors': len(errors),
+    }
+    if options.output:
+        with open(options.output, 'w') as output_file:
+            json.dump(report, output_file, indent=1)
+        print(f'results written to {options.output}')
+
+    # The session check and logged errors fail the run whether or not results are stored and compared.
+    status = 1 if sessions['failures'] or errors else 0
+    if not options.store:
+        return status
+
+    # Load the baseline first, saving may overwrite it when the tree hasn't changed commit.
+    baseline_path = results_store.find_baseline(options.store, options.baseline, cwd=REPO_ROOT)
+    baseline = results_store.load_results(baseline_path) if baseline_path else None
+    print(f'results saved to {results_store.save_results(options.store, report, cwd=REPO_ROOT)}')
+    if baseline is None:
+        print(f'no baseline results found for {options.baseline!r}, nothing to compare with')
+        return status
+
+    if baseline['options'].get('latency') != options.latency:
+        print(f'warning: the baseline was run with {baseline["options"].get("latency")} s simulated latency')
+    rows = results_store.compare(baseline, report, TRACKED_METRICS, options.threshold)
+    print(results_store.format_comparison(rows, f'{baseline["commit"][:10]} ({baseline_path})'))
+    regressed = [row['name'] for row in rows if row['regressed']]
+    if regressed:
+        print(f'{len(regressed)} tracked metrics regressed by more than {options.threshold:.0%}: {", ".join(regressed)}')
+        return 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Micro-benchmark for fusionAddInUtils.event_utils.add_handler.
+
+Simulates dialog open/close cycles: every cycle connects the execute,
+inputChanged, destroy and incomingFromHTML handlers of a command to a fresh
+set of events, then releases them as command_destroy does. The current
+add_handler is compared with the previous implementation, which resolved the
+handler type and defined a new Handler class on every call.
+
+Run from the repository root:
+
+    python bench/event_utils_bench.py [cycles]
+
+The headless adsk stand-in in bench/adsk is imported in place of Fusion's module.
+"""
+import gc
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path[:0] = [str(BENCH_DIR), str(REPO_ROOT)]
+
+import adsk.core  # noqa: E402
+from python.lib.fusionAddInUtils import event_utils  # noqa: E402
+from python.lib.fusionAddInUtils.general_utils import handle_error  # noqa: E402
+
+
+def legacy_add_handler(event, callback, *, name=None, local_handlers=None):
+    """add_handler as it was before handler types and classes were cached."""
+    module = sys.modules[event.__module__]
+    handler_type = module.__dict__[event.add.__annotations__['handler']]
+    name = name or handler_type.__name__
+
+    class Handler(handler_type):
+        def __init__(self):
+            super().__init__()
+
+        def notify(self, args):
+            try:
+                callback(args)
+            except:
+                handle_error(name)
+
+    handler = Handler()
+    (local_handlers if local_handlers is not None else event_utils._handlers).append(handler)
+    event.add(handler)
+    return handler
+
+
+def _callback(args):
+    pass
+
+
+def run_cycles(add_handler, cycles):
+    events = [adsk.core.CommandEvent, adsk.core.InputChangedEvent, adsk.core.CommandEvent, adsk.core.HTMLEvent]
+    calls = 0
+    elapsed = 0.0
+    for _ in range(cycles):
+        local_handlers = []
+        fired = [event_class() for event_class in events]
+        start = time.perf_counter()
+        for event in fired:
+            add_handler(event, _callback, local_handlers=local_handlers)
+        elapsed += time.perf_counter() - start
+        calls += len(fired)
+        # command_destroy drops the session's handlers
+        local_handlers = []
+    return elapsed / calls, calls
+
+
+def measure(label, add_handler, cycles):
+    gc.collect()
+    gc.disable()
+    classes_before = sum(1 for obj in gc.get_objects() if isinstance(obj, type))
+    tracemalloc.start()
+    per_call, calls = run_cycles(add_handler, cycles)
+    _, peak = tracemalloc.get_traced_memory()
+    classes_after = sum(1 for obj in gc.get_objects() if isinstance(obj, type))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.enable()
+    gc.collect()
+
+    print(f'{label:>8}: {per_call * 1e6:8.2f} us per add_handler over {calls} calls, '
+          f'{classes_after - classes_before:6d} new classes, '
+          f'{retained / 1024:9.1f} KiB retained before gc, {peak / 1024:9.1f} KiB peak')
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    print(f'{cycles} dialog open/close cycles, 4 handlers each')
+    measure('before', legacy_add_handler, cycles)
+    measure('after', event_utils.add_handler, cycles)
+
+
+if __name__ == '__main__':
+    main()
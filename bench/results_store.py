@@ -0,0 +1,158 @@
+"""Stores benchmark results keyed by git commit and compares them against a baseline.
+
+Each run is written to STORE/<commit>.json, or STORE/<commit>-dirty.json when
+the working tree has uncommitted changes. A metric regresses when its median
+moves the wrong way by more than both the threshold, as a fraction of the
+baseline median, and the run-to-run noise, estimated from the median absolute
+deviation (MAD) of the samples of both runs.
+"""
+import json
+import os
+import statistics
+import subprocess
+import time
+
+# Bumped whenever the layout of a stored result changes
+SCHEMA_VERSION = 1
+
+# Scale factor making the MAD a consistent estimate of the standard deviation of normally distributed samples
+MAD_TO_SIGMA = 1.4826
+
+
+def median_absolute_deviation(samples):
+    center = statistics.median(samples)
+    return statistics.median(abs(sample - center) for sample in samples)
+
+
+def _git(*args, cwd=None):
+    try:
+        return subprocess.run(('git',) + args, cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def git_state(cwd=None):
+    """Gets the commit checked out and whether the working tree has uncommitted changes.
+
+    :returns:
+        A (commit, dirty) tuple. The commit is None outside a git repository.
+    """
+    commit = _git('rev-parse', 'HEAD', cwd=cwd)
+    dirty = bool(_git('status', '--porcelain', '--untracked-files=no', cwd=cwd))
+    return commit, dirty
+
+
+def result_path(store, commit, dirty=False):
+    return os.path.join(store, f'{commit}{"-dirty" if dirty else ""}.json')
+
+
+def save_results(store, report, cwd=None):
+    """Writes a benchmark report to the store, keyed by the commit checked out.
+
+    Arguments:
+    store -- The folder holding one JSON file per commit.
+    report -- The report, its 'results' map metric names to summaries holding 'samples'.
+    cwd -- A folder inside the git repository, defaults to the current folder.
+
+    :returns:
+        The path written.
+    """
+    commit, dirty = git_state(cwd)
+    record = {
+        'schema': SCHEMA_VERSION,
+        'commit': commit or 'unknown',
+        'dirty': dirty,
+        'saved': time.time(),
+        **report,
+    }
+    os.makedirs(store, exist_ok=True)
+    path = result_path(store, record['commit'], dirty)
+    with open(path, 'w') as result_file:
+        json.dump(record, result_file, indent=1)
+    return path
+
+
+def load_results(path):
+    with open(path) as result_file:
+        record = json.load(result_file)
+    if record.get('schema') != SCHEMA_VERSION:
+        raise ValueError(f'{path} has schema {record.get("schema")}, expected {SCHEMA_VERSION}')
+    return record
+
+
+def find_baseline(store, ref='auto', cwd=None):
+    """Finds the stored results to compare against.
+
+    Arguments:
+    store -- The folder holding one JSON file per commit.
+    ref -- A git revision, a path to a result file, or 'auto' for the closest
+           ancestor of HEAD that has clean results stored.
+    cwd -- A folder inside the git repository, defaults to the current folder.
+
+    :returns:
+        The path of the baseline results, or None if there are none.
+    """
+    if os.path.isfile(ref):
+        return ref
+
+    if ref != 'auto':
+        commit = _git('rev-parse', ref, cwd=cwd)
+        path = result_path(store, commit) if commit else None
+        return path if path and os.path.exists(path) else None
+
+    head, dirty = git_state(cwd)
+    # A clean tree compares with the previous commit's results rather than a rerun of its own.
+    for commit in (_git('rev-list', '--max-count=200', 'HEAD', cwd=cwd) or '').split():
+        if commit == head and not dirty:
+            continue
+        path = result_path(store, commit)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def compare(baseline, current, metrics, threshold=0.10, noise_sigmas=3.0):
+    """Compares the tracked metrics of two reports.
+
+    Arguments:
+    baseline -- The stored report to compare against.
+    current -- The report of this run.
+    metrics -- Maps each tracked metric name to 'lower' or 'higher', whichever is better.
+    threshold -- The smallest change that counts, as a fraction of the baseline median.
+    noise_sigmas -- How many noise standard deviations a change must exceed to count.
+
+    :returns:
+        A list of dictionaries, one per metric found in both reports, each with
+        the name, both medians, the relative change, the noise and a 'regressed' flag.
+    """
+    rows = []
+    for name, better in metrics.items():
+        old = baseline['results'].get(name)
+        new = current['results'].get(name)
+        if old is None or new is None:
+            continue
+
+        old_median = statistics.median(old['samples'])
+        new_median = statistics.median(new['samples'])
+        noise = noise_sigmas * MAD_TO_SIGMA * max(
+            median_absolute_deviation(old['samples']), median_absolute_deviation(new['samples']))
+        worse_by = new_median - old_median if better == 'lower' else old_median - new_median
+        rows.append({
+            'name': name,
+            'baseline': old_median,
+            'current': new_median,
+            'change': (new_median - old_median) / old_median if old_median else 0.0,
+            'noise': noise,
+            'regressed': worse_by > max(threshold * abs(old_median), noise),
+        })
+    return rows
+
+
+def format_comparison(rows, baseline_label):
+    lines = [f'compared with {baseline_label}:',
+             f'{"baseline":>12} {"current":>12} {"change":>8} {"noise":>10}  metric']
+    for row in rows:
+        flag = '  REGRESSED' if row['regressed'] else ''
+        lines.append(f'{row["baseline"]:>12.6g} {row["current"]:>12.6g} {row["change"]:>+8.1%} '
+                     f'{row["noise"]:>10.3g}  {row["name"]}{flag}')
+    return '\n'.join(lines)
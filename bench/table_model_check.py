@@ -0,0 +1,174 @@
+"""Randomized check of the Table command's TableModel against a plain list of rows.
+
+Runs random appends, bulk extends, cell edits, deletes (with repeated and
+unknown ids), compactions and snapshot round trips on a TableModel and on a
+list holding each row as [row_id, name, value, string, integer]. After every
+step row_id, index, row and row_by_id of a sample of rows, rows and the
+count, sum, min and max of the numeric columns are compared, and every row
+is compared at the end of each run. The exit code is 1 on the first difference,
+which is printed with the seed and step that reproduce it.
+
+Run from the repository root:
+
+    python bench/table_model_check.py [--seed 1] [--steps 1000] [--runs 20]
+
+The headless adsk stand-in in bench/adsk is imported in place of Fusion's module,
+as importing the commands package needs it.
+"""
+import math
+import random
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+sys.path[:0] = [str(BENCH_DIR), str(REPO_ROOT)]
+
+from python.commands.Table.model import TableModel  # noqa: E402
+
+# Few distinct values, so the aggregates' heaps see repeats of the values deleted
+VALUES = [-2.5, -1.0, 0.0, 0.1, 0.5, 3.25, 1e6]
+INTEGERS = [-7, -1, 0, 1, 2, 42, 2 ** 40]
+
+
+class Mismatch(Exception):
+    pass
+
+
+def random_row(rng):
+    return f'n{rng.randrange(1000)}', rng.choice(VALUES), f's{rng.randrange(1000)}', rng.choice(INTEGERS)
+
+
+def step(rng, model, rows):
+    # Applies one random operation to the model and the reference, returning the model to use from now on.
+    operation = rng.choices(['append', 'extend', 'set', 'delete', 'unknown', 'compact', 'snapshot'],
+                            [20, 8, 25, 20, 3, 2, 2])[0]
+    if operation == 'append' or (operation in ('set', 'delete') and not rows):
+        row = random_row(rng)
+        rows.append([model.append(*row), *row])
+    elif operation == 'extend':
+        new_rows = [random_row(rng) for _ in range(rng.randrange(1, 50))]
+        row_ids = model.extend(*(list(column) for column in zip(*new_rows)))
+        rows.extend([row_id, *row] for row_id, row in zip(row_ids, new_rows))
+    elif operation == 'set':
+        row = rng.choice(rows)
+        column = rng.randrange(4)
+        value = random_row(rng)[column]
+        model.set(row[0], ('name', 'value', 'string', 'integer')[column], value)
+        row[column + 1] = value
+    elif operation == 'delete':
+        deleted = rng.sample(rows, rng.randrange(1, min(len(rows), 8) + 1))
+        # Repeats are deleted once
+        row_ids = [row[0] for row in deleted] * rng.choice([1, 1, 2])
+        rng.shuffle(row_ids)
+        model.delete(row_ids)
+        deleted_ids = set(row_ids)
+        rows[:] = [row for row in rows if row[0] not in deleted_ids]
+    elif operation == 'unknown':
+        # An id that isn't a row deletes nothing, even with live ids before it
+        live = [row[0] for row in rng.sample(rows, min(len(rows), 3))]
+        unknown = max((row[0] for row in rows), default=0) + rng.randrange(1, 100)
+        try:
+            model.delete(live + [unknown])
+        except KeyError:
+            pass
+        else:
+            raise Mismatch(f'delete of unknown id {unknown} did not raise KeyError')
+    elif operation == 'compact':
+        model.compact()
+    else:
+        # A restored model numbers its rows from 0, in order
+        model = TableModel.from_snapshot(model.snapshot())
+        for row_id, row in enumerate(rows):
+            row[0] = row_id
+    return operation, model
+
+
+def compare(model, rows, indexes):
+    if len(model) != len(rows):
+        raise Mismatch(f'len is {len(model)}, expected {len(rows)}')
+    if len({row[0] for row in rows}) != len(rows):
+        raise Mismatch('two live rows share an id')
+    for index in indexes:
+        row = rows[index]
+        row_id, values = row[0], tuple(row[1:])
+        if model.row_id(index) != row_id:
+            raise Mismatch(f'row_id({index}) is {model.row_id(index)}, expected {row_id}')
+        if model.index(row_id) != index:
+            raise Mismatch(f'index({row_id}) is {model.index(row_id)}, expected {index}')
+        if model.row(index) != values:
+            raise Mismatch(f'row({index}) is {model.row(index)}, expected {values}')
+        if model.row_by_id(row_id) != values:
+            raise Mismatch(f'row_by_id({row_id}) is {model.row_by_id(row_id)}, expected {values}')
+
+    for start, count in ((0, 10), (len(rows) // 3, 10), (max(0, len(rows) - 5), 10)):
+        expected = [(row[0], tuple(row[1:])) for row in rows[start:start + count]]
+        actual = list(model.rows(start, count))
+        if actual != expected:
+            raise Mismatch(f'rows({start}, {count}) is {actual}, expected {expected}')
+
+    for column, position in (('value', 2), ('integer', 4)):
+        aggregate = model.aggregates[column]
+        cells = [row[position] for row in rows]
+        expected = (len(cells), min(cells, default=None), max(cells, default=None))
+        if (aggregate.count, aggregate.min, aggregate.max) != expected:
+            raise Mismatch(f'{column} count, min and max are {(aggregate.count, aggregate.min, aggregate.max)}, '
+                           f'expected {expected}')
+        total = math.fsum(cells) if column == 'value' else sum(cells)
+        if not math.isclose(aggregate.total, total, rel_tol=1e-9, abs_tol=1e-6):
+            raise Mismatch(f'{column} sum is {aggregate.total}, expected {total}')
+
+
+def run(seed, steps):
+    """Runs one random sequence of operations, raising Mismatch at the first difference.
+
+    :returns:
+        The number of times each operation ran.
+    """
+    rng = random.Random(seed)
+    model = TableModel()
+    rows = []
+    counts = {}
+    for step_number in range(steps):
+        try:
+            operation, model = step(rng, model, rows)
+            # The first and last rows and a sample of the others
+            indexes = {0, len(rows) - 1, *rng.sample(range(len(rows)), min(len(rows), 20))} if rows else ()
+            compare(model, rows, indexes)
+        except Mismatch as error:
+            raise Mismatch(f'seed {seed}, step {step_number}: {error}') from None
+        counts[operation] = counts.get(operation, 0) + 1
+    try:
+        compare(model, rows, range(len(rows)))
+        if list(model.rows(0, len(rows))) != [(row[0], tuple(row[1:])) for row in rows]:
+            raise Mismatch('rows of the whole model differ')
+    except Mismatch as error:
+        raise Mismatch(f'seed {seed}, end of run: {error}') from None
+    return counts
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seed', type=int, default=1, help='Seed of the first run, each later run adds 1')
+    parser.add_argument('--steps', type=int, default=1000, help='Operations per run')
+    parser.add_argument('--runs', type=int, default=20, help='Runs, each from its own seed')
+    options = parser.parse_args(argv)
+
+    totals = {}
+    for seed in range(options.seed, options.seed + options.runs):
+        try:
+            counts = run(seed, options.steps)
+        except Mismatch as error:
+            print(f'mismatch at {error}')
+            return 1
+        for operation, count in counts.items():
+            totals[operation] = totals.get(operation, 0) + count
+    print(f'{options.runs} runs of {options.steps} steps matched the list model: '
+          f'{", ".join(f"{count} {operation}" for operation, count in sorted(totals.items()))}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
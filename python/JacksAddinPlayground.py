@@ -2,13 +2,24 @@
 # Description-A sample Fusion Addin to demonstrate various UI elements.
 
 # Assuming you have not changed the general structure of the template no modification is needed in this file.
-from . import commands
 from .lib import fusionAddInUtils as futil
+from . import config
 import adsk.core
 
+# The command modules are imported here unless config.LAZY_LOAD_COMMANDS is set.
+with futil.timed('import commands', 'import'):
+    from . import commands
+
 
 def run(context):
     try:
+        # Buffer log messages and write them in batches, if enabled in config.py
+        futil.start_log_batching()
+
+        # Write structured logs to a rotating JSON Lines file, if enabled in config.py
+        if config.LOG_FILE:
+            futil.start_log_file(config.LOG_FILE, config.LOG_FILE_MAX_BYTES, config.LOG_FILE_BACKUPS)
+
         # Display a message when the add-in is manually run.
         if not context['IsApplicationStartup']:
             app = adsk.core.Application.get()
@@ -16,7 +27,11 @@ def run(context):
             ui.messageBox('A new "JACK" tab containing several panels and commands has been added.', 'Jacks Add-in Playground')
     
         # This will run the start function in each of your commands as defined in commands/__init__.py
-        commands.start()
+        with futil.timed('commands.start'):
+            commands.start()
+
+        # Does nothing unless config.PROFILE is set.
+        futil.write_profile_report('startup')
 
     except:
         futil.handle_error('run')
@@ -24,11 +39,29 @@ def run(context):
 
 def stop(context):
     try:
+        # Log any command handlers that are still referenced after their dialog was closed
+        futil.find_leaked_handlers()
+
         # Remove all of the event handlers your app has created
         futil.clear_handlers()
 
-        # This will run the start function in each of your commands as defined in commands/__init__.py
-        commands.stop()
+        # This will run the stop function in each of your commands as defined in commands/__init__.py
+        with futil.timed('commands.stop'):
+            commands.stop()
+
+        # Keep the state of command dialogs for the next time the add-in runs
+        futil.save_dialog_states()
+
+        # Does nothing unless config.PROFILE is set.
+        futil.write_profile_report('shutdown')
 
     except:
-        futil.handle_error('stop')
\ No newline at end of file
+        futil.handle_error('stop')
+
+    finally:
+        # Summarise errors that repeated since the last summary
+        futil.log_error_summary()
+
+        # Write any buffered log messages and stop the flush timer
+        futil.stop_log_batching()
+        futil.stop_log_file()
\ No newline at end of file
@@ -11,6 +11,7 @@
 
 import adsk.core
 import os
+import sys
 from ...lib import fusionAddInUtils as futil
 from ... import config
 app = adsk.core.Application.get()
@@ -33,63 +34,31 @@ PANEL_AFTER = config.my_panel_after
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Holds references to event handlers
-local_handlers = []
+# The dialog, compiled once when this module is loaded. See fusionAddInUtils/dialog_spec.py for the format.
+DIALOG = futil.compile_dialog({
+    'inputs': [
+        # Simple text input box
+        {'type': 'text_box', 'id': 'text_box', 'name': 'Some Text', 'args': ['Enter some text', 1, False]},
+
+        # Create a value input field and set the default using 1 unit of the default length unit,
+        # which is read from the active design each time the dialog is opened.
+        {
+            'type': 'value', 'id': 'value_input', 'name': 'Some Value',
+            'args': [lambda: app.activeProduct.unitsManager.defaultLengthUnits, {'value': '1'}],
+        },
+    ],
+})
 
 
 # Executed when add-in is run.
+# The commands package registers all of its commands in one batch, see commands/__init__.py.
 def start():
-    # ******************************** Create Command Definition ********************************
-    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
-
-    # Add command created handler. The function passed here will be executed when the command is executed.
-    futil.add_handler(cmd_def.commandCreated, command_created)
-
-    # ******************************** Create Command Control ********************************
-    # Get target workspace for the command.
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-
-    # Get target toolbar tab for the command and create the tab if necessary.
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    if toolbar_tab is None:
-        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
-
-    # Get target panel for the command and and create the panel if necessary.
-    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
-    if panel is None:
-        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
-
-    # Create the command control, i.e. a button in the UI.
-    control = panel.controls.addCommand(cmd_def)
-
-    # Now you can set various options on the control such as promoting it to always be shown.
-    control.isPromoted = IS_PROMOTED
+    futil.register_command(sys.modules[__name__])
 
 
 # Executed when add-in is stopped.
 def stop():
-    # Get the various UI elements for this command
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-    panel = workspace.toolbarPanels.itemById(PANEL_ID)
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    command_control = panel.controls.itemById(CMD_ID)
-    command_definition = ui.commandDefinitions.itemById(CMD_ID)
-
-    # Delete the button command control
-    if command_control:
-        command_control.deleteMe()
-
-    # Delete the command definition
-    if command_definition:
-        command_definition.deleteMe()
-
-    # Delete the panel if it is empty
-    if panel.controls.count == 0:
-        panel.deleteMe()
-
-    # Delete the tab if it is empty
-    if toolbar_tab.toolbarPanels.count == 0:
-        toolbar_tab.deleteMe()
+    futil.unregister_command(sys.modules[__name__])
 
 
 # Function to be called when a user clicks the corresponding button in the UI.
@@ -97,18 +66,13 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log(f'{CMD_NAME} Command Created Event')
 
     # Connect to the events that are needed by this command.
-    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
-    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
-
-    inputs = args.command.commandInputs
-
-    # Simple text input box
-    inputs.addTextBoxCommandInput('text_box', 'Some Text', 'Enter some text', 1, False)
+    # The session keeps the handlers alive until command_destroy closes it.
+    session = futil.open_session(CMD_NAME, CMD_ID)
+    session.add_handler(args.command.execute, command_execute)
+    session.add_handler(args.command.destroy, command_destroy)
 
-    # Create a value input field and set the default using 1 unit of the default length unit.
-    defaultLengthUnits = app.activeProduct.unitsManager.defaultLengthUnits
-    default_value = adsk.core.ValueInput.createByString('1')
-    inputs.addValueInput('value_input', 'Some Value', defaultLengthUnits, default_value)
+    # The value input's units come from the active design, so they are read here.
+    DIALOG.build(args.command)
 
 
 # This function will be called when the user clicks the OK button in the command dialog.
@@ -127,6 +91,5 @@ def command_execute(args: adsk.core.CommandEventArgs):
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    futil.close_session(CMD_NAME)
     futil.log(f'{CMD_NAME} Command Destroy Event')
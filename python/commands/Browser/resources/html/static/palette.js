@@ -19,18 +19,107 @@ function sendInfoToFusion() {
 
 }
 
-function updateMessage(messageData) {
-    // Update Message div with the data passed in.
-    document.getElementById("stringMessage").innerHTML =
-        `${messageData.message}`;
+// State mirrored from the add-in, see HTMLChannel.update_state in fusionAddInUtils/html_channel.py.
+// The add-in sends patches from one version to the next, and the whole state when asked to resync.
+const state = {model: {}, version: 0, resyncRequested: false};
+
+// Functions that show each top level value of the state, only called when that value changed.
+const renderers = {
+    message: (message) => {
+        document.getElementById("stringMessage").textContent = `${message}`;
+    },
+    selection: (selection) => {
+        document.getElementById("selectionName").textContent = `${selection.name}`;
+        document.getElementById("selectionType").textContent = `${selection.type}`;
+    },
+};
+
+function render(keys) {
+    for (const key of keys) {
+        if (key in renderers && key in state.model) {
+            renderers[key](state.model[key]);
+        }
+    }
+}
+
+function requestResync() {
+    // Patches are ignored until the whole state arrives.
+    if (!state.resyncRequested) {
+        state.resyncRequested = true;
+        adsk.fusionSendData("stateResync", "{}");
+    }
+}
+
+// JSON Pointer tokens of a path, see RFC 6901.
+function pathTokens(path) {
+    return path.split("/").slice(1).map((token) => token.replace(/~1/g, "/").replace(/~0/g, "~"));
+}
+
+function applyOperation(model, operation) {
+    const tokens = pathTokens(operation.path);
+    const last = tokens.pop();
+    let target = model;
+    for (const token of tokens) {
+        target = target[token];
+    }
+    if (Array.isArray(target)) {
+        const index = Number(last);
+        if (operation.op === "remove") {
+            target.splice(index, 1);
+        } else if (operation.op === "add") {
+            target.splice(index, 0, operation.value);
+        } else {
+            target[index] = operation.value;
+        }
+    } else if (operation.op === "remove") {
+        delete target[last];
+    } else {
+        target[last] = operation.value;
+    }
+    return tokens.length ? tokens[0] : last;
+}
+
+function statePatch(patch) {
+    if (patch.base !== state.version) {
+        requestResync();
+        return;
+    }
+    const changed = new Set();
+    for (const operation of patch.ops) {
+        changed.add(applyOperation(state.model, operation));
+    }
+    state.version = patch.version;
+    render(changed);
+}
+
+function stateReset(reset) {
+    state.model = reset.state;
+    state.version = reset.version;
+    state.resyncRequested = false;
+    render(Object.keys(renderers));
 }
 
 
-function updateSelection(messageData) {
-    // Update Selection div with the data passed in.
-    document.getElementById("selectionMessage").innerHTML =
-        `<b>Name</b>: ${messageData.selection_name} <br/>` +
-        `<b>Object Type</b>: ${messageData.selection_type}`;
+// Handles one message from the add-in, returns false for an unknown action.
+function handleAction(action, messageData) {
+    if (action === "statePatch") {
+        statePatch(messageData);
+    } else if (action === "stateReset") {
+        stateReset(messageData);
+    } else if (action === "batch") {
+        // Messages queued by the add-in within one frame, as [action, data] pairs in the order sent.
+        // Unknown actions are skipped so the rest of the batch is still handled.
+        for (const [batchedAction, batchedData] of messageData) {
+            if (!handleAction(batchedAction, batchedData)) {
+                console.log(`Unexpected command type in batch: ${batchedAction}`);
+            }
+        }
+    } else if (action === "debugger") {
+        debugger;
+    } else {
+        return false;
+    }
+    return true;
 }
 
 
@@ -39,19 +128,16 @@ window.fusionJavaScriptHandler = {
         try {
             // Message is sent from the add-in as a JSON string.
             const messageData = JSON.parse(messageString);
-            if (action === "updateMessage") {
-                updateMessage(messageData);
-            } else if (action === "updateSelection") {
-                updateSelection(messageData);
-            } else if (action === "debugger") {
-                debugger;
-            } else {
+            if (!handleAction(action, messageData)) {
                 return `Unexpected command type: ${action}`;
             }
         } catch (e) {
             console.log(e);
-            console.log(`Exception caught with command: ${action}, data: ${data}`);
+            console.log(`Exception caught with command: ${action}, data: ${messageString}`);
         }
         return "OK";
     },
 };
+
+// Ask for the whole state once the page has loaded, messages sent before then were lost.
+window.addEventListener("load", () => setTimeout(requestResync, 0));
@@ -12,8 +12,8 @@
 import math
 
 import adsk.core
-import adsk.fusion
 import os
+import sys
 from ...lib import fusionAddInUtils as futil
 from ... import config
 app = adsk.core.Application.get()
@@ -36,63 +36,117 @@ PANEL_AFTER = config.my_panel_after
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Holds references to event handlers
-local_handlers = []
+BUTTON_ICONS = os.path.join(ICON_FOLDER, 'buttons')
+
+# The dialog, compiled once when this module is loaded. Constants like the initial values,
+# manipulator points and vectors are created by compile_dialog rather than on every open.
+# See fusionAddInUtils/dialog_spec.py for the format.
+ORIGIN = {'point': [0, 0, 0]}
+DIALOG_SPEC = {
+    'inputs': [
+        {
+            'type': 'angle_value', 'id': 'angle_value_input', 'name': 'Angle Value',
+            'args': [{'value': '0.0 rad'}],
+            'properties': {
+                'isMinimumValueInclusive': True,
+                'isMaximumValueInclusive': False,
+                'maximumValue': 2 * math.pi,
+                # 'minimumValue': 0,
+            },
+            'calls': [['setManipulator', ORIGIN, {'vector': [1, 0, 0]}, {'vector': [0, 0, 1]}]],
+        },
+        {
+            'type': 'bool_value', 'id': 'bool_value_input', 'name': 'Bool Value', 'args': [True, '', False],
+            'properties': {'tooltip': 'Could be either a button or a check box'},
+        },
+        {
+            'type': 'button_row', 'id': 'button_row_input', 'name': 'Button Row', 'args': [False],
+            'list_items': [
+                ['Button Row ListItem 1', False, BUTTON_ICONS],
+                ['Button Row ListItem 2', True, BUTTON_ICONS],
+                ['Button Row ListItem 3', False, BUTTON_ICONS],
+            ],
+        },
+        {
+            'type': 'direction', 'id': 'direction_input_1', 'name': 'Direction 1',
+            'calls': [['setManipulator', ORIGIN, {'vector': [1, 0, 0]}]],
+        },
+        {
+            'type': 'direction', 'id': 'direction_input_2', 'name': 'Direction 2', 'args': [BUTTON_ICONS],
+            'calls': [['setManipulator', ORIGIN, {'vector': [0, 1, 0]}]],
+        },
+        {
+            'type': 'distance_value', 'id': 'distance_input', 'name': 'Distance', 'args': [{'value': '0.0 cm'}],
+            'properties': {'isEnabled': False, 'isVisible': False, 'minimumValue': 0.0, 'maximumValue': 10.0},
+        },
+        {
+            'type': 'drop_down', 'id': 'drop_down_input', 'name': 'Drop Down 1',
+            'args': [adsk.core.DropDownStyles.LabeledIconDropDownStyle],
+            'list_items': [['Drop Down ListItem 1', True], ['Drop Down  2', False], ['Drop Down  3', False]],
+        },
+        {
+            'type': 'radio_button_group', 'id': 'radio_input', 'name': 'Radio Group',
+            'list_items': [['Radio ListItem 1', True], ['Radio ListItem 2', False], ['Radio ListItem 3', False]],
+            'properties': {'isFullWidth': True},
+        },
+        {
+            'type': 'selection', 'id': 'selection_input', 'name': 'Selection', 'args': ['Select a Plane'],
+            'calls': [
+                ['addSelectionFilter', 'PlanarFaces'],
+                ['addSelectionFilter', 'ConstructionPlanes'],
+                ['setSelectionLimits', 1, 1],
+            ],
+        },
+        {
+            'type': 'string_value', 'id': 'string_value_input', 'name': 'String Value',
+            'args': ['Click Boolean to change me'], 'properties': {'isPassword': False},
+        },
+        {
+            'type': 'text_box', 'id': 'text_box_input', 'name': 'Text Box',
+            'args': ['This is a <b>Text Box</b> Message.<br>You can use <i>basic</i> HTML formatting.', 2, True],
+            'properties': {'isFullWidth': True},
+        },
+        {'type': 'value', 'id': 'value_input', 'name': 'Value', 'args': ['cm', {'value': '0.0 cm'}]},
+        {
+            'type': 'group', 'id': 'group_input', 'name': 'Additional Value Inputs',
+            'properties': {'isExpanded': False},
+            'children': [
+                {'type': 'float_slider', 'id': 'float_slider_input', 'name': 'Float Slider', 'args': ['cm', 0, 10, False]},
+                {
+                    'type': 'float_slider_list', 'id': 'float_list_input', 'name': 'Float List',
+                    'args': ['cm', [0, .25, .5, 1.25, 2.5, 3.25, 3.75, 4.0, 4.25, 5.0], True],
+                    'calls': [['setText', 'Start', 'End']],
+                },
+                {'type': 'float_spinner', 'id': 'float_spinner', 'name': 'Float Spinner', 'args': ['cm', 0, 6.5, .25, 0]},
+                {'type': 'integer_slider', 'id': 'int_slider_input', 'name': 'Integer Slider', 'args': [0, 10, False]},
+                {
+                    'type': 'integer_slider_list', 'id': 'int_list_input', 'name': 'Integer List',
+                    'args': [[0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89], True],
+                    'calls': [['setText', 'Start', 'End']],
+                },
+                {'type': 'integer_spinner', 'id': 'int_spinner', 'name': 'Integer Spinner', 'args': [0, 10, 1, 0]},
+            ],
+        },
+    ],
+}
+DIALOG = futil.compile_dialog(DIALOG_SPEC)
+
+# Inputs whose inputChanged events are coalesced while they are being dragged
+DRAGGED_INPUTS = (
+    'angle_value_input', 'distance_input', 'float_slider_input', 'float_list_input',
+    'float_spinner', 'int_slider_input', 'int_list_input', 'int_spinner',
+)
 
 
 # Executed when add-in is run.
+# The commands package registers all of its commands in one batch, see commands/__init__.py.
 def start():
-    # ******************************** Create Command Definition ********************************
-    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
-
-    # Add command created handler. The function passed here will be executed when the command is executed.
-    futil.add_handler(cmd_def.commandCreated, command_created)
-
-    # ******************************** Create Command Control ********************************
-    # Get target workspace for the command.
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-
-    # Get target toolbar tab for the command and create the tab if necessary.
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    if toolbar_tab is None:
-        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
-
-    # Get target panel for the command and and create the panel if necessary.
-    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
-    if panel is None:
-        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
-
-    # Create the command control, i.e. a button in the UI.
-    control = panel.controls.addCommand(cmd_def)
-
-    # Now you can set various options on the control such as promoting it to always be shown.
-    control.isPromoted = IS_PROMOTED
+    futil.register_command(sys.modules[__name__])
 
 
 # Executed when add-in is stopped.
 def stop():
-    # Get the various UI elements for this command
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-    panel = workspace.toolbarPanels.itemById(PANEL_ID)
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    command_control = panel.controls.itemById(CMD_ID)
-    command_definition = ui.commandDefinitions.itemById(CMD_ID)
-
-    # Delete the button command control
-    if command_control:
-        command_control.deleteMe()
-
-    # Delete the command definition
-    if command_definition:
-        command_definition.deleteMe()
-
-    # Delete the panel if it is empty
-    if panel.controls.count == 0:
-        panel.deleteMe()
-
-    # Delete the tab if it is empty
-    if toolbar_tab.toolbarPanels.count == 0:
-        toolbar_tab.deleteMe()
+    futil.unregister_command(sys.modules[__name__])
 
 
 # Function to be called when a user clicks the corresponding button in the UI.
@@ -100,96 +154,20 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log(f'{CMD_NAME} Command Created Event')
 
     # Connect to the events that are needed by this command.
-    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
-    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
-    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
-
-    button_icons = os.path.join(ICON_FOLDER, 'buttons')
-    inputs = args.command.commandInputs
-
-    initial_value_dist = adsk.core.ValueInput.createByString('0.0 cm')
-    initial_value_angle = adsk.core.ValueInput.createByString('0.0 rad')
-
-    origin_point = adsk.core.Point3D.create(0, 0, 0)
-    x_vector = adsk.core.Vector3D.create(1, 0, 0)
-    y_vector = adsk.core.Vector3D.create(0, 1, 0)
-    z_vector = adsk.core.Vector3D.create(0, 0, 1)
-
-    angle_value_input = inputs.addAngleValueCommandInput('angle_value_input', 'Angle Value', initial_value_angle)
-    angle_value_input.isMinimumValueInclusive = True
-    angle_value_input.isMaximumValueInclusive = False
-    angle_value_input.maximumValue = 2 * math.pi
-    # angle_value_input.minimumValue = 0
-    angle_value_input.setManipulator(origin_point, x_vector, z_vector)
-
-    bool_value_input = inputs.addBoolValueInput('bool_value_input', 'Bool Value', True, '', False)
-    bool_value_input.tooltip = "Could be either a button or a check box"
-
-    button_row_input = inputs.addButtonRowCommandInput('button_row_input', 'Button Row', False)
-    button_row_input_list_items = button_row_input.listItems
-    button_row_input_list_items.add('Button Row ListItem 1', False, button_icons)
-    button_row_input_list_items.add('Button Row ListItem 2', True, button_icons)
-    button_row_input_list_items.add('Button Row ListItem 3', False, button_icons)
+    # The session keeps the handlers alive until command_destroy closes it.
+    session = futil.open_session(CMD_NAME, CMD_ID)
+    session.add_handler(args.command.execute, command_execute)
+    # Dragging a manipulator, slider or spinner changes its input at pointer rate,
+    # so those changes are coalesced to at most one call per config.INPUT_COALESCE_INTERVAL.
+    session.add_handler(args.command.inputChanged, command_input_changed, coalesce_inputs=DRAGGED_INPUTS)
+    session.add_handler(args.command.destroy, command_destroy)
 
-    direction_input_1 = inputs.addDirectionCommandInput('direction_input_1', 'Direction 1')
-    direction_input_1.setManipulator(origin_point, x_vector)
+    created = DIALOG.build(args.command)
+    # Reopen with the values the inputs were last closed with in this document, if any.
+    futil.restore_dialog(CMD_NAME, created)
 
-    direction_input_2 = inputs.addDirectionCommandInput('direction_input_2', 'Direction 2', button_icons)
-    direction_input_2.setManipulator(origin_point, y_vector)
-
-    distance_input = inputs.addDistanceValueCommandInput('distance_input', 'Distance', initial_value_dist)
-    distance_input.isEnabled = False
-    distance_input.isVisible = False
-    distance_input.minimumValue = 0.0
-    distance_input.maximumValue = 10.0
-
-    drop_down_style = adsk.core.DropDownStyles.LabeledIconDropDownStyle
-    drop_down_input = inputs.addDropDownCommandInput('drop_down_input', 'Drop Down 1', drop_down_style)
-    drop_down_items = drop_down_input.listItems
-    drop_down_items.add('Drop Down ListItem 1', True)
-    drop_down_items.add('Drop Down  2', False)
-    drop_down_items.add('Drop Down  3', False)
-
-    radio_input = inputs.addRadioButtonGroupCommandInput('radio_input', 'Radio Group')
-    radio_items = radio_input.listItems
-    radio_items.add('Radio ListItem 1', True)
-    radio_items.add('Radio ListItem 2', False)
-    radio_items.add('Radio ListItem 3', False)
-    radio_input.isFullWidth = True
-
-    selection_input = inputs.addSelectionInput('selection_input', 'Selection', 'Select a Plane')
-    selection_input.addSelectionFilter('PlanarFaces')
-    selection_input.addSelectionFilter('ConstructionPlanes')
-    selection_input.setSelectionLimits(1, 1)
-
-    string_value_input = inputs.addStringValueInput('string_value_input', 'String Value', 'Click Boolean to change me')
-    string_value_input.isPassword = False
-
-    text_box_message = "This is a <b>Text Box</b> Message.<br>You can use <i>basic</i> HTML formatting."
-    text_box_input = inputs.addTextBoxCommandInput('text_box_input', 'Text Box', text_box_message, 2, True)
-    text_box_input.isFullWidth = True
-
-    value_input = inputs.addValueInput('value_input', 'Value', 'cm', initial_value_dist)
-
-    group_input = inputs.addGroupCommandInput('group_input', 'Additional Value Inputs')
-    group_input.isExpanded = False
-    children = group_input.children
-
-    float_slider_input = children.addFloatSliderCommandInput('float_slider_input', 'Float Slider', 'cm', 0, 10, False)
-
-    floats = [0, .25, .5, 1.25, 2.5, 3.25, 3.75, 4.0, 4.25, 5.0]
-    float_list_input = children.addFloatSliderListCommandInput('float_list_input', 'Float List', 'cm', floats, True)
-    float_list_input.setText('Start', 'End')
-
-    float_spinner_input = children.addFloatSpinnerCommandInput('float_spinner', 'Float Spinner', 'cm', 0, 6.5, .25, 0)
-
-    int_slider_input = children.addIntegerSliderCommandInput('int_slider_input', 'Integer Slider', 0, 10, False)
-
-    ints = [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
-    int_list_input = children.addIntegerSliderListCommandInput('int_list_input', 'Integer List', ints, True)
-    int_list_input.setText('Start', 'End')
-
-    int_spinner_input = children.addIntegerSpinnerCommandInput('int_spinner', 'Integer Spinner', 0, 10, 1, 0)
+    # Keep the inputs for command_input_changed so it doesn't look them up on every change.
+    session.add_inputs(**created)
 
 
 # This function will be called when the user clicks the OK button in the command dialog.
@@ -211,17 +189,18 @@ def command_execute(args: adsk.core.CommandEventArgs):
 # This function will be called when the user changes anything in the command dialog.
 def command_input_changed(args: adsk.core.InputChangedEventArgs):
     changed_input = args.input
-    inputs = args.input.parentCommand.commandInputs
-    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+    changed_id = changed_input.id
+    futil.log(lambda: f'{CMD_NAME} Input Changed Event fired from a change to {changed_id}')
 
-    # Get a reference to your command's inputs
-    selection_input: adsk.core.SelectionCommandInput = inputs.itemById('selection_input')
-    distance_input: adsk.core.DistanceValueCommandInput = inputs.itemById('distance_input')
-    bool_value_input: adsk.core.BoolValueCommandInput = inputs.itemById('bool_value_input')
-    string_value_input: adsk.core.StringValueCommandInput = inputs.itemById('string_value_input')
+    # Get a reference to your command's inputs, kept by the session since the dialog was created
+    inputs = futil.get_session(CMD_NAME).inputs
+    selection_input: adsk.core.SelectionCommandInput = inputs['selection_input']
+    distance_input: adsk.core.DistanceValueCommandInput = inputs['distance_input']
+    bool_value_input: adsk.core.BoolValueCommandInput = inputs['bool_value_input']
+    string_value_input: adsk.core.StringValueCommandInput = inputs['string_value_input']
 
     # Show and update the distance input when a plane is selected
-    if changed_input.id == selection_input.id:
+    if changed_id == 'selection_input':
         if selection_input.selectionCount > 0:
             selection = selection_input.selection(0)
             selection_point = selection.point
@@ -237,7 +216,7 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
             distance_input.isVisible = False
 
     # Enable edit on the string value input when the boolean is selected
-    elif changed_input.id == bool_value_input.id:
+    elif changed_id == 'bool_value_input':
         if bool_value_input.value:
             string_value_input.value = 'The Bool Value is checked'
         else:
@@ -246,48 +225,27 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    # Remember the values of the inputs for the next time the dialog is opened
+    futil.snapshot_dialog(CMD_NAME, futil.get_session(CMD_NAME).inputs)
+    futil.close_session(CMD_NAME)
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
 
 def log_command_inputs(inputs):
+    # Skip reading every input if info messages from this module are being dropped.
+    if futil.get_log_level(__name__) > adsk.core.LogLevels.InfoLogLevel:
+        return
+
     seperator = '\n***************************\n'
-    futil.log(seperator)
-    futil.log('Summary of Command Inputs')
-    futil.log(seperator)
-
-    for command_input in inputs:
-        display_value = 'N/A'
-        
-        if hasattr(command_input, 'expression'):
-            display_value = command_input.expression
-        
-        elif hasattr(command_input, 'value'):
-            display_value = command_input.value
-            
-        elif hasattr(command_input, 'valueOne'):
-            display_value = f'\n    Value 1: {command_input.valueOne}'
-            if hasattr(command_input, 'valueTwo'):
-                display_value += f'\n    Value 2: {command_input.valueTwo}'
-        
-        elif hasattr(command_input, 'listItems'):
-            display_value = command_input.selectedItem.name
-        
-        elif hasattr(command_input, 'isDirectionFlipped'):
-            display_value = f'{command_input.isDirectionFlipped} (Is Direction Flipped?)'
-            
-        elif command_input.objectType == adsk.core.SelectionCommandInput.classType():
-            selection = command_input.selection(0)
-            selected_entity = selection.entity
-            if selected_entity.objectType == adsk.fusion.ConstructionPlane.classType():
-                display_value = f'A Construction Plane named: {selected_entity.name}'
-            elif selected_entity.objectType == adsk.fusion.BRepFace.classType():
-                parent_component_name = selected_entity.body.parentComponent.name
-                display_value = f'A planar face from {parent_component_name}'
-
-        futil.log(f'Name: {command_input.name}')
-        futil.log(f'Type: {type(command_input).__name__}')
-        futil.log(f'Input ID: {command_input.id}')
-        futil.log(f'User Input: {display_value}')
-        futil.log(seperator)
+    lines = [seperator, 'Summary of Command Inputs', seperator]
+
+    # Each input is formatted by the function registered for its objectType, including
+    # the inputs inside the group, see fusionAddInUtils/input_utils.py.
+    for description in futil.describe_command_inputs(inputs):
+        lines.append(f'Name: {description["name"]}')
+        lines.append(f'Type: {description["type"]}')
+        lines.append(f'Input ID: {description["id"]}')
+        lines.append(f'User Input: {description["value"]}')
+        lines.append(seperator)
+
+    futil.log('\n'.join(lines))
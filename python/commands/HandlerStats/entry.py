@@ -0,0 +1,132 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import adsk.core
+import os
+import sys
+from ... import config
+from ...lib import fusionAddInUtils as futil
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+CMD_NAME = os.path.basename(os.path.dirname(__file__))
+CMD_ID = f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_{CMD_NAME}'
+CMD_Description = 'Show, dump or reset event handler dispatch times'
+IS_PROMOTED = False
+
+# Global variables by referencing values from /config.py
+WORKSPACE_ID = config.design_workspace
+TAB_ID = config.tools_tab_id
+TAB_NAME = config.my_tab_name
+
+PANEL_ID = config.my_panel_id
+PANEL_NAME = config.my_panel_name
+PANEL_AFTER = config.my_panel_after
+
+# Resource location for command icons, here we assume a sub folder in this directory named "resources".
+ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
+
+# The dialog, compiled once when this module is loaded. The state of recording and the
+# statistics are read each time it is opened. See fusionAddInUtils/dialog_spec.py for the format.
+DIALOG = futil.compile_dialog({
+    'command': {'okButtonText': 'Dump to Log'},
+    'inputs': [
+        # Turns recording on or off. Recording starts as set by config.DISPATCH_STATS.
+        {
+            'type': 'bool_value', 'id': 'enable_input', 'name': 'Record Dispatch Times',
+            'args': [True, '', futil.dispatch_stats_enabled],
+            'properties': {'tooltip': 'Time every event handler call made by this add-in'},
+        },
+        {
+            'type': 'bool_value', 'id': 'reset_input', 'name': 'Reset', 'args': [False, '', True],
+            'properties': {'tooltip': 'Discard every recorded handler call'},
+        },
+        {
+            'type': 'text_box', 'id': 'stats_box', 'name': '', 'args': [lambda: format_stats_html(), 12, True],
+            'properties': {'isFullWidth': True},
+        },
+    ],
+})
+
+
+# Executed when add-in is run.
+# The commands package registers all of its commands in one batch, see commands/__init__.py.
+def start():
+    futil.register_command(sys.modules[__name__])
+
+
+# Executed when add-in is stopped.
+def stop():
+    futil.unregister_command(sys.modules[__name__])
+
+
+# Function to be called when a user clicks the corresponding button in the UI.
+def command_created(args: adsk.core.CommandCreatedEventArgs):
+    futil.log(f'{CMD_NAME} Command Created Event')
+
+    # Connect to the events that are needed by this command.
+    # The session keeps the handlers alive until command_destroy closes it.
+    session = futil.open_session(CMD_NAME, CMD_ID)
+    session.add_handler(args.command.execute, command_execute)
+    session.add_handler(args.command.inputChanged, command_input_changed)
+    session.add_handler(args.command.destroy, command_destroy)
+
+    # Shows the recording state and statistics as they are now.
+    DIALOG.build(args.command)
+
+
+# This function will be called when the user clicks the OK button in the command dialog.
+def command_execute(args: adsk.core.CommandEventArgs):
+    futil.log(f'{CMD_NAME} Command Execute Event')
+
+    # Display the palette that represents the TEXT COMMANDS palette
+    text_palette = ui.palettes.itemById('TextCommands')
+    if not text_palette.isVisible:
+        text_palette.isVisible = True
+
+    futil.log_dispatch_stats()
+
+
+# This function will be called when the user changes anything in the command dialog.
+def command_input_changed(args: adsk.core.InputChangedEventArgs):
+    changed_input = args.input
+    inputs = args.inputs
+    futil.log(lambda: f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+
+    if changed_input.id == 'enable_input':
+        futil.enable_dispatch_stats(changed_input.value)
+    elif changed_input.id == 'reset_input':
+        futil.reset_dispatch_stats()
+
+    stats_box: adsk.core.TextBoxCommandInput = inputs.itemById('stats_box')
+    stats_box.formattedText = format_stats_html()
+
+
+# This function will be called when the user completes the command.
+def command_destroy(args: adsk.core.CommandEventArgs):
+    futil.close_session(CMD_NAME)
+    futil.log(f'{CMD_NAME} Command Destroy Event')
+
+
+# Formats the recorded dispatch times for the text box, slowest first.
+def format_stats_html():
+    stats = futil.get_dispatch_stats()
+    if not stats:
+        state = 'on' if futil.dispatch_stats_enabled() else 'off'
+        return f'No handler calls recorded yet. Recording is {state}.'
+
+    lines = ['<b>count / p50 / p95 / p99 / max (ms)</b>']
+    for name, row in stats.items():
+        lines.append(
+            f'<b>{name}</b>: {row["count"]} / {row["p50"] * 1000:.2f} / {row["p95"] * 1000:.2f} / '
+            f'{row["p99"] * 1000:.2f} / {row["max"] * 1000:.2f}'
+        )
+    return '<br>'.join(lines)
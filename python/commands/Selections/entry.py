@@ -11,6 +11,7 @@
 
 import adsk.core
 import os
+import sys
 from ...lib import fusionAddInUtils as futil
 from ... import config
 app = adsk.core.Application.get()
@@ -33,63 +34,40 @@ PANEL_AFTER = config.my_panel_after
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Holds references to event handlers
-local_handlers = []
+# The dialog, compiled once when this module is loaded. See fusionAddInUtils/dialog_spec.py for the format.
+DIALOG = futil.compile_dialog({
+    'inputs': [
+        # Create some text boxes for your user interface
+        {
+            'type': 'text_box', 'id': 'title_box', 'name': '', 'args': ['Selected Item', 1, True],
+            'properties': {'isFullWidth': True},
+        },
+        {'type': 'text_box', 'id': 'name_box', 'name': 'Name', 'args': ['Pick Something', 1, True]},
+        {'type': 'text_box', 'id': 'type_box', 'name': 'Type', 'args': ['Pick Something', 1, True]},
+
+        # Create a selection input, apply filters and set the selection limits
+        {
+            'type': 'selection', 'id': 'selection_input', 'name': 'Some Selection', 'args': ['Select Something'],
+            'calls': [
+                ['addSelectionFilter', 'SolidBodies'],
+                ['addSelectionFilter', 'RootComponents'],
+                ['addSelectionFilter', 'Occurrences'],
+                ['setSelectionLimits', 1, 1],
+            ],
+        },
+    ],
+})
 
 
 # Executed when add-in is run.
+# The commands package registers all of its commands in one batch, see commands/__init__.py.
 def start():
-    # ******************************** Create Command Definition ********************************
-    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
-
-    # Add command created handler. The function passed here will be executed when the command is executed.
-    futil.add_handler(cmd_def.commandCreated, command_created)
-
-    # ******************************** Create Command Control ********************************
-    # Get target workspace for the command.
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-
-    # Get target toolbar tab for the command and create the tab if necessary.
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    if toolbar_tab is None:
-        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
-
-    # Get target panel for the command and and create the panel if necessary.
-    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
-    if panel is None:
-        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
-
-    # Create the command control, i.e. a button in the UI.
-    control = panel.controls.addCommand(cmd_def)
-
-    # Now you can set various options on the control such as promoting it to always be shown.
-    control.isPromoted = IS_PROMOTED
+    futil.register_command(sys.modules[__name__])
 
 
 # Executed when add-in is stopped.
 def stop():
-    # Get the various UI elements for this command
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-    panel = workspace.toolbarPanels.itemById(PANEL_ID)
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    command_control = panel.controls.itemById(CMD_ID)
-    command_definition = ui.commandDefinitions.itemById(CMD_ID)
-
-    # Delete the button command control
-    if command_control:
-        command_control.deleteMe()
-
-    # Delete the command definition
-    if command_definition:
-        command_definition.deleteMe()
-
-    # Delete the panel if it is empty
-    if panel.controls.count == 0:
-        panel.deleteMe()
-
-    # Delete the tab if it is empty
-    if toolbar_tab.toolbarPanels.count == 0:
-        toolbar_tab.deleteMe()
+    futil.unregister_command(sys.modules[__name__])
 
 
 # Function to be called when a user clicks the corresponding button in the UI.
@@ -97,32 +75,21 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log(f'{CMD_NAME} Command Created Event')
 
     # Connect to the events that are needed by this command.
-    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
-    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
-    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
-
-    inputs = args.command.commandInputs
-
-    # Create some text boxes for your user interface
-    title_box = inputs.addTextBoxCommandInput('title_box', '', 'Selected Item', 1, True)
-    title_box.isFullWidth = True
-    name_box = inputs.addTextBoxCommandInput('name_box', 'Name', 'Pick Something', 1, True)
-    type_box = inputs.addTextBoxCommandInput('type_box', 'Type', 'Pick Something', 1, True)
+    # The session keeps the handlers alive until command_destroy closes it.
+    session = futil.open_session(CMD_NAME, CMD_ID)
+    session.add_handler(args.command.execute, command_execute)
+    session.add_handler(args.command.inputChanged, command_input_changed)
+    session.add_handler(args.command.destroy, command_destroy)
 
-    # Create a selection input, apply filters and set the selection limits
-    selection_input = inputs.addSelectionInput('selection_input', 'Some Selection', 'Select Something')
-    selection_input.addSelectionFilter('SolidBodies')
-    selection_input.addSelectionFilter('RootComponents')
-    selection_input.addSelectionFilter('Occurrences')
-    selection_input.setSelectionLimits(1, 1)
+    # Kept so command_input_changed doesn't look the selection inputs up on every change.
+    session.add_inputs(**DIALOG.build(args.command))
 
 
 # This function will be called when the user clicks the OK button in the command dialog.
 def command_execute(args: adsk.core.CommandEventArgs):
     futil.log(f'{CMD_NAME} Command Execute Event')
 
-    inputs = args.command.commandInputs
-    selection_input: adsk.core.SelectionCommandInput = inputs.itemById('selection_input')
+    selection_input: adsk.core.SelectionCommandInput = futil.get_session(CMD_NAME).inputs['selection_input']
 
     selection = selection_input.selection(0)
     selected_entity = selection.entity
@@ -135,14 +102,15 @@ def command_execute(args: adsk.core.CommandEventArgs):
 # This function will be called when the user changes anything in the command dialog.
 def command_input_changed(args: adsk.core.InputChangedEventArgs):
     changed_input = args.input
-    inputs = args.inputs
-    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+    changed_id = changed_input.id
+    futil.log(lambda: f'{CMD_NAME} Input Changed Event fired from a change to {changed_id}')
 
-    selection_input: adsk.core.SelectionCommandInput = inputs.itemById('selection_input')
-    name_box: adsk.core.TextBoxCommandInput = inputs.itemById('name_box')
-    type_box: adsk.core.TextBoxCommandInput = inputs.itemById('type_box')
+    inputs = futil.get_session(CMD_NAME).inputs
+    selection_input: adsk.core.SelectionCommandInput = inputs['selection_input']
+    name_box: adsk.core.TextBoxCommandInput = inputs['name_box']
+    type_box: adsk.core.TextBoxCommandInput = inputs['type_box']
 
-    if changed_input.id == 'selection_input':
+    if changed_id == 'selection_input':
         if selection_input.selectionCount > 0:
             selected_entity = selection_input.selection(0).entity
             name_box.text = selected_entity.name
@@ -154,6 +122,5 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    futil.close_session(CMD_NAME)
     futil.log(f'{CMD_NAME} Command Destroy Event')
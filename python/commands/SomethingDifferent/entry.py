@@ -10,7 +10,10 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import adsk.core
+import json
 import os
+import sys
+from datetime import datetime
 from ...lib import fusionAddInUtils as futil
 from ... import config
 app = adsk.core.Application.get()
@@ -33,63 +36,51 @@ PANEL_AFTER = config.my_panel_after
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Holds references to event handlers
-local_handlers = []
+# Page shown by the browser input (cleanup for windows)
+BROWSER_INPUT_URL = os.path.join('https://jackcarey.co.uk')
+BROWSER_INPUT_URL = BROWSER_INPUT_URL.replace('\\', '/')
+
+# The dialog, compiled once when this module is loaded. See fusionAddInUtils/dialog_spec.py for the format.
+DIALOG = futil.compile_dialog({
+    'inputs': [
+        {'type': 'string_value', 'id': 'input_box', 'name': 'Send to HTML', 'args': ['Message from Command']},
+
+        # Create a selection input, apply filters and set the selection limits
+        {
+            'type': 'selection', 'id': 'selection_input', 'name': 'Some Selection', 'args': ['Select Something'],
+            'calls': [
+                ['addSelectionFilter', 'SolidBodies'],
+                ['addSelectionFilter', 'RootComponents'],
+                ['addSelectionFilter', 'Occurrences'],
+                ['setSelectionLimits', 1, 1],
+            ],
+        },
+
+        # This text box will be updated by the embedded browser
+        {
+            'type': 'text_box', 'id': 'incoming_box', 'name': 'Name',
+            'args': ['Message from Browser.<br>Update me from the Browser form', 2, True],
+            'properties': {'isFullWidth': True},
+        },
+
+        # Create a browser input
+        {
+            'type': 'browser', 'id': 'browser_input', 'name': 'Browser Input', 'args': [BROWSER_INPUT_URL, 300],
+            'properties': {'isFullWidth': True},
+        },
+    ],
+})
 
 
 # Executed when add-in is run.
+# The commands package registers all of its commands in one batch, see commands/__init__.py.
 def start():
-    # ******************************** Create Command Definition ********************************
-    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
-
-    # Add command created handler. The function passed here will be executed when the command is executed.
-    futil.add_handler(cmd_def.commandCreated, command_created)
-
-    # ******************************** Create Command Control ********************************
-    # Get target workspace for the command.
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-
-    # Get target toolbar tab for the command and create the tab if necessary.
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    if toolbar_tab is None:
-        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
-
-    # Get target panel for the command and and create the panel if necessary.
-    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
-    if panel is None:
-        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
-
-    # Create the command control, i.e. a button in the UI.
-    control = panel.controls.addCommand(cmd_def)
-
-    # Now you can set various options on the control such as promoting it to always be shown.
-    control.isPromoted = IS_PROMOTED
+    futil.register_command(sys.modules[__name__])
 
 
 # Executed when add-in is stopped.
 def stop():
-    # Get the various UI elements for this command
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-    panel = workspace.toolbarPanels.itemById(PANEL_ID)
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    command_control = panel.controls.itemById(CMD_ID)
-    command_definition = ui.commandDefinitions.itemById(CMD_ID)
-
-    # Delete the button command control
-    if command_control:
-        command_control.deleteMe()
-
-    # Delete the command definition
-    if command_definition:
-        command_definition.deleteMe()
-
-    # Delete the panel if it is empty
-    if panel.controls.count == 0:
-        panel.deleteMe()
-
-    # Delete the tab if it is empty
-    if toolbar_tab.toolbarPanels.count == 0:
-        toolbar_tab.deleteMe()
+    futil.unregister_command(sys.modules[__name__])
 
 
 # Function to be called when a user clicks the corresponding button in the UI.
@@ -97,43 +88,24 @@ def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log(f'{CMD_NAME} Command Created Event')
 
     # Connect to the events that are needed by this command.
-    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
-    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
-    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
-    futil.add_handler(args.command.incomingFromHTML, browser_incoming, local_handlers=local_handlers)
-
-    inputs = args.command.commandInputs
-
-    input_box = inputs.addStringValueInput('input_box', 'Send to HTML', 'Message from Command')
-
-    # Create a selection input, apply filters and set the selection limits
-    selection_input = inputs.addSelectionInput('selection_input', 'Some Selection', 'Select Something')
-    selection_input.addSelectionFilter('SolidBodies')
-    selection_input.addSelectionFilter('RootComponents')
-    selection_input.addSelectionFilter('Occurrences')
-    selection_input.setSelectionLimits(1, 1)
-
-    # This text box will be updated by the embedded browser
-    default_message = 'Message from Browser.<br>Update me from the Browser form'
-    incoming_box = inputs.addTextBoxCommandInput('incoming_box', 'Name', default_message, 2, True)
-    incoming_box.isFullWidth = True
+    # The session keeps the handlers alive until command_destroy closes it.
+    session = futil.open_session(CMD_NAME, CMD_ID)
+    session.add_handler(args.command.execute, command_execute)
+    session.add_handler(args.command.inputChanged, command_input_changed)
+    session.add_handler(args.command.destroy, command_destroy)
+    session.add_handler(args.command.incomingFromHTML, browser_incoming)
 
-    # Create a browser input (cleanup for windows)
-    browser_input_url = os.path.join('https://jackcarey.co.uk')
-    browser_input_url = browser_input_url.replace('\\', '/')
+    session.add_inputs(**DIALOG.build(args.command))
 
-    # Create a browser input
-    minimum_height = 300
-    browser_input = inputs.addBrowserCommandInput('browser_input', 'Browser Input', browser_input_url, minimum_height)
-    browser_input.isFullWidth = True
+    # The external page doesn't handle batched messages, so each action is sent on its own.
+    session.add_html_channel(session.inputs['browser_input'], batch=False)
 
 
 # This function will be called when the user clicks the OK button in the command dialog.
 def command_execute(args: adsk.core.CommandEventArgs):
     futil.log(f'{CMD_NAME} Command Execute Event')
 
-    inputs = args.command.commandInputs
-    selection_input: adsk.core.SelectionCommandInput = inputs.itemById('selection_input')
+    selection_input: adsk.core.SelectionCommandInput = futil.get_session(CMD_NAME).inputs['selection_input']
 
     selection = selection_input.selection(0)
     selected_entity = selection.entity
@@ -146,16 +118,16 @@ def command_execute(args: adsk.core.CommandEventArgs):
 # This function will be called when the user changes anything in the command dialog.
 def command_input_changed(args: adsk.core.InputChangedEventArgs):
     changed_input = args.input
-    inputs = args.inputs
-    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+    changed_id = changed_input.id
+    futil.log(lambda: f'{CMD_NAME} Input Changed Event fired from a change to {changed_id}')
 
-    selection_input: adsk.core.SelectionCommandInput = inputs.itemById('selection_input')
-    input_box: adsk.core.StringValueCommandInput = inputs.itemById('input_box')
-    browser_input: adsk.core.BrowserCommandInput = inputs.itemById('browser_input')
+    session = futil.get_session(CMD_NAME)
+    selection_input: adsk.core.SelectionCommandInput = session.inputs['selection_input']
+    input_box: adsk.core.StringValueCommandInput = session.inputs['input_box']
 
     action = None
     data = {}
-    if changed_input.id == 'selection_input':
+    if changed_id == 'selection_input':
         action = 'updateSelection'
         if selection_input.selectionCount > 0:
             selected_entity = selection_input.selection(0).entity
@@ -168,14 +140,14 @@ def command_input_changed(args: adsk.core.InputChangedEventArgs):
                 "selection_name": 'Nothing Selected',
                 "selection_type": 'Nothing Selected'
             }
-    elif changed_input.id == 'input_box':
+    elif changed_id == 'input_box':
         action = 'updateMessage'
         data = {
             "message": input_box.value,
         }
 
     if action is not None:
-        response = browser_input.sendInfoToHTML(action, json.dumps(data))
+        session.html_channels['browser_input'].send(action, data)
 
 
 # Use this to handle events sent from javascript in your palette.
@@ -186,9 +158,7 @@ def browser_incoming(html_args: adsk.core.HTMLEventArgs):
     message_action = html_args.action
 
     # Get Command Inputs
-    browser_input = html_args.browserCommandInput
-    inputs = browser_input.commandInputs
-    incoming_box: adsk.core.TextBoxCommandInput = inputs.itemById('incoming_box')
+    incoming_box: adsk.core.TextBoxCommandInput = futil.get_session(CMD_NAME).inputs['incoming_box']
 
     # Update Command UI from form value from HTML/Javascript
     if message_action == 'formMessage':
@@ -206,6 +176,5 @@ def browser_incoming(html_args: adsk.core.HTMLEventArgs):
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    futil.close_session(CMD_NAME)
     futil.log(f'{CMD_NAME} Command Destroy Event')
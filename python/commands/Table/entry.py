@@ -10,9 +10,13 @@
 #  UNINTERRUPTED OR ERROR FREE.
 
 import adsk.core
+import csv
 import os
+import sys
+import time
 from ...lib import fusionAddInUtils as futil
 from ... import config
+from .model import TableModel, check_integer, read_csv, write_csv
 app = adsk.core.Application.get()
 ui = app.userInterface
 
@@ -33,177 +37,417 @@ PANEL_AFTER = config.my_panel_after
 # Resource location for command icons, here we assume a sub folder in this directory named "resources".
 ICON_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resources', '')
 
-# Holds references to event handlers
-local_handlers = []
-
 # Used to keep track of table rows
 ROW_NUMBER = 1
 
+# Number of rows with command inputs at once, 0 for every row. See TABLE_PAGE_SIZE in /config.py
+PAGE_SIZE = config.TABLE_PAGE_SIZE
 
-# Executed when add-in is run.
-def start():
-    # ******************************** Create Command Definition ********************************
-    cmd_def = ui.commandDefinitions.addButtonDefinition(CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER)
+# Rows added to the model at a time by add_rows, so a large file is never held as lists of every row.
+BATCH_ROWS = 2000
 
-    # Add command created handler. The function passed here will be executed when the command is executed.
-    futil.add_handler(cmd_def.commandCreated, command_created)
+# File types offered when importing and exporting CSV files
+CSV_FILTER = 'CSV files (*.csv);;All files (*.*)'
 
-    # ******************************** Create Command Control ********************************
-    # Get target workspace for the command.
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
+# Every row of the table. Only the window of rows starting at _window_start is shown with command inputs.
+# Each shown row is a slot, a list of the values it displays, its four cell inputs, the id of the row
+# it shows, its check box and whether the box shows as checked. The inputs are reused as the window moves.
+_model = TableModel()
+_window_start = 0
+_slots = []
 
-    # Get target toolbar tab for the command and create the tab if necessary.
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    if toolbar_tab is None:
-        toolbar_tab = workspace.toolbarTabs.add(TAB_ID, TAB_NAME)
+# Ids of the rows checked for deletion. Kept by id, so rows stay checked as the window moves.
+_checked = set()
+_page_input = None
+_totals_input = None
 
-    # Get target panel for the command and and create the panel if necessary.
-    panel = toolbar_tab.toolbarPanels.itemById(PANEL_ID)
-    if panel is None:
-        panel = toolbar_tab.toolbarPanels.add(PANEL_ID, PANEL_NAME, PANEL_AFTER, False)
+# The dialog, compiled once when this module is loaded. See fusionAddInUtils/dialog_spec.py for the format.
+# The table starts with a header row, its rows are added by add_row_to_table.
+TOOLBAR_BUTTONS = [
+    # Add rows to the table.
+    ('table_add', 'Add'),
+    # Delete the checked rows from the table, or the selected row if none are checked
+    ('table_delete', 'Delete'),
+    # Add rows from a CSV file, or write every row to one
+    ('table_import', 'Import CSV'),
+    ('table_export', 'Export CSV'),
+]
+if PAGE_SIZE:
+    # Page through rows that don't fit in the window
+    TOOLBAR_BUTTONS += [('table_previous', 'Previous'), ('table_next', 'Next')]
+
+DIALOG_SPEC = {
+    'inputs': [
+        {
+            'type': 'table', 'id': 'table', 'name': 'Table', 'args': [5, '1:2:3:1:1'],
+            'rows': [[
+                {'type': 'text_box', 'id': f'header_{column}', 'name': '', 'args': [f'<b>{name}</b>', 1, True]}
+                for column, name in enumerate(['Name', 'Value', 'String', 'Integer', 'Delete'])
+            ]],
+            'toolbar': [
+                {'type': 'bool_value', 'id': button_id, 'name': name, 'args': [False, '', True]}
+                for button_id, name in TOOLBAR_BUTTONS
+            ],
+        },
+    ],
+}
+if PAGE_SIZE:
+    DIALOG_SPEC['inputs'].append(
+        {'type': 'text_box', 'id': 'table_page', 'name': '', 'args': ['', 1, True]})
+
+# Live totals of the numeric columns, across every row. Both text boxes are filled in by show_window.
+DIALOG_SPEC['inputs'].append(
+    {'type': 'text_box', 'id': 'table_totals', 'name': 'Totals', 'args': ['', 2, True]})
+DIALOG = futil.compile_dialog(DIALOG_SPEC)
 
-    # Create the command control, i.e. a button in the UI.
-    control = panel.controls.addCommand(cmd_def)
 
-    # Now you can set various options on the control such as promoting it to always be shown.
-    control.isPromoted = IS_PROMOTED
+# Executed when add-in is run.
+# The commands package registers all of its commands in one batch, see commands/__init__.py.
+def start():
+    futil.register_command(sys.modules[__name__])
 
 
 # Executed when add-in is stopped.
 def stop():
-    # Get the various UI elements for this command
-    workspace = ui.workspaces.itemById(WORKSPACE_ID)
-    panel = workspace.toolbarPanels.itemById(PANEL_ID)
-    toolbar_tab = workspace.toolbarTabs.itemById(TAB_ID)
-    command_control = panel.controls.itemById(CMD_ID)
-    command_definition = ui.commandDefinitions.itemById(CMD_ID)
-
-    # Delete the button command control
-    if command_control:
-        command_control.deleteMe()
-
-    # Delete the command definition
-    if command_definition:
-        command_definition.deleteMe()
-
-    # Delete the panel if it is empty
-    if panel.controls.count == 0:
-        panel.deleteMe()
-
-    # Delete the tab if it is empty
-    if toolbar_tab.toolbarPanels.count == 0:
-        toolbar_tab.deleteMe()
+    futil.unregister_command(sys.modules[__name__])
 
 
 # Function to be called when a user clicks the corresponding button in the UI.
 def command_created(args: adsk.core.CommandCreatedEventArgs):
     futil.log(f'{CMD_NAME} Command Created Event')
-    global ROW_NUMBER
+    global ROW_NUMBER, _model, _window_start, _page_input, _totals_input
     ROW_NUMBER = 1
+    _model = TableModel()
+    _window_start = 0
+    _slots.clear()
+    _checked.clear()
+    _page_input = None
+    _totals_input = None
 
     # Connect to the events that are needed by this command.
-    futil.add_handler(args.command.execute, command_execute, local_handlers=local_handlers)
-    futil.add_handler(args.command.inputChanged, command_input_changed, local_handlers=local_handlers)
-    futil.add_handler(args.command.destroy, command_destroy, local_handlers=local_handlers)
-
-    inputs = args.command.commandInputs
-
-    # Create table input
-    table_input = inputs.addTableCommandInput('table', 'Table', 4, '1:2:3:1')
-    add_header_row_to_table(table_input)
-    add_row_to_table(table_input)
-    add_row_to_table(table_input)
-
-    # Add rows to the table.
-    add_button_input = inputs.addBoolValueInput('table_add', 'Add', False, '', True)
-    table_input.addToolbarCommandInput(add_button_input)
-
-    # Delete rows from table
-    delete_button_input = inputs.addBoolValueInput('table_delete', 'Delete', False, '', True)
-    table_input.addToolbarCommandInput(delete_button_input)
+    # The session keeps the handlers alive until command_destroy closes it.
+    session = futil.open_session(CMD_NAME, CMD_ID)
+    session.add_handler(args.command.execute, command_execute)
+    session.add_handler(args.command.inputChanged, command_input_changed)
+    session.add_handler(args.command.destroy, command_destroy)
+
+    # The page text box is only in DIALOG when the table is paged, see PAGE_SIZE.
+    created = DIALOG.build(args.command)
+    table_input = created['table']
+    _page_input = created.get('table_page')
+    _totals_input = created['table_totals']
+
+    # Keep the table for command_input_changed, so it doesn't look it up on every change
+    session.add_inputs(table=table_input)
+
+    # Reopen with the rows the table was last closed with in this document, if any
+    state = futil.restore_dialog(CMD_NAME, created)
+    if state is None:
+        add_row_to_table(table_input)
+        add_row_to_table(table_input)
+    else:
+        _model = TableModel.from_snapshot(state['model'])
+        ROW_NUMBER = state['row_number']
+        if PAGE_SIZE:
+            _window_start = max(0, len(_model) - PAGE_SIZE)
+        show_window(table_input)
 
 
 # This function will be called when the user changes anything in the command dialog.
 def command_input_changed(args: adsk.core.InputChangedEventArgs):
     changed_input = args.input
-    inputs = args.input.parentCommand.commandInputs
-    futil.log(f'{CMD_NAME} Input Changed Event fired from a change to {changed_input.id}')
+    changed_id = changed_input.id
+    futil.log(lambda: f'{CMD_NAME} Input Changed Event fired from a change to {changed_id}')
 
-    table_input = inputs.itemById('table')
+    table_input = futil.get_session(CMD_NAME).inputs['table']
 
-    if changed_input.id == 'table_add':
+    if changed_id == 'table_add':
         add_row_to_table(table_input)
 
-    elif changed_input.id == 'table_delete':
-        if table_input.selectedRow == -1:
-            ui.messageBox('Select one row to delete.')
+    elif changed_id == 'table_delete':
+        if _checked:
+            delete_rows(table_input, list(_checked))
+        elif table_input.selectedRow < 1:
+            ui.messageBox('Check the rows to delete, or select one row.')
         else:
-            table_input.deleteRow(table_input.selectedRow)
+            delete_rows(table_input, [_slots[table_input.selectedRow - 1][5]])
+
+    elif changed_id == 'table_import':
+        import_csv(table_input)
+
+    elif changed_id == 'table_export':
+        export_csv()
+
+    elif changed_id == 'table_previous':
+        move_window(table_input, -PAGE_SIZE)
+
+    elif changed_id == 'table_next':
+        move_window(table_input, PAGE_SIZE)
+
+    else:
+        # Keep the model in step with any cell the user edited
+        prefix, _, slot = changed_id.rpartition('_')
+        column = CELL_COLUMNS.get(prefix)
+        if column is not None and int(slot) < len(_slots):
+            update_cell(int(slot), column, changed_input.value)
+        elif prefix == 'check_input' and int(slot) < len(_slots):
+            check_row(int(slot), changed_input.value)
 
 
 # This function will be called when the user clicks the OK button in the command dialog.
 def command_execute(args: adsk.core.CommandEventArgs):
     futil.log(f'{CMD_NAME} Command Execute Event')
 
-    inputs = args.command.commandInputs
-    table_input: adsk.core.TableCommandInput = inputs.itemById('table')
-    num_rows = table_input.rowCount
-    string_values = []
-
-    # Get the value of the String Input for all rows below the header (skip first row)
-    for row_number in range(1, num_rows):
-        string_input: adsk.core.StringValueCommandInput = table_input.getInputAtPosition(row_number, 2)
-        string_values.append(string_input.value)
+    # The model holds every row, including those outside the window, and is read
+    # a column at a time without touching the table's inputs.
+    num_rows = len(_model)
+    string_values = _model.column('string')
 
-    msg = f'The Table had {num_rows-1} rows plus the header.<br>The String Values were:<br>{"<br>".join(string_values)}'
+    msg = f'The Table had {num_rows} rows plus the header.<br>The String Values were:<br>{"<br>".join(string_values)}'
     ui.messageBox(msg)
 
 
 # This function will be called when the user completes the command.
 def command_destroy(args: adsk.core.CommandEventArgs):
-    global local_handlers
-    local_handlers = []
+    # Remember the rows for the next time the dialog is opened
+    futil.snapshot_dialog(CMD_NAME, {}, {'model': _model.snapshot(), 'row_number': ROW_NUMBER})
+
+    # Release the inputs of the closed dialog
+    global _page_input, _totals_input
+    _slots.clear()
+    _checked.clear()
+    _page_input = None
+    _totals_input = None
+    futil.close_session(CMD_NAME)
     futil.log(f'{CMD_NAME} Command Destroy Event')
 
 
 # Adds a new row to the table.
 def add_row_to_table(table_input: adsk.core.TableCommandInput):
-    global ROW_NUMBER
-    # Get the CommandInputs object associated with the parent command.
-    inputs = adsk.core.CommandInputs.cast(table_input.commandInputs)
-
-    # Create new command inputs.
-    row_name = f'<b>Item {ROW_NUMBER}</b>'
-    text_input = inputs.addTextBoxCommandInput(f'text_input_{ROW_NUMBER}', '', row_name, 1, True)
-
-    initial_value = adsk.core.ValueInput.createByReal(ROW_NUMBER)
-    value_input = inputs.addValueInput(f'value_input_{ROW_NUMBER}', 'Value', 'cm', initial_value)
-
-    initial_string = f'String {ROW_NUMBER}'
-    string_input = inputs.addStringValueInput(f'string_input_{ROW_NUMBER}', 'String', initial_string)
-
-    spinner_input = inputs.addIntegerSpinnerCommandInput(f'spinner_input_{ROW_NUMBER}', 'Int', 0, 100, 2, ROW_NUMBER)
+    add_rows(table_input, [{}])
+
+
+# Adds a row to the table for each record, e.g. parameters pasted by the user.
+# Each record is a dictionary that may hold a 'name', 'value', 'string' and 'integer'.
+# Anything missing defaults to the values add_row_to_table would use.
+# The records can be any iterable, e.g. a generator reading a file. They are
+# added to the model in batches, then the window is moved to the last row, so
+# at most a page of inputs is created however many rows are added. If reading
+# a record fails, the rows read before it are still added and the error raised.
+# No UI events are processed meanwhile, so no other handler sees a half-added batch.
+def add_rows(table_input: adsk.core.TableCommandInput, records) -> int:
+    global ROW_NUMBER, _window_start
+    start_time = time.perf_counter()
+
+    # Collect each column, then append them to the model's columns a batch at a time.
+    names, values, strings, integers = [], [], [], []
+    added = 0
+    try:
+        for record in records:
+            # Convert the whole record before appending any of it, so the columns stay the same length.
+            name = record.get('name', f'<b>Item {ROW_NUMBER}</b>')
+            value = float(record.get('value', ROW_NUMBER))
+            string = record.get('string', f'String {ROW_NUMBER}')
+            integer = check_integer(int(record.get('integer', ROW_NUMBER)))
+            names.append(name)
+            values.append(value)
+            strings.append(string)
+            integers.append(integer)
+            # Increment a counter used to make each row unique.
+            ROW_NUMBER = ROW_NUMBER + 1
+
+            if len(names) == BATCH_ROWS:
+                _model.extend(names, values, strings, integers)
+                added += BATCH_ROWS
+                names, values, strings, integers = [], [], [], []
+    finally:
+        # Also on error, so every row counted by ROW_NUMBER is in the model.
+        _model.extend(names, values, strings, integers)
+        added += len(names)
+
+    # Show the last row added
+    if PAGE_SIZE:
+        _window_start = max(0, len(_model) - PAGE_SIZE)
+    show_window(table_input)
+
+    if added > 1:
+        elapsed = time.perf_counter() - start_time
+        futil.log(lambda: f'{CMD_NAME} added {added} rows in {elapsed * 1000:.2f} ms '
+                          f'({added / elapsed:.0f} rows/s)')
+    return added
+
+
+# Asks for a CSV file and adds a row for each of its rows. The file is read
+# and added one batch at a time, it is never held in memory as a whole.
+def import_csv(table_input: adsk.core.TableCommandInput):
+    file_dialog = ui.createFileDialog()
+    file_dialog.title = 'Import Table Rows'
+    file_dialog.filter = CSV_FILTER
+    if file_dialog.showOpen() != adsk.core.DialogResults.DialogOK:
+        return
+
+    path = file_dialog.filename
+    try:
+        with open(path, newline='', encoding='utf-8-sig') as csv_file:
+            added = add_rows(table_input, read_csv(csv_file))
+    except (OSError, ValueError, OverflowError, csv.Error) as error:
+        # Rows read before the error stay in the table.
+        show_window(table_input)
+        ui.messageBox(f'Could not import {path}:\n{error}')
+        return
+    futil.log(f'{CMD_NAME} imported {added} rows from {path}')
+
+
+# Asks for a file name and writes every row of the table to it as CSV.
+def export_csv():
+    file_dialog = ui.createFileDialog()
+    file_dialog.title = 'Export Table Rows'
+    file_dialog.filter = CSV_FILTER
+    if file_dialog.showSave() != adsk.core.DialogResults.DialogOK:
+        return
+
+    path = file_dialog.filename
+    try:
+        with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+            written = write_csv(_model, csv_file)
+    except OSError as error:
+        ui.messageBox(f'Could not export {path}:\n{error}')
+        return
+    futil.log(f'{CMD_NAME} exported {written} rows to {path}')
+
+
+# Maps the id prefix of the inputs in each slot to the column they edit
+CELL_COLUMNS = {'value_input': 'value', 'string_input': 'string', 'spinner_input': 'integer'}
+
+
+# Moves the window by a number of rows and shows the rows now inside it.
+def move_window(table_input: adsk.core.TableCommandInput, rows: int):
+    global _window_start
+    _window_start += rows
+    show_window(table_input)
+
+
+# Makes the slots show the rows in the window, creating inputs for new slots and
+# deleting slots past the end of the model. Slots that already show the right
+# values aren't touched, and existing slots only have their changed cells written.
+def show_window(table_input: adsk.core.TableCommandInput):
+    global _window_start
+    page_size = PAGE_SIZE or len(_model)
+    _window_start = max(0, min(_window_start, len(_model) - page_size))
+    visible = min(page_size, len(_model) - _window_start)
+
+    inputs = None
+    for slot, (row_id, values) in enumerate(_model.rows(_window_start, visible)):
+        if slot == len(_slots):
+            # Get the CommandInputs object associated with the parent command.
+            inputs = inputs or adsk.core.CommandInputs.cast(table_input.commandInputs)
+            _slots.append(create_slot(inputs, table_input, slot, values, row_id in _checked))
+            _slots[slot][5] = row_id
+        else:
+            # Point the slot at its new row before writing its inputs, so any inputChanged
+            # those writes fire is copied into this row rather than the one shown before.
+            _slots[slot][5] = row_id
+            if _slots[slot][0] != values:
+                update_slot(_slots[slot], values)
+            if _slots[slot][7] != (row_id in _checked):
+                _slots[slot][7] = _slots[slot][6].value = row_id in _checked
+
+    # Table row 0 is the header, so slot n is on row n + 1.
+    while len(_slots) > visible:
+        _slots.pop()
+        table_input.deleteRow(len(_slots) + 1)
+
+    if visible + 1 > table_input.maximumVisibleRows:
+        table_input.maximumVisibleRows = visible + 1
+
+    if _page_input:
+        _page_input.formattedText = page_text()
+    show_totals()
+
+
+# Creates the inputs of a slot and adds them to the table.
+def create_slot(inputs: adsk.core.CommandInputs, table_input: adsk.core.TableCommandInput, slot: int, values,
+                checked: bool) -> list:
+    name, value, string, integer = values
+
+    # The ids belong to the slot, not the row, so they are reused as the window moves.
+    text_input = inputs.addTextBoxCommandInput(f'text_input_{slot}', '', name, 1, True)
+    value_input = inputs.addValueInput(f'value_input_{slot}', 'Value', 'cm', adsk.core.ValueInput.createByReal(value))
+    string_input = inputs.addStringValueInput(f'string_input_{slot}', 'String', string)
+    spinner_input = inputs.addIntegerSpinnerCommandInput(f'spinner_input_{slot}', 'Int', 0, 100, 2, integer)
+    check_input = inputs.addBoolValueInput(f'check_input_{slot}', 'Delete', True, '', checked)
 
     # Add the inputs to the table.
-    row = table_input.rowCount
+    row = slot + 1
     table_input.addCommandInput(text_input, row, 0, 0, 0)
     table_input.addCommandInput(value_input, row, 1, 0, 0)
     table_input.addCommandInput(string_input, row, 2, 0, 0)
     table_input.addCommandInput(spinner_input, row, 3, 0, 0)
-
-    # Increment a counter used to make each row unique.
-    ROW_NUMBER = ROW_NUMBER + 1
-
-    if table_input.rowCount > table_input.maximumVisibleRows:
-        table_input.maximumVisibleRows = table_input.rowCount
-
-
-# Adds a header row to the table.
-def add_header_row_to_table(table_input: adsk.core.TableCommandInput):
-    inputs = adsk.core.CommandInputs.cast(table_input.commandInputs)
-    column_names = ['Name', 'Value', 'String', 'Integer']
-
-    for i in range(len(column_names)):
-        column_name = f'<b>{column_names[i]}</b>'
-        text_input = inputs.addTextBoxCommandInput(f'header_{i}', '', column_name, 1, True)
-        table_input.addCommandInput(text_input, 0, i)
+    table_input.addCommandInput(check_input, row, 4, 0, 0)
+
+    return [values, text_input, value_input, string_input, spinner_input, None, check_input, checked]
+
+
+# Writes the cells of a slot that differ from the values of the row it now shows.
+def update_slot(slot: list, values):
+    shown = slot[0]
+    if shown[0] != values[0]:
+        slot[1].formattedText = values[0]
+    if shown[1] != values[1]:
+        slot[2].value = values[1]
+    if shown[2] != values[2]:
+        slot[3].value = values[2]
+    if shown[3] != values[3]:
+        slot[4].value = values[3]
+    slot[0] = values
+
+
+# Copies a cell edited by the user into the model.
+def update_cell(slot: int, column: str, value):
+    row_id = _slots[slot][5]
+    _model.set(row_id, column, value)
+    _slots[slot][0] = _model.row_by_id(row_id)
+    if column in _model.aggregates:
+        show_totals()
+
+
+# Checks or unchecks the row a slot shows for deletion.
+def check_row(slot: int, checked: bool):
+    _slots[slot][7] = checked
+    if checked:
+        _checked.add(_slots[slot][5])
+    else:
+        _checked.discard(_slots[slot][5])
+
+
+# Deletes rows by their ids in the model, then shows the rows that move into the window.
+def delete_rows(table_input: adsk.core.TableCommandInput, row_ids):
+    _model.delete(row_ids)
+    # The ids are given to later new rows, which start unchecked.
+    _checked.difference_update(row_ids)
+    show_window(table_input)
+
+
+# Describes which rows the window shows.
+def page_text() -> str:
+    if not _model:
+        return 'No rows'
+    return f'Rows {_window_start + 1} to {_window_start + len(_slots)} of {len(_model)}'
+
+
+# Writes the totals to the footer, the model keeps them up to date as rows change.
+def show_totals():
+    if _totals_input:
+        _totals_input.formattedText = totals_text()
+
+
+# Describes the sum, min, max and mean of the Value and Integer columns.
+def totals_text() -> str:
+    if not _model:
+        return 'No rows'
+    lines = []
+    for label, column in (('Value', 'value'), ('Integer', 'integer')):
+        aggregate = _model.aggregates[column]
+        lines.append(f'<b>{label}</b> sum {aggregate.total:.10g}, min {aggregate.min:g}, '
+                     f'max {aggregate.max:g}, mean {aggregate.mean:.4g}')
+    return '<br>'.join(lines)
@@ -0,0 +1,422 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+# Plain Python data model behind the Table command. It holds every row, while
+# the dialog only creates command inputs for the window of rows on screen.
+# Nothing here touches the Fusion API.
+import csv
+import heapq
+import math
+from array import array
+from collections import Counter
+from itertools import compress
+
+# The columns of every row, in table order
+COLUMNS = ('name', 'value', 'string', 'integer')
+
+# Range of the integer column, which is stored as 64-bit integers
+INTEGER_MIN = -2 ** 63
+INTEGER_MAX = 2 ** 63 - 1
+
+
+class ColumnAggregate:
+    """Running count, sum, min, max and mean of a numeric column, updated one cell at a time.
+
+    Min and max come from a min-heap and a max-heap. A value that is removed
+    stays in the heaps and is only counted as pending, it is discarded once it
+    reaches the top. The heaps are rebuilt without the pending values when they
+    grow to twice the number of live values, which also recomputes the sum, so
+    float rounding can't build up over a long editing session.
+
+    Arguments:
+    zero -- 0.0 for a float column, whose sums are then computed with math.fsum, or 0.
+    """
+
+    def __init__(self, zero=0):
+        self.count = 0
+        self.total = zero
+        self._sum = math.fsum if isinstance(zero, float) else sum
+        self._low = []
+        self._high = []
+        self._low_pending = Counter()
+        self._high_pending = Counter()
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        heapq.heappush(self._low, value)
+        heapq.heappush(self._high, -value)
+
+    def extend(self, values):
+        if len(values) < len(self._low):
+            for value in values:
+                self.add(value)
+            return
+        # Cheaper to heapify everything than to push a large batch one at a time
+        self.count += len(values)
+        self.total += self._sum(values)
+        self._low.extend(values)
+        self._high.extend(-value for value in values)
+        heapq.heapify(self._low)
+        heapq.heapify(self._high)
+
+    def remove(self, value):
+        self.count -= 1
+        self.total -= value
+        self._low_pending[value] += 1
+        self._high_pending[-value] += 1
+        if len(self._low) > 2 * self.count + 64:
+            self._rebuild()
+
+    def replace(self, old, new):
+        if old != new:
+            self.remove(old)
+            self.add(new)
+
+    @staticmethod
+    def _top(heap, pending):
+        while pending[heap[0]]:
+            pending[heapq.heappop(heap)] -= 1
+        return heap[0]
+
+    @property
+    def min(self):
+        return self._top(self._low, self._low_pending) if self.count else None
+
+    @property
+    def max(self):
+        return -self._top(self._high, self._high_pending) if self.count else None
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def _rebuild(self):
+        live = []
+        pending = self._low_pending
+        for value in self._low:
+            if pending[value]:
+                pending[value] -= 1
+            else:
+                live.append(value)
+        self._low_pending.clear()
+        self._high_pending.clear()
+        self._low = live
+        heapq.heapify(self._low)
+        self._high = [-value for value in live]
+        heapq.heapify(self._high)
+        self.total = self._sum(live)
+
+
+class TableModel:
+    """The rows of a table, stored by column, each with a stable row id.
+
+    The value column is an array of doubles and the integer column an array
+    of 64-bit integers, so they can be read in bulk (summed, exported) without
+    creating a Python object per cell. Names and strings are lists.
+
+    Every row gets an id that stays the same while other rows are added or
+    deleted, and the ids of deleted rows are given to new rows, so they never
+    grow past the most rows the table has held. Rows are addressed either by id
+    or by index, their position among the rows that haven't been deleted.
+
+    Deleting only marks the row's storage as free, in constant time plus a
+    Fenwick tree update. The storage is compacted once it holds as many
+    deleted rows as live ones, which keeps deletes amortized constant while
+    the rows stay in order. Looking a row up by id is a dictionary lookup.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.values = array('d')
+        self.strings = []
+        self.integers = array('q')
+        self._columns = {'name': self.names, 'value': self.values, 'string': self.strings, 'integer': self.integers}
+
+        # Row id of each storage position, and storage position of each live row id
+        self._ids = array('q')
+        self._positions = {}
+        self._free_ids = []
+        self._next_id = 0
+
+        # Running totals of the numeric columns, kept up to date by every change
+        self.aggregates = {'value': ColumnAggregate(0.0), 'integer': ColumnAggregate(0)}
+
+        # 1 for every live storage position, and a Fenwick tree over it for finding the nth live row
+        self._alive = bytearray()
+        self._tree = [0]
+        self._deleted = 0
+
+    def __len__(self):
+        return len(self._alive) - self._deleted
+
+    def _new_id(self) -> int:
+        if self._free_ids:
+            return self._free_ids.pop()
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _grow_tree(self):
+        # Adds a live position to the tree, node i covers the i & -i positions ending at i.
+        tree = self._tree
+        index = len(tree)
+        total = 1
+        child = index - 1
+        stop = index - (index & -index)
+        while child > stop:
+            total += tree[child]
+            child -= child & -child
+        tree.append(total)
+
+    def append(self, name: str, value: float, string: str, integer: int) -> int:
+        """Adds a row to the end of the table.
+
+        :returns:
+            The id of the new row.
+        """
+        return self.extend((name,), (value,), (string,), (integer,))[0]
+
+    def extend(self, names, values, strings, integers) -> list:
+        """Appends many rows at once, given one sequence per column.
+
+        :returns:
+            The ids of the new rows, in order.
+        """
+        if not len(names) == len(values) == len(strings) == len(integers):
+            raise ValueError('Every column needs a value for every row')
+        # Convert the numeric columns before changing any column, so a value the arrays
+        # can't hold (e.g. an integer past 64 bits) raises with the columns still in step.
+        values = array('d', values)
+        integers = array('q', integers)
+        self.names.extend(names)
+        self.values.extend(values)
+        self.strings.extend(strings)
+        self.integers.extend(integers)
+        self.aggregates['value'].extend(values)
+        self.aggregates['integer'].extend(integers)
+
+        row_ids = []
+        position = len(self._alive)
+        for _ in range(len(names)):
+            row_id = self._new_id()
+            row_ids.append(row_id)
+            self._ids.append(row_id)
+            self._positions[row_id] = position
+            self._alive.append(1)
+            self._grow_tree()
+            position += 1
+        return row_ids
+
+    def _position(self, index: int) -> int:
+        # Storage position of the index-th live row, found by descending the Fenwick tree.
+        if not 0 <= index < len(self):
+            raise IndexError('Table row index out of range')
+        tree = self._tree
+        position = 0
+        remaining = index + 1
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            node = position + step
+            if node < len(tree) and tree[node] < remaining:
+                position = node
+                remaining -= tree[node]
+            step >>= 1
+        return position
+
+    def row_id(self, index: int) -> int:
+        """Gets the id of the row at an index."""
+        return self._ids[self._position(index)]
+
+    def index(self, row_id: int) -> int:
+        """Gets the index of a row, the number of live rows before it."""
+        position = self._positions[row_id]
+        index = 0
+        tree = self._tree
+        while position:
+            index += tree[position]
+            position -= position & -position
+        return index
+
+    def row(self, index: int) -> tuple:
+        """Gets the name, value, string and integer of the row at an index."""
+        return self._row_at(self._position(index))
+
+    def row_by_id(self, row_id: int) -> tuple:
+        """Gets the name, value, string and integer of a row."""
+        return self._row_at(self._positions[row_id])
+
+    def _row_at(self, position):
+        return self.names[position], self.values[position], self.strings[position], self.integers[position]
+
+    def rows(self, start: int, count: int):
+        """Yields the id and values of up to count rows, starting at the index start."""
+        if count <= 0 or start >= len(self):
+            return
+        alive = self._alive
+        position = self._position(start)
+        while count and position < len(alive):
+            if alive[position]:
+                yield self._ids[position], self._row_at(position)
+                count -= 1
+            position += 1
+
+    def set(self, row_id: int, column: str, value):
+        """Changes one cell, e.g. after the user edited its input.
+
+        Arguments:
+        row_id -- The id of the row.
+        column -- One of COLUMNS.
+        value -- The new value of the cell.
+        """
+        cells = self._columns[column]
+        position = self._positions[row_id]
+        aggregate = self.aggregates.get(column)
+        if aggregate is None:
+            cells[position] = value
+        else:
+            old = cells[position]
+            cells[position] = value
+            # Read back, so the aggregate sees the value as the typed array stored it
+            aggregate.replace(old, cells[position])
+
+    def delete(self, row_ids):
+        """Deletes rows by id. Each id is freed and given to a later new row.
+
+        Arguments:
+        row_ids -- The ids of the rows to delete. An id given more than once is deleted once.
+                   If any id isn't a row, KeyError is raised and no row is deleted.
+        """
+        row_ids = list(dict.fromkeys(row_ids))
+        missing = [row_id for row_id in row_ids if row_id not in self._positions]
+        if missing:
+            raise KeyError(f'No rows with ids {missing}')
+
+        tree = self._tree
+        value_aggregate = self.aggregates['value']
+        integer_aggregate = self.aggregates['integer']
+        for row_id in row_ids:
+            position = self._positions.pop(row_id)
+            value_aggregate.remove(self.values[position])
+            integer_aggregate.remove(self.integers[position])
+            self._alive[position] = 0
+            self._free_ids.append(row_id)
+            self._deleted += 1
+            node = position + 1
+            while node < len(tree):
+                tree[node] -= 1
+                node += node & -node
+        if self._deleted and self._deleted >= len(self):
+            self.compact()
+
+    def compact(self):
+        """Drops the storage of deleted rows. Row ids are kept, only positions change."""
+        if not self._deleted:
+            return
+        alive = self._alive
+        self.names[:] = compress(self.names, alive)
+        self.values[:] = array('d', compress(self.values, alive))
+        self.strings[:] = compress(self.strings, alive)
+        self.integers[:] = array('q', compress(self.integers, alive))
+        self._ids = array('q', compress(self._ids, alive))
+        self._positions = dict(zip(self._ids, range(len(self._ids))))
+        self._alive = bytearray(b'\x01') * len(self._ids)
+        # With every position live, each node holds the size of the range it covers.
+        self._tree = [index & -index for index in range(len(self._ids) + 1)]
+        self._deleted = 0
+
+    def snapshot(self) -> dict:
+        """Gets the rows as a dictionary of plain values, the numeric columns as the bytes of their arrays.
+
+        Row ids are not kept, a model restored from the snapshot numbers its rows from 0.
+        """
+        self.compact()
+        return {
+            'names': self.names,
+            'values': self.values.tobytes(),
+            'strings': self.strings,
+            'integers': self.integers.tobytes(),
+        }
+
+    @classmethod
+    def from_snapshot(cls, snapshot: dict) -> 'TableModel':
+        """Creates a model holding the rows of a snapshot."""
+        model = cls()
+        values = array('d')
+        values.frombytes(snapshot['values'])
+        integers = array('q')
+        integers.frombytes(snapshot['integers'])
+        model.extend(snapshot['names'], values, snapshot['strings'], integers)
+        return model
+
+    def column(self, column: str):
+        """Gets every value of a column in row order, as the model's own list or array. Don't modify it."""
+        self.compact()
+        return self._columns[column]
+
+
+def read_csv(csv_file):
+    """Reads the records of a CSV file one row at a time, without loading the whole file.
+
+    The first row names the columns and is matched to COLUMNS ignoring case,
+    any other columns are ignored. Empty cells are left out of the record, so
+    add_rows fills in its defaults.
+
+    Arguments:
+    csv_file -- A text file opened with newline=''.
+
+    :returns:
+        A generator of record dictionaries, as taken by add_rows.
+    """
+    reader = csv.reader(csv_file)
+    header = next(reader, None)
+    if header is None:
+        return
+    positions = {name.strip().lower(): index for index, name in enumerate(header)}
+    positions = {column: positions[column] for column in COLUMNS if column in positions}
+    if not positions:
+        raise ValueError(f'The first row must name at least one of the columns {", ".join(COLUMNS)}')
+
+    for row in reader:
+        if not row:
+            continue
+        record = {column: row[index] for column, index in positions.items() if index < len(row) and row[index] != ''}
+        try:
+            if 'value' in record:
+                record['value'] = float(record['value'])
+            if 'integer' in record:
+                record['integer'] = check_integer(int(record['integer']))
+        except ValueError as error:
+            raise ValueError(f'Line {reader.line_num}: {error}') from None
+        yield record
+
+
+def check_integer(integer: int) -> int:
+    """Returns an integer for the integer column, raising ValueError if it doesn't fit in 64 bits."""
+    if not INTEGER_MIN <= integer <= INTEGER_MAX:
+        raise ValueError(f'{integer} is out of range for the Integer column')
+    return integer
+
+
+def write_csv(model: TableModel, csv_file) -> int:
+    """Writes every row of a model to a CSV file, one row at a time, with a header row.
+
+    Arguments:
+    model -- The rows to write.
+    csv_file -- A text file opened for writing with newline=''.
+
+    :returns:
+        The number of rows written, not counting the header.
+    """
+    writer = csv.writer(csv_file)
+    writer.writerow(COLUMNS)
+    model.compact()
+    writer.writerows(zip(model.names, model.values, model.strings, model.integers))
+    return len(model)
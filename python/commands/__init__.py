@@ -1,36 +1,64 @@
 # Here you define the commands that will be added to your add-in
-# If you want to add an additional command, duplicate one of the existing directories and import it here.
-# You need to use aliases (import "entry" as "my_module") assuming you have the default module named "entry"
-from .Basic import entry as basic
-from .Browser import entry as browser
-from .Everything import entry as everything
-from .HelloWorld import entry as hello_world
-from .Selections import entry as selections
-from .Table import entry as table
-from .SomethingDifferent import entry as something_different
-
-# This Template will automatically call the start() and stop() functions.
+# If you want to add an additional command, duplicate one of the existing directories and add it to the manifest.
+# Each directory needs a module named "entry" defining the command's start(), stop() and command_created().
+import os
+import time
+
+from .. import config
+from ..lib import fusionAddInUtils as futil
+
+
+# Describes a command without importing its entry module.
+# The values must match the CMD_ID, CMD_Description and IS_PROMOTED defined in the entry module,
+# LazyCommand.load logs a warning for any that don't once the module is imported.
+def _command(name: str, description: str, is_promoted: bool = False):
+    return futil.LazyCommand(
+        f'{__name__}.{name}.entry',
+        f'{config.COMPANY_NAME}_{config.ADDIN_NAME}_{name}',
+        name,
+        description,
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), name, 'resources', ''),
+        is_promoted=is_promoted,
+        workspace_id=config.design_workspace,
+        tab_id=config.tools_tab_id,
+        tab_name=config.my_tab_name,
+        panel_id=config.my_panel_id,
+        panel_name=config.my_panel_name,
+        panel_after=config.my_panel_after,
+    )
+
+
 # By default the order you add the commands to this list will be the order they appear in the UI
-commands = [
-    something_different,
-    hello_world,
-    basic,
-    selections,
-    everything,
-    table,
-    browser,
+manifest = [
+    _command('SomethingDifferent', 'Idk what this does yet', is_promoted=True),
+    _command('HelloWorld', 'Welcome to the Fusion API'),
+    _command('Basic', 'Simple Inputs Sample Command'),
+    _command('Selections', 'Selection Input Sample Command'),
+    _command('Everything', 'Various Command Inputs Sample Command'),
+    _command('Table', 'Table Input Sample Command'),
+    _command('Browser', 'Browser Input Sample Command'),
+    _command('HandlerStats', 'Show, dump or reset event handler dispatch times'),
 ]
 
+# In lazy mode the manifest entries are registered directly and each entry module is imported
+# the first time its command is run. Otherwise every entry module is imported now.
+if config.LAZY_LOAD_COMMANDS:
+    commands = manifest
+else:
+    _import_start = time.perf_counter()
+    commands = [command.load() for command in manifest]
+    futil.log(f'Imported {len(commands)} command modules at startup in '
+              f'{(time.perf_counter() - _import_start) * 1000:.2f} ms')
+
 
-# Assumes you defined a "start" function in each of your modules.
-# These functions will be run when the add-in is stopped.
+# Registers every command in one pass. The workspace, tab and panel shared by
+# the commands are only looked up once and the registration times are logged.
 def start():
-    for command in commands:
-        command.start()
+    futil.register_commands(commands)
+    if config.LAZY_LOAD_COMMANDS:
+        futil.log(f'Deferred importing {len(commands)} command modules until each command is first run')
 
 
-# Assumes you defined a "start" function in each of your modules.
-# These functions will be run when the add-in is stopped.
+# Removes every command in one pass, then deletes any panel or tab left empty.
 def stop():
-    for command in commands:
-        command.stop()
+    futil.unregister_commands(commands)
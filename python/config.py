@@ -7,12 +7,72 @@ import os
 
 DEBUG = True
 
+# Lowest level ('info', 'warning' or 'error') logged by particular modules, keyed by dotted
+# module name segments, e.g. {'commands.Everything': 'warning'}. Other modules log info
+# messages only while DEBUG is True. Messages below the level are never formatted.
+LOG_LEVELS = {}
+
+# Set to True to buffer log messages and write them in batches instead of one at a time.
+# The buffer is flushed from a main-thread custom event every LOG_FLUSH_INTERVAL seconds,
+# once it holds LOG_FLUSH_THRESHOLD messages, and whenever an error is logged.
+LOG_BATCHING = True
+LOG_FLUSH_INTERVAL = 0.25
+LOG_FLUSH_THRESHOLD = 200
+LOG_BUFFER_SIZE = 5000
+
+# Each distinct error is logged in full once. Repeats are counted and summarised at most this often (seconds).
+ERROR_SUMMARY_INTERVAL = 60.0
+
+# Set to False to import every command's entry module when the add-in starts.
+# Otherwise only the button is created and the module is imported when the command is first run.
+LAZY_LOAD_COMMANDS = True
+
+# Set to True to time every command import, start(), stop() and UI registration call.
+# A sorted report is logged after the add-in starts and stops, and a Chrome trace
+# (open with chrome://tracing or https://ui.perfetto.dev) is written to PROFILE_FOLDER.
+PROFILE = False
+PROFILE_FOLDER = os.path.join(os.path.dirname(__file__), 'profiles')
+
+# Set to True to record call counts and latency histograms for every event handler from startup.
+# Recording can also be turned on, dumped and reset at runtime with the HandlerStats command.
+DISPATCH_STATS = False
+
+# Shortest time in seconds between two inputChanged calls for an input that a command coalesces,
+# e.g. a slider or manipulator being dragged. Changes in between are collapsed into the latest.
+INPUT_COALESCE_INTERVAL = 1 / 30
+
+# Shortest time in seconds between two messages sent to the page of a browser input through an
+# HTML channel, about one frame. Messages sent in between are queued and sent together.
+HTML_FLUSH_INTERVAL = 1 / 60
+
+# Number of rows the Table command materializes as command inputs at once. Its rows are kept
+# in a plain Python model and larger tables are paged with the Previous and Next buttons.
+# Set to 0 to materialize every row.
+TABLE_PAGE_SIZE = 10
+
 # repo root - fusion-add-in-playground
 # todo: change this to something more useful
 ADDIN_NAME = os.path.basename(os.path.dirname(__file__))
 
 COMPANY_NAME = 'CareyJack'
 
+# Path of a JSON Lines log file, or None to disable it. Every logged message and every event
+# handler call (with its duration) is written as one record, tagged with the handler and command id.
+# Writing a record per event adds file I/O to every event, so it is off unless debugging, e.g.
+#   LOG_FILE = os.path.join(os.path.dirname(__file__), 'logs', f'{ADDIN_NAME}.jsonl')
+# The file is rotated to .1, .2, ... once it reaches LOG_FILE_MAX_BYTES. To filter or tail it run
+#   python lib/fusionAddInUtils/jsonl_log.py <LOG_FILE> --command CareyJack_python_Table --level error
+LOG_FILE = None
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+# Commands like Everything and Table reopen with the inputs and rows they were closed with.
+# The snapshots are kept per document and command, up to DIALOG_STATE_MAX_BYTES of them with
+# the least recently used dropped first, and saved to DIALOG_STATE_FILE (None to keep them in
+# memory only) when the add-in stops.
+DIALOG_STATE_FILE = os.path.join(os.path.dirname(__file__), 'state', f'{ADDIN_NAME}.dialogs')
+DIALOG_STATE_MAX_BYTES = 8 * 1024 * 1024
+
 # FIXME add good comments
 design_workspace = 'FusionSolidEnvironment'
 tools_tab_id = "JacksTab"
@@ -1,2 +1,10 @@
 from .general_utils import *
+from .jsonl_log import start_log_file, stop_log_file, read_log, tail_log
 from .event_utils import *
+from .html_channel import *
+from .dispatch_stats import *
+from .profiling import *
+from .command_utils import *
+from .input_utils import *
+from .dialog_spec import *
+from .dialog_state import *
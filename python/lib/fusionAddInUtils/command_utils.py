@@ -0,0 +1,311 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import importlib
+import time
+
+import adsk.core
+from .general_utils import log
+from .event_utils import add_handler
+from .profiling import timed
+
+app = adsk.core.Application.get()
+ui = app.userInterface
+
+# Resolved (toolbar tab, panel) handles keyed by (workspace id, tab id, panel id).
+# Most commands share a panel so the workspace/tab/panel lookups only happen once.
+# Panels and tabs are only deleted by _delete_empty_panels, which drops their entries,
+# so cached handles are used without checking that they are still valid.
+_panels = {}
+
+
+def get_panel(
+        workspace_id: str,
+        tab_id: str,
+        tab_name: str,
+        panel_id: str,
+        panel_name: str,
+        panel_after: str = ''
+) -> adsk.core.ToolbarPanel:
+    """Gets a toolbar panel, creating its tab and the panel itself if necessary.
+
+    The resolved handles are cached, so further calls for the same target
+    don't go back through the Fusion API. The cache is dropped as panels and
+    tabs are deleted when commands are unregistered.
+
+    Arguments:
+    workspace_id -- The id of the workspace the panel belongs to.
+    tab_id -- The id of the toolbar tab the panel belongs to.
+    tab_name -- The name used if the tab has to be created.
+    panel_id -- The id of the panel.
+    panel_name -- The name used if the panel has to be created.
+    panel_after -- The id of the panel to position a new panel after.
+
+    :returns:
+        The toolbar panel.
+    """
+    key = (workspace_id, tab_id, panel_id)
+    cached = _panels.get(key)
+    if cached is not None:
+        return cached[1]
+
+    with timed(f'get panel {panel_id}', 'ui'):
+        # Get target workspace for the command.
+        workspace = ui.workspaces.itemById(workspace_id)
+
+        # Get target toolbar tab for the command and create the tab if necessary.
+        toolbar_tab = workspace.toolbarTabs.itemById(tab_id)
+        if toolbar_tab is None:
+            toolbar_tab = workspace.toolbarTabs.add(tab_id, tab_name)
+
+        # Get target panel for the command and and create the panel if necessary.
+        panel = toolbar_tab.toolbarPanels.itemById(panel_id)
+        if panel is None:
+            panel = toolbar_tab.toolbarPanels.add(panel_id, panel_name, panel_after, False)
+
+    _panels[key] = (toolbar_tab, panel)
+    return panel
+
+
+def register_command(command) -> adsk.core.CommandControl:
+    """Creates the command definition and the button control for a command.
+
+    Arguments:
+    command -- A command module (or any object) defining CMD_ID, CMD_NAME,
+               CMD_Description, ICON_FOLDER, IS_PROMOTED, WORKSPACE_ID, TAB_ID,
+               TAB_NAME, PANEL_ID, PANEL_NAME, PANEL_AFTER and command_created.
+
+    :returns:
+        The command control that was added to the panel.
+    """
+    # ******************************** Create Command Definition ********************************
+    with timed(f'addButtonDefinition {command.CMD_ID}', 'ui'):
+        cmd_def = ui.commandDefinitions.addButtonDefinition(
+            command.CMD_ID, command.CMD_NAME, command.CMD_Description, command.ICON_FOLDER
+        )
+
+    # Add command created handler. The function passed here will be executed when the command is executed.
+    with timed(f'add commandCreated handler {command.CMD_ID}', 'ui'):
+        add_handler(cmd_def.commandCreated, command.command_created, name=f'{command.CMD_NAME}.command_created',
+                    command_id=command.CMD_ID)
+
+    # ******************************** Create Command Control ********************************
+    panel = get_panel(
+        command.WORKSPACE_ID, command.TAB_ID, command.TAB_NAME,
+        command.PANEL_ID, command.PANEL_NAME, command.PANEL_AFTER
+    )
+
+    # Create the command control, i.e. a button in the UI.
+    with timed(f'addCommand {command.CMD_ID}', 'ui'):
+        control = panel.controls.addCommand(cmd_def)
+
+        # Now you can set various options on the control such as promoting it to always be shown.
+        control.isPromoted = command.IS_PROMOTED
+    return control
+
+
+def register_commands(commands: list) -> dict:
+    """Registers several commands in one pass and logs how long each one took.
+
+    Arguments:
+    commands -- The commands to register, see register_command. They are added
+                to their panels in list order.
+
+    :returns:
+        A dictionary of registration times in seconds, keyed by command id.
+    """
+    timings = {}
+    start_time = time.perf_counter()
+
+    for command in commands:
+        command_start = time.perf_counter()
+        with timed(f'start {command.CMD_NAME}', 'command'):
+            register_command(command)
+        timings[command.CMD_ID] = time.perf_counter() - command_start
+
+    _log_timings('Registered', timings, time.perf_counter() - start_time)
+    return timings
+
+
+def unregister_command(command):
+    """Deletes the control and definition of a command, then any panel or tab left empty.
+
+    Arguments:
+    command -- The command to remove, see register_command.
+    """
+    _delete_command(command)
+    _delete_empty_panels([_panel_key(command)])
+
+
+def unregister_commands(commands: list) -> dict:
+    """Removes several commands in one pass and logs how long each one took.
+
+    Empty panels and tabs are only checked once, after every command is removed.
+
+    Arguments:
+    commands -- The commands to remove, see register_command.
+
+    :returns:
+        A dictionary of removal times in seconds, keyed by command id.
+    """
+    timings = {}
+    start_time = time.perf_counter()
+
+    for command in commands:
+        command_start = time.perf_counter()
+        with timed(f'stop {command.CMD_NAME}', 'command'):
+            _delete_command(command)
+        timings[command.CMD_ID] = time.perf_counter() - command_start
+
+    with timed('delete empty panels', 'ui'):
+        _delete_empty_panels(dict.fromkeys(_panel_key(command) for command in commands))
+    _panels.clear()
+
+    _log_timings('Unregistered', timings, time.perf_counter() - start_time)
+    return timings
+
+
+class LazyCommand:
+    """Lightweight stand-in for a command module that is only imported on first use.
+
+    It carries the same CMD_ID, CMD_NAME, CMD_Description, ICON_FOLDER,
+    IS_PROMOTED and panel target attributes as an entry module, so it can be
+    passed to register_commands. The entry module is imported the first time
+    the command's commandCreated event fires.
+    """
+
+    # Seconds spent importing entry modules on first use, keyed by module name.
+    # This is import time that was kept off the add-in startup.
+    import_times = {}
+
+    # Attributes the stand-in repeats from its entry module, checked against it once imported
+    MANIFEST_ATTRIBUTES = ('CMD_ID', 'CMD_NAME', 'CMD_Description', 'IS_PROMOTED')
+
+    def __init__(
+            self,
+            module_name: str,
+            cmd_id: str,
+            name: str,
+            description: str,
+            icon_folder: str,
+            *,
+            is_promoted: bool = False,
+            workspace_id: str,
+            tab_id: str,
+            tab_name: str,
+            panel_id: str,
+            panel_name: str,
+            panel_after: str = ''
+    ):
+        self.module_name = module_name
+        self.module = None
+
+        self.CMD_ID = cmd_id
+        self.CMD_NAME = name
+        self.CMD_Description = description
+        self.ICON_FOLDER = icon_folder
+        self.IS_PROMOTED = is_promoted
+
+        self.WORKSPACE_ID = workspace_id
+        self.TAB_ID = tab_id
+        self.TAB_NAME = tab_name
+        self.PANEL_ID = panel_id
+        self.PANEL_NAME = panel_name
+        self.PANEL_AFTER = panel_after
+
+    def load(self):
+        """Imports the entry module if it hasn't been imported yet.
+
+        A warning is logged for each attribute of the stand-in that differs from
+        the entry module's, as the command was registered with the stand-in's.
+
+        :returns:
+            The entry module.
+        """
+        if self.module is None:
+            start_time = time.perf_counter()
+            with timed(f'import {self.module_name}', 'import'):
+                self.module = importlib.import_module(self.module_name)
+            LazyCommand.import_times[self.module_name] = time.perf_counter() - start_time
+            for attribute in LazyCommand.MANIFEST_ATTRIBUTES:
+                expected = getattr(self, attribute)
+                actual = getattr(self.module, attribute, None)
+                if actual != expected:
+                    log(f'{self.module_name}.{attribute} is {actual!r} but the command manifest has {expected!r}',
+                        adsk.core.LogLevels.WarningLogLevel)
+        return self.module
+
+    def command_created(self, args: adsk.core.CommandCreatedEventArgs):
+        if self.module is None:
+            self.load()
+            elapsed = LazyCommand.import_times[self.module_name]
+            saved = sum(LazyCommand.import_times.values())
+            log(f'{self.CMD_NAME} entry module imported on first use in {elapsed * 1000:.2f} ms '
+                f'({saved * 1000:.2f} ms of command imports kept off add-in startup so far)')
+        self.module.command_created(args)
+
+    def start(self):
+        register_command(self)
+
+    def stop(self):
+        unregister_command(self)
+
+
+def _panel_key(command):
+    return command.WORKSPACE_ID, command.TAB_ID, command.PANEL_ID
+
+
+def _find_panel(key):
+    cached = _panels.get(key)
+    if cached is not None:
+        return cached
+
+    workspace_id, tab_id, panel_id = key
+    workspace = ui.workspaces.itemById(workspace_id)
+    toolbar_tab = workspace.toolbarTabs.itemById(tab_id)
+    panel = workspace.toolbarPanels.itemById(panel_id)
+    return toolbar_tab, panel
+
+
+def _delete_command(command):
+    _, panel = _find_panel(_panel_key(command))
+    command_control = panel.controls.itemById(command.CMD_ID) if panel else None
+    command_definition = ui.commandDefinitions.itemById(command.CMD_ID)
+
+    # Delete the button command control
+    if command_control:
+        command_control.deleteMe()
+
+    # Delete the command definition
+    if command_definition:
+        command_definition.deleteMe()
+
+
+def _delete_empty_panels(keys):
+    for key in keys:
+        toolbar_tab, panel = _find_panel(key)
+
+        # Delete the panel if it is empty
+        if panel and panel.controls.count == 0:
+            panel.deleteMe()
+            _panels.pop(key, None)
+
+        # Delete the tab if it is empty, along with the handles cached for it
+        if toolbar_tab and toolbar_tab.toolbarPanels.count == 0:
+            toolbar_tab.deleteMe()
+            for cached_key in [cached_key for cached_key in _panels if cached_key[:2] == key[:2]]:
+                del _panels[cached_key]
+
+
+def _log_timings(action: str, timings: dict, total: float):
+    log(f'{action} {len(timings)} commands in {total * 1000:.2f} ms')
+    for cmd_id, elapsed in timings.items():
+        log(f'    {cmd_id}: {elapsed * 1000:.2f} ms')
@@ -0,0 +1,278 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+# Builds command dialogs from a declarative spec. A spec is a dictionary that
+# can also be loaded from JSON:
+#
+#   {
+#       'command': {'okButtonText': 'Dump to Log'},   # Properties of the command
+#       'inputs': [
+#           {
+#               'type': 'angle_value',                  # A key of INPUT_TYPES
+#               'id': 'angle_value_input',
+#               'name': 'Angle Value',
+#               'args': [{'value': '0.0 rad'}],         # Arguments after the id and name
+#               'properties': {'maximumValue': 6.28},
+#               'calls': [['setManipulator', {'point': [0, 0, 0]}, {'vector': [1, 0, 0]}]],
+#           },
+#           {'type': 'drop_down', ..., 'list_items': [['Item 1', True], ['Item 2', False]]},
+#           {'type': 'group', ..., 'children': [...]},
+#           {'type': 'table', ..., 'rows': [[...], ...], 'toolbar': [...]},
+#       ],
+#   }
+#
+# {'value': '1 cm'}, {'real': 1.0}, {'point': [x, y, z]} and {'vector': [x, y, z]}
+# stand for a ValueInput, Point3D or Vector3D, created once when the spec is
+# compiled. In a spec written in Python any value may also be a function, which
+# is called each time the dialog is built, e.g. for text showing current state.
+
+import collections
+
+import adsk.core
+
+# The CommandInputs method that adds each type of input
+INPUT_TYPES = {
+    'angle_value': 'addAngleValueCommandInput',
+    'bool_value': 'addBoolValueInput',
+    'browser': 'addBrowserCommandInput',
+    'button_row': 'addButtonRowCommandInput',
+    'direction': 'addDirectionCommandInput',
+    'distance_value': 'addDistanceValueCommandInput',
+    'drop_down': 'addDropDownCommandInput',
+    'float_slider': 'addFloatSliderCommandInput',
+    'float_slider_list': 'addFloatSliderListCommandInput',
+    'float_spinner': 'addFloatSpinnerCommandInput',
+    'group': 'addGroupCommandInput',
+    'integer_slider': 'addIntegerSliderCommandInput',
+    'integer_slider_list': 'addIntegerSliderListCommandInput',
+    'integer_spinner': 'addIntegerSpinnerCommandInput',
+    'radio_button_group': 'addRadioButtonGroupCommandInput',
+    'selection': 'addSelectionInput',
+    'string_value': 'addStringValueInput',
+    'table': 'addTableCommandInput',
+    'text_box': 'addTextBoxCommandInput',
+    'value': 'addValueInput',
+}
+
+# Types of input that have listItems
+_LIST_TYPES = {'button_row', 'drop_down', 'radio_button_group'}
+
+_ENTRY_KEYS = {'type', 'id', 'name', 'args', 'properties', 'calls', 'list_items', 'children', 'rows', 'toolbar'}
+
+# How constants written as {'kind': value} are created
+_CONSTANTS = {
+    'value': lambda expression: adsk.core.ValueInput.createByString(expression),
+    'real': lambda real: adsk.core.ValueInput.createByReal(real),
+    'point': lambda coordinates: adsk.core.Point3D.create(*coordinates),
+    'vector': lambda coordinates: adsk.core.Vector3D.create(*coordinates),
+}
+
+# One input of a compiled dialog. The input is added to collections[collection] with
+# method(*args), then has its properties set, its methods called and its list items added.
+# placement is None, ('toolbar', table) or ('cell', table, row, column), where table is the
+# step index of a table input. container names the attribute holding the collection of the
+# input's own children, which becomes the next collection.
+_Step = collections.namedtuple(
+    '_Step', 'collection method args properties calls list_items placement container dynamic')
+
+
+class DialogPlan:
+    """A dialog spec compiled into the sequence of calls that builds the dialog.
+
+    Create one with compile_dialog, usually once when the command is loaded,
+    and call build from commandCreated.
+    """
+
+    def __init__(self, command_properties: tuple, steps: list, input_ids: list):
+        self.command_properties = command_properties
+        self.steps = steps
+        self.input_ids = input_ids
+
+    def build(self, command: adsk.core.Command) -> dict:
+        """Adds every input of the dialog to a command.
+
+        Arguments:
+        command -- The command being created, e.g. args.command in commandCreated.
+
+        :returns:
+            The inputs created, keyed by input id, as taken by CommandSession.add_inputs.
+        """
+        for name, value in self.command_properties:
+            setattr(command, name, _resolve(value))
+
+        input_collections = [command.commandInputs]
+        created = []
+        for step in self.steps:
+            args, properties, calls, list_items = step.args, step.properties, step.calls, step.list_items
+            if step.dynamic:
+                args, properties, calls, list_items = _resolve((args, properties, calls, list_items))
+
+            command_input = getattr(input_collections[step.collection], step.method)(*args)
+            for name, value in properties:
+                setattr(command_input, name, value)
+            for method, call_args in calls:
+                getattr(command_input, method)(*call_args)
+            if list_items:
+                items = command_input.listItems
+                for item in list_items:
+                    items.add(*item)
+
+            if step.placement is not None:
+                if step.placement[0] == 'toolbar':
+                    created[step.placement[1]].addToolbarCommandInput(command_input)
+                else:
+                    _, table, row, column = step.placement
+                    created[table].addCommandInput(command_input, row, column)
+            if step.container is not None:
+                input_collections.append(getattr(command_input, step.container))
+            created.append(command_input)
+
+        return dict(zip(self.input_ids, created))
+
+
+def compile_dialog(spec: dict) -> DialogPlan:
+    """Validates a dialog spec and compiles it into a DialogPlan.
+
+    The constants of the spec are created here, once, and the plan holds the
+    calls that build the dialog in order, so building it only makes the API
+    calls that add and set up its inputs.
+
+    Arguments:
+    spec -- The dialog spec, see the top of this module.
+
+    :returns:
+        The compiled plan.
+
+    Raises ValueError naming the offending entry if the spec is invalid.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError('A dialog spec must be a dictionary')
+    unknown = set(spec) - {'command', 'inputs'}
+    if unknown:
+        raise ValueError(f'Unknown dialog spec keys: {", ".join(sorted(unknown))}')
+
+    command_properties = tuple(
+        (name, _constant(value, f'command.{name}')) for name, value in _mapping(spec, 'command', 'spec').items())
+    compiler = _Compiler()
+    compiler.add_entries(_sequence(spec, 'inputs', 'spec'), 0, 'inputs')
+    return DialogPlan(command_properties, compiler.steps, compiler.input_ids)
+
+
+class _Compiler:
+    def __init__(self):
+        self.steps = []
+        self.input_ids = []
+        self.collections = 1
+
+    def add_entries(self, entries, collection, path, placement=None):
+        for position, entry in enumerate(entries):
+            self.add_entry(entry, collection, f'{path}[{position}]', placement)
+
+    def add_entry(self, entry, collection, path, placement):
+        if not isinstance(entry, dict):
+            raise ValueError(f'{path} must be a dictionary')
+        unknown = set(entry) - _ENTRY_KEYS
+        if unknown:
+            raise ValueError(f'{path} has unknown keys: {", ".join(sorted(unknown))}')
+
+        input_type = entry.get('type')
+        if input_type not in INPUT_TYPES:
+            raise ValueError(f'{path} has unknown type {input_type!r}, expected one of {", ".join(INPUT_TYPES)}')
+        input_id = entry.get('id')
+        if not isinstance(input_id, str) or not input_id:
+            raise ValueError(f'{path} needs a string id')
+        if input_id in self.input_ids:
+            raise ValueError(f'{path} reuses the input id {input_id!r}')
+        path = f'{path} ({input_id})'
+        for key, allowed in (('list_items', input_type in _LIST_TYPES), ('children', input_type == 'group'),
+                             ('rows', input_type == 'table'), ('toolbar', input_type == 'table')):
+            if key in entry and not allowed:
+                raise ValueError(f'{path}: a {input_type} input can\'t have {key}')
+
+        args = (input_id, entry.get('name', '')) + tuple(
+            _constant(arg, f'{path}.args') for arg in _sequence(entry, 'args', path))
+        properties = tuple(
+            (name, _constant(value, f'{path}.properties.{name}'))
+            for name, value in _mapping(entry, 'properties', path).items())
+        calls = []
+        for call in _sequence(entry, 'calls', path):
+            if not call or not isinstance(call[0], str):
+                raise ValueError(f'{path}.calls entries must start with a method name')
+            calls.append((call[0], tuple(_constant(arg, f'{path}.calls.{call[0]}') for arg in call[1:])))
+        list_items = tuple(
+            tuple(_constant(arg, f'{path}.list_items') for arg in item) for item in _sequence(entry, 'list_items', path))
+
+        container = None
+        if entry.get('children'):
+            container = 'children'
+        elif entry.get('rows'):
+            container = 'commandInputs'
+
+        index = len(self.steps)
+        self.input_ids.append(input_id)
+        self.steps.append(_Step(
+            collection, INPUT_TYPES[input_type], args, properties, tuple(calls), list_items, placement, container,
+            _is_dynamic((args, properties, calls, list_items))))
+
+        if container is not None:
+            child_collection = self.collections
+            self.collections += 1
+            if container == 'children':
+                self.add_entries(entry['children'], child_collection, f'{path}.children')
+            else:
+                for row, cells in enumerate(_sequence(entry, 'rows', path)):
+                    for column, cell in enumerate(cells):
+                        self.add_entry(cell, child_collection, f'{path}.rows[{row}][{column}]',
+                                       ('cell', index, row, column))
+        # Toolbar inputs are added alongside the table, then moved to its toolbar.
+        self.add_entries(_sequence(entry, 'toolbar', path), collection, f'{path}.toolbar', ('toolbar', index))
+
+
+def _sequence(entry, key, path):
+    value = entry.get(key, ())
+    if not isinstance(value, (list, tuple)):
+        raise ValueError(f'{path}.{key} must be a list')
+    return value
+
+
+def _mapping(entry, key, path):
+    value = entry.get(key, {})
+    if not isinstance(value, dict):
+        raise ValueError(f'{path}.{key} must be a dictionary')
+    return value
+
+
+def _constant(value, path):
+    # Creates the ValueInput, Point3D or Vector3D written as {'kind': value}.
+    if isinstance(value, dict):
+        if len(value) != 1 or next(iter(value)) not in _CONSTANTS:
+            raise ValueError(f'{path}: constants are written as {{kind: value}} with kind one of '
+                             f'{", ".join(_CONSTANTS)}')
+        kind, argument = next(iter(value.items()))
+        return _CONSTANTS[kind](argument)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_constant(item, path) for item in value)
+    return value
+
+
+def _is_dynamic(value):
+    if isinstance(value, (list, tuple)):
+        return any(_is_dynamic(item) for item in value)
+    return callable(value)
+
+
+def _resolve(value):
+    # Calls the functions of a dynamic step, the rest is kept as compiled.
+    if isinstance(value, tuple):
+        return tuple(_resolve(item) for item in value)
+    if isinstance(value, list):
+        return [_resolve(item) for item in value]
+    return value() if callable(value) else value
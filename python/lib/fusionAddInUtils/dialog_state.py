@@ -0,0 +1,264 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+# Remembers the inputs of command dialogs between sessions, per document and command.
+# A snapshot holds the value of each input that has one and anything else the command
+# adds, e.g. the rows of a table. Snapshots are kept serialized with marshal, in a cache
+# bounded by size that evicts the least recently used, and written to a file when the
+# add-in stops.
+
+import marshal
+import os
+import struct
+import traceback
+from collections import OrderedDict
+
+import adsk.core
+from .general_utils import log
+from .input_utils import get_input_reader, get_object_type, register_input_reader
+
+app = adsk.core.Application.get()
+
+# Attempt to read the state file settings from parent config.
+try:
+    from ... import config
+    DIALOG_STATE_FILE = config.DIALOG_STATE_FILE
+    DIALOG_STATE_MAX_BYTES = config.DIALOG_STATE_MAX_BYTES
+except:
+    DIALOG_STATE_FILE = None
+    DIALOG_STATE_MAX_BYTES = 8 * 1024 * 1024
+
+# Start of a state file: magic, format version and the marshal version it was written with
+_FILE_HEADER = struct.Struct('<4sHH')
+_FILE_MAGIC = b'FDSC'
+_FILE_VERSION = 1
+
+# Functions that restore the state of each type of input, keyed by objectType. The state is
+# read by the reader input_utils.py has for the type, so only types with a writer are kept.
+_writers = {}
+
+# Bool inputs are check boxes or buttons, only the state of check boxes is kept.
+_BOOL_TYPE = adsk.core.BoolValueCommandInput.classType()
+
+_cache = None
+
+
+class DialogStateCache:
+    """Dialog snapshots keyed by (document, command), bounded by their serialized size.
+
+    Snapshots are stored as the bytes marshal serializes them to, so the size
+    bound is exact. Once the snapshots take up more than max_bytes the least
+    recently used are evicted.
+
+    Arguments:
+    max_bytes -- The most bytes of snapshots to keep.
+    path -- The file the snapshots are loaded from and saved to, or None to keep them in memory only.
+    """
+
+    def __init__(self, max_bytes: int, path: str = None):
+        self.max_bytes = max_bytes
+        self.path = path
+        self.size = 0
+        self._entries = OrderedDict()
+        self._changed = False
+
+    def __len__(self):
+        return len(self._entries)
+
+    def put(self, key: tuple, snapshot: dict):
+        blob = marshal.dumps(snapshot)
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        if len(blob) > self.max_bytes:
+            log(f'Dialog state of {key[1]} is {len(blob)} bytes, more than the cache holds, it was not kept',
+                adsk.core.LogLevels.WarningLogLevel)
+            return
+        self._entries[key] = blob
+        self.size += len(blob)
+        self._changed = True
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def clear(self):
+        """Drops every snapshot, the file is emptied the next time it is saved."""
+        self._changed = self._changed or bool(self._entries)
+        self._entries.clear()
+        self.size = 0
+
+    def get(self, key: tuple):
+        blob = self._entries.get(key)
+        if blob is None:
+            return None
+        self._entries.move_to_end(key)
+        return marshal.loads(blob)
+
+    def load(self):
+        """Reads the snapshots saved to the file, if there is one written by this format and Python."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as state_file:
+            header = state_file.read(_FILE_HEADER.size)
+            if len(header) != _FILE_HEADER.size or _FILE_HEADER.unpack(header) != (
+                    _FILE_MAGIC, _FILE_VERSION, marshal.version):
+                log(f'Ignoring dialog state file {self.path}, it was written by another version')
+                return
+            # Oldest first, so the order of use survives a restart.
+            for key, blob in marshal.load(state_file):
+                self._entries[key] = blob
+                self.size += len(blob)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def save(self):
+        """Writes the snapshots to the file if any changed since it was read."""
+        if not self.path or not self._changed:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temporary_path = f'{self.path}.tmp'
+        with open(temporary_path, 'wb') as state_file:
+            state_file.write(_FILE_HEADER.pack(_FILE_MAGIC, _FILE_VERSION, marshal.version))
+            marshal.dump(list(self._entries.items()), state_file)
+        os.replace(temporary_path, self.path)
+        self._changed = False
+
+
+def get_dialog_state_cache() -> DialogStateCache:
+    """Gets the cache of dialog snapshots, loading it from config.DIALOG_STATE_FILE on first use."""
+    global _cache
+    if _cache is None:
+        _cache = DialogStateCache(DIALOG_STATE_MAX_BYTES, DIALOG_STATE_FILE)
+        try:
+            _cache.load()
+        except:
+            log(f'Failed to read dialog state file {DIALOG_STATE_FILE}\n{traceback.format_exc()}',
+                adsk.core.LogLevels.WarningLogLevel)
+    return _cache
+
+
+def save_dialog_states():
+    """Writes the dialog snapshots to config.DIALOG_STATE_FILE, usually when the add-in stops."""
+    if _cache is None:
+        return
+    try:
+        _cache.save()
+    except:
+        log(f'Failed to write dialog state file {DIALOG_STATE_FILE}\n{traceback.format_exc()}',
+            adsk.core.LogLevels.WarningLogLevel)
+
+
+def register_input_state(input_class, write, read=None):
+    """Registers how the state of one type of command input is restored.
+
+    Arguments:
+    input_class -- The command input class, e.g. adsk.core.StringValueCommandInput.
+    write -- A function taking the input and a state returned by its reader, restoring it.
+    read -- A function taking the input and returning its state, see register_input_reader.
+            By default the reader already registered for the class is used.
+    """
+    if read is not None:
+        register_input_reader(input_class, read)
+    _writers[input_class.classType()] = write
+
+
+def snapshot_dialog(command_name: str, inputs: dict, extra=None):
+    """Snapshots the state of a dialog, usually from its execute or destroy handler.
+
+    Arguments:
+    command_name -- The name of the command, the snapshot is kept per command and document.
+    inputs -- The inputs to snapshot keyed by id, e.g. the session's inputs. Inputs
+              with no state, such as text boxes, selections and buttons, are skipped.
+    extra -- Any other state of the command, e.g. the rows of a table. It is built
+             from the same types as the state of an input.
+    """
+    values = {}
+    for input_id, command_input in inputs.items():
+        object_type = get_object_type(command_input)
+        if object_type not in _writers:
+            continue
+        if object_type == _BOOL_TYPE and not command_input.isCheckBox:
+            continue
+        values[input_id] = get_input_reader(object_type)(command_input)
+    get_dialog_state_cache().put((_document_key(), command_name), {'inputs': values, 'extra': extra})
+
+
+def restore_dialog(command_name: str, inputs: dict):
+    """Restores the inputs of a dialog from its last snapshot in the active document.
+
+    Arguments:
+    command_name -- The name of the command.
+    inputs -- The inputs of the new dialog keyed by id, as returned by DialogPlan.build.
+
+    :returns:
+        The extra state given to snapshot_dialog, or None if there is no snapshot.
+    """
+    snapshot = get_dialog_state_cache().get((_document_key(), command_name))
+    if snapshot is None:
+        return None
+    for input_id, value in snapshot['inputs'].items():
+        command_input = inputs.get(input_id)
+        if command_input is not None:
+            _writers[get_object_type(command_input)](command_input, value)
+    return snapshot['extra']
+
+
+def _document_key():
+    document = app.activeDocument
+    if document is None:
+        return ''
+    try:
+        return document.creationId
+    except:
+        return document.name
+
+
+def _write_expression(command_input, expression):
+    command_input.expression = expression
+
+
+def _write_value(command_input, value):
+    command_input.value = value
+
+
+def _write_sliders(command_input, values):
+    command_input.valueOne = values[0]
+    if values[1] is not None:
+        command_input.valueTwo = values[1]
+
+
+def _write_list(command_input, index):
+    if index is not None:
+        command_input.listItems.item(index).isSelected = True
+
+
+def _write_direction(command_input, is_flipped):
+    command_input.isDirectionFlipped = is_flipped
+
+
+def _write_group(command_input, is_expanded):
+    command_input.isExpanded = is_expanded
+
+
+for _input_class in (adsk.core.ValueCommandInput, adsk.core.DistanceValueCommandInput,
+                     adsk.core.AngleValueCommandInput, adsk.core.FloatSpinnerCommandInput):
+    register_input_state(_input_class, _write_expression)
+for _input_class in (adsk.core.StringValueCommandInput, adsk.core.BoolValueCommandInput,
+                     adsk.core.IntegerSpinnerCommandInput):
+    register_input_state(_input_class, _write_value)
+for _input_class in (adsk.core.FloatSliderCommandInput, adsk.core.IntegerSliderCommandInput):
+    register_input_state(_input_class, _write_sliders)
+for _input_class in (adsk.core.ButtonRowCommandInput, adsk.core.DropDownCommandInput,
+                     adsk.core.RadioButtonGroupCommandInput):
+    register_input_state(_input_class, _write_list)
+register_input_state(adsk.core.DirectionCommandInput, _write_direction)
+register_input_state(adsk.core.GroupCommandInput, _write_group)
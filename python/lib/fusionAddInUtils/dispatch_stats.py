@@ -0,0 +1,128 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+from bisect import bisect_left
+
+from .general_utils import log
+
+# Attempt to read the initial DISPATCH_STATS flag from parent config.
+try:
+    from ... import config
+    _enabled = config.DISPATCH_STATS
+except:
+    _enabled = False
+
+# Upper bounds of the latency buckets in seconds, each 25% above the last, from 10 us to about a minute.
+# Anything slower lands in one extra overflow bucket.
+BUCKET_BOUNDS = tuple(1e-5 * 1.25 ** i for i in range(71))
+
+# Latency histograms keyed by handler name
+_histograms = {}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram. Recording a value is one bisect and two additions."""
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """Estimates a percentile as the upper bound of the bucket it falls in.
+
+        Arguments:
+        fraction -- The percentile as a fraction, e.g. 0.95.
+        """
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                bound = BUCKET_BOUNDS[index] if index < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+
+def dispatch_stats_enabled() -> bool:
+    """Indicates if handler dispatch times are currently being recorded."""
+    return _enabled
+
+
+def enable_dispatch_stats(enabled: bool = True):
+    """Turns recording of handler dispatch times on or off.
+
+    Arguments:
+    enabled -- True to time every event handler call from now on.
+    """
+    global _enabled
+    _enabled = enabled
+
+
+def record_dispatch(name: str, seconds: float):
+    """Adds one handler call to the histogram of the named handler."""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        histogram = _histograms[name] = LatencyHistogram()
+    histogram.record(seconds)
+
+
+def get_dispatch_stats() -> dict:
+    """Gets the call count and latency summary of every handler, slowest p95 first.
+
+    :returns:
+        A dictionary keyed by handler name. Each value is a dictionary with the
+        count, mean, p50, p95, p99 and max, times in seconds.
+    """
+    stats = {
+        name: {
+            'count': histogram.count,
+            'mean': histogram.total / histogram.count if histogram.count else 0.0,
+            'p50': histogram.percentile(0.50),
+            'p95': histogram.percentile(0.95),
+            'p99': histogram.percentile(0.99),
+            'max': histogram.max,
+        }
+        for name, histogram in _histograms.items()
+    }
+    return dict(sorted(stats.items(), key=lambda item: item[1]['p95'], reverse=True))
+
+
+def reset_dispatch_stats():
+    """Discards every recorded handler call."""
+    _histograms.clear()
+
+
+def format_dispatch_stats() -> str:
+    """Formats the handler latency summary as a fixed-width table, times in milliseconds."""
+    lines = [f'{"count":>8} {"p50":>9} {"p95":>9} {"p99":>9} {"max":>9}  handler']
+    for name, row in get_dispatch_stats().items():
+        lines.append(
+            f'{row["count"]:>8} {row["p50"] * 1000:>9.2f} {row["p95"] * 1000:>9.2f} '
+            f'{row["p99"] * 1000:>9.2f} {row["max"] * 1000:>9.2f}  {name}'
+        )
+    return '\n'.join(lines)
+
+
+def log_dispatch_stats():
+    """Writes the handler latency summary to the Text Command window."""
+    log(f'===== Handler dispatch times (ms) =====\n{format_dispatch_stats()}', force_console=True)
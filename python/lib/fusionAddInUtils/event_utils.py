@@ -9,23 +9,55 @@
 #  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
 #  UNINTERRUPTED OR ERROR FREE.
 
+import collections
+import gc
+import math
 import sys
-from typing import Callable
+import threading
+import time
+import weakref
+from typing import Callable, Iterable
 
 import adsk.core
-from .general_utils import handle_error
+from . import dispatch_stats, jsonl_log
+from .general_utils import handle_error, log
+from .html_channel import HTMLChannel
 
+app = adsk.core.Application.get()
+
+# Attempt to read the coalescing interval from parent config.
+try:
+    from ... import config
+    INPUT_COALESCE_INTERVAL = config.INPUT_COALESCE_INTERVAL
+    HTML_FLUSH_INTERVAL = config.HTML_FLUSH_INTERVAL
+except:
+    INPUT_COALESCE_INTERVAL = 1 / 30
+    HTML_FLUSH_INTERVAL = 1 / 60
 
 # Global Variable to hold Event Handlers
 _handlers = []
 
+# Handler type resolved for each event class, e.g. CommandEvent -> CommandEventHandler
+_handler_types = {}
+
+# One Handler subclass per handler type, shared by every handler of that type
+_handler_classes = {}
+
+# Open command sessions keyed by command name
+_sessions = {}
+
+# Handlers released by closed sessions, keyed by command name. Handlers drop out of
+# these sets when they are garbage collected, so any that remain outlived their session.
+_released_handlers = collections.defaultdict(weakref.WeakSet)
+
 
 def add_handler(
         event: adsk.core.Event,
         callback: Callable,
         *,
         name: str = None,
-        local_handlers: list = None
+        local_handlers: list = None,
+        command_id: str = None
 ):
     """Adds an event handler to the specified event.
 
@@ -42,22 +74,318 @@ def add_handler(
                       be cleared using the clear_handlers function. You may want
                       to maintain your own handler list so it can be managed 
                       independently for each command.
+    command_id -- The id of the command the handler belongs to, written to the
+                  log file with its records. This argument must be specified by its keyword.
 
     :returns:
         The event handler that was created.  You don't often need this reference, but it can be useful in some cases.
     """   
-    module = sys.modules[event.__module__]
-    handler_type = module.__dict__[event.add.__annotations__['handler']]
-    handler = _create_handler(handler_type, callback, event, name, local_handlers)
+    handler_type = _get_handler_type(type(event))
+    handler = _create_handler(handler_type, callback, event, name, local_handlers, command_id)
     event.add(handler)
     return handler
 
 
 def clear_handlers():
-    """Clears the global list of handlers.
+    """Clears the global list of handlers and closes any open command sessions.
     """
     global _handlers
     _handlers = []
+    for command_name in list(_sessions):
+        close_session(command_name)
+
+
+class CommandSession:
+    """Holds the event handlers of one run of a command, from commandCreated until destroy.
+
+    Closing the session removes every handler from its event and releases it,
+    so nothing from the dialog is kept alive after the command is destroyed.
+
+    The session also holds the command inputs its handlers use, keyed by input id
+    in session.inputs, so they don't call itemById on every event, and the
+    InputCoalescer of every inputChanged handler added with coalesce_inputs and
+    the HTMLChannel of every browser input added with add_html_channel.
+    """
+
+    def __init__(self, name: str, command_id: str = None):
+        self.name = name
+        self.command_id = command_id
+        self.inputs = {}
+        self.coalescers = []
+        self.html_channels = {}
+        self._connections = []
+        self._custom_event_ids = []
+
+    @property
+    def handler_count(self) -> int:
+        """The number of handlers connected through this session."""
+        return len(self._connections)
+
+    def add_handler(
+            self,
+            event: adsk.core.Event,
+            callback: Callable,
+            *,
+            name: str = None,
+            coalesce_inputs: Iterable[str] = None,
+            interval: float = None
+    ):
+        """Adds an event handler that is kept alive until the session is closed.
+
+        Arguments:
+        event -- The event object you want to connect a handler to.
+        callback -- The function that will handle the event.
+        name -- A name to use in logging errors and dispatch times associated with
+                this event. Otherwise the session and callback names are used,
+                e.g. 'Table.command_execute'.
+        coalesce_inputs -- For an inputChanged event, the ids of inputs whose bursts
+                           of changes, e.g. while a slider or manipulator is dragged,
+                           are collapsed by an InputCoalescer. Changes of other
+                           inputs are handled straight away.
+        interval -- The shortest time between two calls of the callback for the same
+                    coalesced input, in seconds. Defaults to config.INPUT_COALESCE_INTERVAL.
+
+        :returns:
+            The event handler that was created.
+        """
+        handler_type = _get_handler_type(type(event))
+        name = name or f'{self.name}.{getattr(callback, "__name__", handler_type.__name__)}'
+        if coalesce_inputs:
+            callback = self._add_coalescer(callback, coalesce_inputs, interval, name)
+        handler = _define_handler(handler_type)(callback, name, self.command_id)
+        event.add(handler)
+        self._connections.append((event, handler))
+        return handler
+
+    def add_inputs(self, **command_inputs):
+        """Keeps command inputs for the handlers of this session, usually from commandCreated.
+
+        The inputs of a dialog don't change while it is open, so the handles
+        created along with it stay valid until the session is closed.
+
+        Arguments:
+        command_inputs -- The inputs, each passed with its input id as the keyword,
+                          e.g. session.add_inputs(selection_input=selection_input).
+        """
+        self.inputs.update(command_inputs)
+
+    def add_html_channel(
+            self,
+            browser_input: adsk.core.BrowserCommandInput,
+            *,
+            interval: float = None,
+            batch: bool = True
+    ) -> HTMLChannel:
+        """Adds a channel that sends messages to a browser input's page, usually from commandCreated.
+
+        Use channel.send(action, data) in place of browser_input.sendInfoToHTML. The
+        channel is kept in session.html_channels under the id of the browser input.
+
+        Arguments:
+        browser_input -- The browser input to send to.
+        interval -- The shortest time between two flushes to the page, in seconds.
+                    Defaults to config.HTML_FLUSH_INTERVAL.
+        batch -- False if the page doesn't handle batched messages, e.g. an external
+                 page, in which case only superseded messages are dropped.
+
+        :returns:
+            The HTMLChannel that was created.
+        """
+        # Delayed flushes are delivered by a custom event, on the main thread.
+        event_id = f'{__name__}.{self.name}.{browser_input.id}.flush'
+        channel = HTMLChannel(browser_input, interval or HTML_FLUSH_INTERVAL, event_id, batch)
+        self.add_handler(app.registerCustomEvent(event_id), channel.flush, name=f'{self.name}.html_flush')
+        self._custom_event_ids.append(event_id)
+        self.html_channels[browser_input.id] = channel
+        return channel
+
+    def _add_coalescer(self, callback, input_ids, interval, name):
+        # The delayed changes are delivered by a custom event, on the main thread.
+        event_id = f'{__name__}.{name}.coalesce'
+        coalescer = InputCoalescer(callback, input_ids, interval or INPUT_COALESCE_INTERVAL, event_id)
+        self.add_handler(app.registerCustomEvent(event_id), coalescer.flush, name=name)
+        self._custom_event_ids.append(event_id)
+        self.coalescers.append(coalescer)
+        return coalescer
+
+    def close(self):
+        """Removes and releases every handler and input held by this session.
+
+        Changes still held back by a coalescer and messages still queued on an
+        HTML channel are dropped, the dialog is gone.
+        """
+        for coalescer in self.coalescers:
+            coalescer.cancel()
+        for channel in self.html_channels.values():
+            channel.cancel()
+        released = _released_handlers[self.name]
+        for event, handler in self._connections:
+            try:
+                event.remove(handler)
+            except:
+                # The command may already be gone, in which case its events are too.
+                pass
+            released.add(handler)
+        for event_id in self._custom_event_ids:
+            app.unregisterCustomEvent(event_id)
+        self._connections = []
+        self._custom_event_ids = []
+        self.coalescers = []
+        self.html_channels = {}
+        self.inputs = {}
+
+
+class CoalescedInputChangedEventArgs:
+    """Stands in for the arguments of the last change of an input an InputCoalescer held back.
+
+    Event arguments are only valid while their event is being handled, so only
+    the input that changed is kept. Its command's inputs are read when first used.
+    """
+
+    def __init__(self, changed_input: adsk.core.CommandInput):
+        self.input = changed_input
+        self._inputs = None
+
+    @property
+    def inputs(self) -> adsk.core.CommandInputs:
+        if self._inputs is None:
+            self._inputs = self.input.parentCommand.commandInputs
+        return self._inputs
+
+
+class InputCoalescer:
+    """Calls an inputChanged callback at most about once per interval for each of some inputs.
+
+    The first change of an input is passed on straight away. Changes that follow
+    within the interval are held back, each replacing the one before, and the
+    latest is passed on from a custom event once the interval is over. Dragging a
+    slider or manipulator then runs the callback at a steady rate and always ends
+    on the final value. Changes of any other input are passed on straight away.
+
+    Add one through CommandSession.add_handler with coalesce_inputs, which also
+    registers the custom event and removes it when the session is closed.
+
+    Arguments:
+    callback -- The inputChanged callback. Changes that were held back are passed
+                to it as CoalescedInputChangedEventArgs.
+    input_ids -- The ids of the inputs to coalesce.
+    interval -- The shortest time between two calls for the same input, in seconds.
+    event_id -- The id of the registered custom event that delivers held back changes.
+    """
+
+    def __init__(self, callback: Callable, input_ids: Iterable[str], interval: float, event_id: str):
+        self.callback = callback
+        self.input_ids = frozenset(input_ids)
+        self.interval = interval
+        self.event_id = event_id
+
+        # Changes of the coalesced inputs received, and how many of them were passed on
+        self.received = 0
+        self.dispatched = 0
+
+        self._pending = {}
+        self._last_dispatch = {}
+        self._timer = None
+
+    def __call__(self, args: adsk.core.InputChangedEventArgs):
+        changed_input = args.input
+        input_id = changed_input.id
+        if input_id not in self.input_ids:
+            self.callback(args)
+            return
+
+        self.received += 1
+        now = time.monotonic()
+        if input_id not in self._pending and now - self._last_dispatch.get(input_id, -math.inf) >= self.interval:
+            self._dispatch(input_id, args, now)
+            return
+
+        self._pending[input_id] = changed_input
+        if self._timer is None:
+            # Timers run on their own thread, Fusion delivers the custom event on the main thread.
+            self._timer = threading.Timer(self.interval, app.fireCustomEvent, (self.event_id,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self, args: adsk.core.CustomEventArgs = None):
+        """Passes on every change that is being held back."""
+        self._timer = None
+        pending, self._pending = self._pending, {}
+        now = time.monotonic()
+        for input_id, changed_input in pending.items():
+            self._dispatch(input_id, CoalescedInputChangedEventArgs(changed_input), now)
+
+    def cancel(self):
+        """Drops the changes being held back."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending.clear()
+
+    def _dispatch(self, input_id, args, now):
+        self._last_dispatch[input_id] = now
+        self.dispatched += 1
+        self.callback(args)
+
+
+def open_session(command_name: str, command_id: str = None) -> CommandSession:
+    """Starts a new handler session for a command, usually from its commandCreated handler.
+
+    If the previous session of the command was never closed it is closed now
+    and a warning is logged.
+
+    Arguments:
+    command_name -- The name of the command, used to find the session again.
+    command_id -- The id of the command, written to the log file with the records of its handlers.
+
+    :returns:
+        The new session.
+    """
+    stale = _sessions.pop(command_name, None)
+    if stale is not None:
+        log(f'{command_name} session was not closed, releasing its {stale.handler_count} handlers',
+            adsk.core.LogLevels.WarningLogLevel)
+        stale.close()
+
+    session = _sessions[command_name] = CommandSession(command_name, command_id)
+    return session
+
+
+def get_session(command_name: str) -> CommandSession:
+    """Gets the open session of a command, or None if the command isn't running."""
+    return _sessions.get(command_name)
+
+
+def close_session(command_name: str):
+    """Closes the open session of a command, usually from its destroy handler.
+
+    Arguments:
+    command_name -- The name the session was opened with.
+    """
+    session = _sessions.pop(command_name, None)
+    if session is not None:
+        session.close()
+
+
+def get_handler_counts() -> dict:
+    """Gets the number of live session handlers per command name."""
+    return {command_name: session.handler_count for command_name, session in _sessions.items()}
+
+
+def find_leaked_handlers() -> dict:
+    """Finds handlers that are still alive after their session was closed.
+
+    A garbage collection is run first, so only handlers that something still
+    references are reported. Each leak is logged as a warning.
+
+    :returns:
+        The number of leaked handlers per command name.
+    """
+    gc.collect()
+    leaks = {command_name: len(handlers) for command_name, handlers in _released_handlers.items() if len(handlers)}
+    for command_name, count in leaks.items():
+        log(f'{command_name}: {count} handlers outlived their command session', adsk.core.LogLevels.WarningLogLevel)
+    return leaks
 
 
 def _create_handler(
@@ -65,24 +393,61 @@ def _create_handler(
         callback: Callable,
         event: adsk.core.Event,
         name: str = None,
-        local_handlers: list = None
+        local_handlers: list = None,
+        command_id: str = None
 ):
-    handler = _define_handler(handler_type, callback, name)()
+    handler = _define_handler(handler_type)(callback, name or handler_type.__name__, command_id)
     (local_handlers if local_handlers is not None else _handlers).append(handler)
     return handler
 
 
-def _define_handler(handler_type, callback, name: str = None):
-    name = name or handler_type.__name__
+def _get_handler_type(event_class):
+    handler_type = _handler_types.get(event_class)
+    if handler_type is None:
+        # The handler type is only named in the annotation of the event's add method.
+        module = sys.modules[event_class.__module__]
+        handler_type = module.__dict__[event_class.add.__annotations__['handler']]
+        _handler_types[event_class] = handler_type
+    return handler_type
+
+
+def _define_handler(handler_type):
+    handler_class = _handler_classes.get(handler_type)
+    if handler_class is not None:
+        return handler_class
 
     class Handler(handler_type):
-        def __init__(self):
+        def __init__(self, callback: Callable, name: str, command_id: str = None):
             super().__init__()
+            self._callback = callback
+            self._name = name
+            self._command_id = command_id
 
         def notify(self, args):
+            if not dispatch_stats._enabled and jsonl_log._sink is None:
+                try:
+                    self._callback(args)
+                except:
+                    handle_error(self._name)
+                return
+
+            # Time the whole call, including error handling, as it all blocks the UI thread.
+            # Messages logged meanwhile are attributed to this handler in the log file.
+            outer_handler = jsonl_log._current_handler, jsonl_log._current_command
+            jsonl_log._current_handler, jsonl_log._current_command = self._name, self._command_id
+            start = time.perf_counter()
             try:
-                callback(args)
+                self._callback(args)
             except:
-                handle_error(name)
+                handle_error(self._name)
+            finally:
+                jsonl_log._current_handler, jsonl_log._current_command = outer_handler
+            duration = time.perf_counter() - start
+
+            if dispatch_stats._enabled:
+                dispatch_stats.record_dispatch(self._name, duration)
+            if jsonl_log._sink is not None:
+                jsonl_log.write_dispatch_record(self._name, self._command_id, duration)
 
+    _handler_classes[handler_type] = Handler
     return Handler
@@ -9,28 +9,169 @@
 #  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
 #  UNINTERRUPTED OR ERROR FREE.
 
+import sys
+import threading
+import time
 import traceback
+from collections import deque
+from typing import Callable, Union
+
 import adsk.core
+from . import jsonl_log
 
 app = adsk.core.Application.get()
 ui = app.userInterface
 
-# Attempt to read DEBUG flag from parent config.
+# Attempt to read DEBUG flag and log batching settings from parent config.
 try:
     from ... import config
     DEBUG = config.DEBUG
 except:
     DEBUG = False
 
+try:
+    LOG_BATCHING = config.LOG_BATCHING
+    LOG_FLUSH_INTERVAL = config.LOG_FLUSH_INTERVAL
+    LOG_FLUSH_THRESHOLD = config.LOG_FLUSH_THRESHOLD
+    LOG_BUFFER_SIZE = config.LOG_BUFFER_SIZE
+except:
+    LOG_BATCHING = False
+    LOG_FLUSH_INTERVAL = 0.25
+    LOG_FLUSH_THRESHOLD = 200
+    LOG_BUFFER_SIZE = 5000
+
+# Messages below the threshold of the module logging them are dropped before they are formatted.
+# The default threshold keeps info messages only while debugging. Per-module thresholds are
+# keyed by dotted module name segments, e.g. 'commands.Everything', see set_log_level.
+_LOG_LEVEL_NAMES = {
+    'info': adsk.core.LogLevels.InfoLogLevel,
+    'warning': adsk.core.LogLevels.WarningLogLevel,
+    'error': adsk.core.LogLevels.ErrorLogLevel,
+}
+_default_log_level = adsk.core.LogLevels.InfoLogLevel if DEBUG else adsk.core.LogLevels.WarningLogLevel
+_module_log_levels = {}
+
+try:
+    _module_log_levels.update({module: _LOG_LEVEL_NAMES[name] for module, name in config.LOG_LEVELS.items()})
+except:
+    pass
+
+# Threshold resolved for each module that has logged, cleared by set_log_level
+_log_level_cache = {}
+
+LOG_FLUSH_EVENT_ID = f'{__name__}.flush_log'
 
-def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel, force_console: bool = False):
+# Seconds between summaries of repeated errors, see handle_error
+try:
+    ERROR_SUMMARY_INTERVAL = config.ERROR_SUMMARY_INTERVAL
+except:
+    ERROR_SUMMARY_INTERVAL = 60.0
+
+# Distinct errors tracked before further new errors are counted under one overflow entry
+MAX_ERROR_FINGERPRINTS = 500
+
+# Errors handled so far, keyed by (name, exception type, stack) fingerprint. Repeats not yet
+# summarised are flagged so the log flush timer can summarise them once the interval is up.
+_errors = {}
+_last_error_summary = time.monotonic()
+_unreported_errors = False
+
+# Messages waiting to be written as (message, level, force_console) tuples. When the
+# buffer is full the oldest message is dropped, see _dropped_messages.
+_log_buffer = deque(maxlen=LOG_BUFFER_SIZE)
+_dropped_messages = 0
+
+# Custom event, handler and timer thread that flush the buffer on the main thread
+_flush_event = None
+_flush_handler = None
+_flush_timer_stop = None
+
+
+def log(
+        message: Union[str, Callable[[], str]],
+        level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLevel,
+        force_console: bool = False,
+        *,
+        args: tuple = ()
+):
     """Utility function to easily handle logging in your app.
 
+    Messages below the log level of the calling module are dropped before they
+    are formatted, so pass a callable or format args rather than an f-string
+    when building the message is expensive, e.g. when it reads API properties:
+
+        futil.log(lambda: f'Input changed: {changed_input.id}')
+        futil.log('%s rows added', args=(row_count,))
+
     Arguments:
-    message -- The message to log.
+    message -- The message to log, a callable returning it, or a %-format string used with args.
     level -- The logging severity level.
-    force_console -- Forces the message to be written to the Text Command window. 
+    force_console -- Forces the message to be written to the Text Command window,
+                     whatever the log level of the calling module.
+    args -- Values formatted into message with the % operator, only if the message is kept.
     """    
+    if not force_console and level < get_log_level(sys._getframe(1).f_globals.get('__name__', '')):
+        return
+
+    if callable(message):
+        message = message()
+    elif args:
+        message = message % args
+
+    if jsonl_log._sink is not None:
+        jsonl_log.write_log_record(message, level)
+
+    # Queue the message if batching is running. Errors flush the queue and are written straight away.
+    if _flush_event is not None and level != adsk.core.LogLevels.ErrorLogLevel:
+        global _dropped_messages
+        if len(_log_buffer) == _log_buffer.maxlen:
+            _dropped_messages += 1
+        _log_buffer.append((message, level, force_console))
+        if len(_log_buffer) >= LOG_FLUSH_THRESHOLD:
+            flush_log()
+        return
+
+    if _log_buffer:
+        flush_log()
+    _write_log(message, level, force_console)
+
+
+def set_log_level(level: adsk.core.LogLevels, module: str = None):
+    """Sets the lowest level of message that is logged.
+
+    Arguments:
+    level -- Messages below this level are dropped.
+    module -- Only applies the level to modules whose dotted name contains
+              these segments, e.g. 'commands.Everything'. If not specified
+              the default level for every module is set.
+    """
+    global _default_log_level
+    if module is None:
+        _default_log_level = level
+    else:
+        _module_log_levels[module] = level
+    _log_level_cache.clear()
+
+
+def get_log_level(module: str = '') -> adsk.core.LogLevels:
+    """Gets the lowest level of message logged for a module, see set_log_level.
+
+    Arguments:
+    module -- The full dotted name of the module, e.g. __name__.
+    """
+    level = _log_level_cache.get(module)
+    if level is None:
+        level = _default_log_level
+        # The most specific (longest) matching key wins.
+        dotted = f'.{module}.'
+        matches = [key for key in _module_log_levels if f'.{key}.' in dotted]
+        if matches:
+            level = _module_log_levels[max(matches, key=len)]
+        _log_level_cache[module] = level
+    return level
+
+
+def _write_log(message: str, level: adsk.core.LogLevels, force_console: bool):
     # Always print to console, only seen through IDE.
     print(message)  
 
@@ -45,6 +186,96 @@ def log(message: str, level: adsk.core.LogLevels = adsk.core.LogLevels.InfoLogLe
         app.log(message, level, log_type)
 
 
+def flush_log():
+    """Writes every buffered log message.
+
+    Messages are printed in one batch and written to the Text Command window
+    with one app.log call per run of messages with the same level.
+    """
+    global _dropped_messages
+    if not _log_buffer:
+        return
+
+    batch = []
+    while _log_buffer:
+        batch.append(_log_buffer.popleft())
+
+    if _dropped_messages:
+        batch.insert(0, (f'{_dropped_messages} log messages dropped, the log buffer was full',
+                         adsk.core.LogLevels.WarningLogLevel, True))
+        _dropped_messages = 0
+
+    # Always print to console, only seen through IDE.
+    print('\n'.join(message for message, _, _ in batch))
+
+    # If config.DEBUG is True write all log messages to the console.
+    console_type = adsk.core.LogTypes.ConsoleLogType
+    run, run_level = [], None
+    for message, level, force_console in batch:
+        if not (DEBUG or force_console):
+            continue
+        if run and level != run_level:
+            app.log('\n'.join(run), run_level, console_type)
+            run = []
+        run.append(message)
+        run_level = level
+    if run:
+        app.log('\n'.join(run), run_level, console_type)
+
+
+def start_log_batching():
+    """Starts buffering log messages if config.LOG_BATCHING is set.
+
+    A timer thread fires a custom event every config.LOG_FLUSH_INTERVAL seconds
+    while messages are waiting, and the buffer is flushed on the main thread
+    when Fusion delivers the event. It is also flushed once it holds
+    config.LOG_FLUSH_THRESHOLD messages and whenever an error is logged.
+    """
+    global _flush_event, _flush_handler, _flush_timer_stop
+    if not LOG_BATCHING or _flush_event is not None:
+        return
+
+    _flush_handler = _LogFlushHandler()
+    _flush_event = app.registerCustomEvent(LOG_FLUSH_EVENT_ID)
+    _flush_event.add(_flush_handler)
+
+    _flush_timer_stop = threading.Event()
+    threading.Thread(target=_flush_timer, args=(_flush_timer_stop,), daemon=True).start()
+
+
+def stop_log_batching():
+    """Stops the flush timer and writes any buffered messages. Later messages are written straight away."""
+    global _flush_event, _flush_handler, _flush_timer_stop
+    if _flush_event is None:
+        return
+
+    _flush_timer_stop.set()
+    _flush_event.remove(_flush_handler)
+    app.unregisterCustomEvent(LOG_FLUSH_EVENT_ID)
+    _flush_event = _flush_handler = _flush_timer_stop = None
+    flush_log()
+
+
+class _LogFlushHandler(adsk.core.CustomEventHandler):
+    def __init__(self):
+        super().__init__()
+
+    def notify(self, args):
+        try:
+            flush_log()
+            if _error_summary_due():
+                log_error_summary()
+        except:
+            _write_log(f'flush_log\n{traceback.format_exc()}', adsk.core.LogLevels.ErrorLogLevel, False)
+
+
+# Runs on its own thread. Fusion delivers custom events on the main thread, where it is safe to log.
+def _flush_timer(stop: threading.Event):
+    while not stop.wait(LOG_FLUSH_INTERVAL):
+        if _log_buffer or _error_summary_due():
+            app.fireCustomEvent(LOG_FLUSH_EVENT_ID)
+
+
 def handle_error(name: str, show_message_box: bool = False):
     """Utility function to simplify error handling.
 
@@ -53,11 +284,104 @@ def handle_error(name: str, show_message_box: bool = False):
     show_message_box -- Indicates if the error should be shown in the message box.
                         If False, it will only be shown in the Text Command window
                         and logged to the log file.                        
+
+    Errors are fingerprinted by name, exception type and stack. Only the first
+    occurrence of each is logged in full (and shown in a message box if asked),
+    repeats are counted and summarised every config.ERROR_SUMMARY_INTERVAL
+    seconds, see get_error_table. Once MAX_ERROR_FINGERPRINTS errors are
+    tracked, new errors are only counted under one 'other errors' entry per name.
     """    
+    global _unreported_errors
+    exc_type, exc_value, exc_traceback = sys.exc_info()
+    now = time.monotonic()
+
+    # Walking the frames is much cheaper than formatting the traceback.
+    stack = tuple((frame.f_code.co_filename, line, frame.f_code.co_name)
+                  for frame, line in traceback.walk_tb(exc_traceback))
+    fingerprint = (name, exc_type, stack)
+
+    record = _errors.get(fingerprint)
+    if record is None and len(_errors) >= MAX_ERROR_FINGERPRINTS:
+        fingerprint = (name, None, ())
+        record = _errors.get(fingerprint)
+        if record is None:
+            # Counted from zero, so the summary reports every error of the entry.
+            record = _errors[fingerprint] = _ErrorRecord(name, None, None, (), now)
+            record.count = record.reported = 0
+
+    if record is not None:
+        record.count += 1
+        record.last_seen = now
+        _unreported_errors = True
+        if now - _last_error_summary >= ERROR_SUMMARY_INTERVAL:
+            log_error_summary()
+        return
 
-    log('===== Error =====', adsk.core.LogLevels.ErrorLogLevel)
-    log(f'{name}\n{traceback.format_exc()}', adsk.core.LogLevels.ErrorLogLevel)
+    _errors[fingerprint] = _ErrorRecord(name, exc_type, exc_value, stack, now)
+    message = f'{name}\n{traceback.format_exc()}'
+    log(f'===== Error =====\n{message}', adsk.core.LogLevels.ErrorLogLevel)
 
     # If desired you could show an error as a message box.
     if show_message_box:
-        ui.messageBox(f'{name}\n{traceback.format_exc()}')
+        ui.messageBox(message)
+
+
+class _ErrorRecord:
+    __slots__ = ('name', 'error', 'location', 'count', 'reported', 'first_seen', 'last_seen')
+
+    def __init__(self, name, exc_type, exc_value, stack, now):
+        self.name = name
+        self.error = f'{exc_type.__name__}: {exc_value}' if exc_type else f'other errors in {name}'
+        self.location = f'{stack[-1][0]}:{stack[-1][1]} in {stack[-1][2]}' if stack else ''
+        self.count = 1
+        self.reported = 1
+        self.first_seen = now
+        self.last_seen = now
+
+
+def get_error_table() -> list:
+    """Gets every distinct error handled so far, most frequent first.
+
+    :returns:
+        A list of dictionaries with the name passed to handle_error, the
+        error, where it was raised, how many times it happened and when it was
+        first and last seen (time.monotonic seconds).
+    """
+    records = sorted(_errors.values(), key=lambda record: record.count, reverse=True)
+    return [
+        {
+            'name': record.name,
+            'error': record.error,
+            'location': record.location,
+            'count': record.count,
+            'first_seen': record.first_seen,
+            'last_seen': record.last_seen,
+        }
+        for record in records
+    ]
+
+
+def clear_error_table():
+    """Forgets every error handled so far, so the next occurrence of each is logged in full again."""
+    _errors.clear()
+
+
+def log_error_summary():
+    """Logs how many times each error repeated since the last summary."""
+    global _last_error_summary, _unreported_errors
+    _last_error_summary = time.monotonic()
+    _unreported_errors = False
+
+    lines = []
+    for record in _errors.values():
+        repeats = record.count - record.reported
+        if repeats:
+            location = f' at {record.location}' if record.location else ''
+            lines.append(f'{record.name}: {record.error} repeated {repeats} times ({record.count} total){location}')
+            record.reported = record.count
+    if lines:
+        log('===== Repeated errors =====\n' + '\n'.join(lines), adsk.core.LogLevels.ErrorLogLevel)
+
+
+def _error_summary_due() -> bool:
+    return _unreported_errors and time.monotonic() - _last_error_summary >= ERROR_SUMMARY_INTERVAL
@@ -0,0 +1,211 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import copy
+import json
+import math
+import threading
+import time
+
+import adsk.core
+
+app = adsk.core.Application.get()
+
+# Action of a message holding several messages, as a JSON list of [action, data] pairs.
+# The page's fusionJavaScriptHandler handles each of them in order, see Browser/resources/html/static/palette.js.
+BATCH_ACTION = 'batch'
+
+# Actions of the state a channel mirrors on its page. A patch holds JSON Patch (RFC 6902) style
+# add, remove and replace operations taking the page from version base to version. A reset holds
+# the whole state. The page sends STATE_RESYNC_ACTION when it gets a patch for a version it
+# doesn't have, e.g. one sent before it loaded, and is answered with a reset.
+STATE_PATCH_ACTION = 'statePatch'
+STATE_RESET_ACTION = 'stateReset'
+STATE_RESYNC_ACTION = 'stateResync'
+
+
+class HTMLChannel:
+    """Sends messages to the page of a browser input, at most one bridge crossing per interval.
+
+    Each sendInfoToHTML call crosses from Python to the browser, so messages
+    are queued and flushed together. A message replaces any queued message
+    with the same action, which is only ever an older update of the same
+    thing. The first message after a quiet interval is flushed straight away,
+    later ones from a custom event once the interval is over.
+
+    A channel can also mirror a state, a dictionary of JSON values, on its page.
+    Change it with update_state and only what changed since the last message
+    is sent, as a versioned patch.
+
+    Create one through CommandSession.add_html_channel, which registers the
+    custom event and drops queued messages when the dialog is closed.
+
+    Arguments:
+    browser_input -- The browser input to send to.
+    interval -- The shortest time between two flushes, in seconds.
+    event_id -- The id of the registered custom event that flushes the queue.
+    batch -- True to send several queued messages as one BATCH_ACTION message,
+             which the page must handle. Otherwise each queued action is sent on its own.
+    """
+
+    def __init__(self, browser_input: adsk.core.BrowserCommandInput, interval: float, event_id: str, batch: bool = True):
+        self.browser_input = browser_input
+        self.interval = interval
+        self.event_id = event_id
+        self.batch = batch
+
+        # Messages queued, and how many times they crossed to the browser
+        self.queued = 0
+        self.crossings = 0
+
+        # The state mirrored on the page, and the state and version last sent to it
+        self.state = {}
+        self.state_version = 0
+        self._sent_state = {}
+
+        self._queue = {}
+        self._last_flush = -math.inf
+        self._timer = None
+
+    def send(self, action: str, data=None):
+        """Queues a message for the page, replacing any queued message with the same action.
+
+        Arguments:
+        action -- The action passed to the page's fusionJavaScriptHandler.
+        data -- The message data, anything json.dumps accepts. It is serialized when flushed.
+                Or a function returning the data, called when flushed. If it returns None
+                the message isn't sent.
+        """
+        self._queue.pop(action, None)
+        self._queue[action] = data
+        self.queued += 1
+        if self._timer is not None:
+            return
+
+        delay = self._last_flush + self.interval - time.monotonic()
+        if delay <= 0:
+            self.flush()
+            return
+        # Timers run on their own thread, Fusion delivers the custom event on the main thread.
+        self._timer = threading.Timer(delay, app.fireCustomEvent, (self.event_id,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self, args: adsk.core.CustomEventArgs = None):
+        """Sends every queued message now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._queue:
+            return
+
+        messages = [(action, data() if callable(data) else data) for action, data in self._queue.items()]
+        messages = [(action, data) for action, data in messages if data is not None]
+        self._queue.clear()
+        self._last_flush = time.monotonic()
+        if not messages:
+            return
+        if len(messages) > 1 and self.batch:
+            self.browser_input.sendInfoToHTML(BATCH_ACTION, json.dumps(messages))
+            self.crossings += 1
+            return
+        for action, data in messages:
+            self.browser_input.sendInfoToHTML(action, json.dumps(data))
+            self.crossings += 1
+
+    def update_state(self, **values):
+        """Changes the state mirrored on the page, sending what changed with the next flush.
+
+        Changes made within one flush interval are sent as one patch. After changing
+        nested values of channel.state in place, call this without arguments.
+
+        Arguments:
+        values -- The top level values of the state to set, e.g. selection={'name': 'Body1'}.
+        """
+        self.state.update(values)
+        self.send(STATE_PATCH_ACTION, self._state_patch)
+
+    def resync_state(self):
+        """Sends the whole state with the next flush, when the page asks with STATE_RESYNC_ACTION."""
+        # The reset carries every queued change, a patch queued before it would only be out of date.
+        self._queue.pop(STATE_PATCH_ACTION, None)
+        self.send(STATE_RESET_ACTION, self._state_reset)
+
+    def _state_patch(self):
+        operations = []
+        _diff(self._sent_state, self.state, '', operations)
+        if not operations:
+            return None
+        for operation in operations:
+            _apply(self._sent_state, operation)
+        self.state_version += 1
+        return {'base': self.state_version - 1, 'version': self.state_version, 'ops': operations}
+
+    def _state_reset(self):
+        self._sent_state = copy.deepcopy(self.state)
+        self.state_version += 1
+        return {'version': self.state_version, 'state': self.state}
+
+    def cancel(self):
+        """Drops the queued messages."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._queue.clear()
+
+
+def _diff(old, new, path, operations):
+    # Appends the operations that turn old into new. Dictionaries are compared key by key
+    # and lists item by item, so a changed row of a table is a change of that row alone.
+    if type(old) is dict and type(new) is dict:
+        for key in old:
+            if key not in new:
+                operations.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in new.items():
+            if key in old:
+                _diff(old[key], value, f'{path}/{_escape(key)}', operations)
+            else:
+                operations.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': value})
+    elif type(old) is list and type(new) is list:
+        common = min(len(old), len(new))
+        for index in range(common):
+            _diff(old[index], new[index], f'{path}/{index}', operations)
+        for index in range(common, len(new)):
+            operations.append({'op': 'add', 'path': f'{path}/{index}', 'value': new[index]})
+        # From the end, so the index of each item removed is still its index.
+        for index in range(len(old) - 1, common - 1, -1):
+            operations.append({'op': 'remove', 'path': f'{path}/{index}'})
+    elif type(old) is not type(new) or old != new:
+        operations.append({'op': 'replace', 'path': path, 'value': new})
+
+
+def _apply(state, operation):
+    # Applies an operation made by _diff to the state last sent, as the page does.
+    *parents, last = operation['path'].split('/')[1:]
+    target = state
+    for token in parents:
+        target = target[int(token)] if type(target) is list else target[_unescape(token)]
+    key = int(last) if type(target) is list else _unescape(last)
+    if operation['op'] == 'remove':
+        del target[key]
+    elif operation['op'] == 'add' and type(target) is list:
+        target.insert(key, copy.deepcopy(operation['value']))
+    else:
+        target[key] = copy.deepcopy(operation['value'])
+
+
+def _escape(key):
+    # JSON Pointer escaping of a key, see RFC 6901
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
@@ -0,0 +1,224 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import adsk.core
+import adsk.fusion
+
+# Functions that format the user input of a command input, keyed by the objectType of the input class.
+# Each command input is formatted by the one function registered for its type, so describing an input
+# only costs the reads its formatter makes.
+_formatters = {}
+
+# Functions that read the user input of a command input as plain values, keyed by objectType.
+# The formatters below and the dialog snapshots of dialog_state.py both read inputs through them.
+_readers = {}
+
+# objectType of each Python input class seen so far. The API returns inputs as their most derived
+# class, so the type can be looked up once per class rather than read from every input.
+_class_types = {}
+
+
+def register_input_formatter(input_class, formatter=None):
+    """Registers the function that formats the user input of one type of command input.
+
+    Can be used as a decorator: @register_input_formatter(adsk.core.StringValueCommandInput)
+
+    Arguments:
+    input_class -- The command input class, e.g. adsk.core.DistanceValueCommandInput.
+    formatter -- A function taking the command input and returning a string.
+    """
+    if formatter is None:
+        return lambda function: register_input_formatter(input_class, function)
+    _formatters[input_class.classType()] = formatter
+    return formatter
+
+
+def register_input_reader(input_class, reader):
+    """Registers the function that reads the user input of one type of command input.
+
+    Arguments:
+    input_class -- The command input class, e.g. adsk.core.StringValueCommandInput.
+    reader -- A function taking the command input and returning its input, built from
+              str, bytes, int, float, bool, None, and tuples, lists and dicts of those.
+    """
+    _readers[input_class.classType()] = reader
+    return reader
+
+
+def get_input_reader(object_type: str):
+    """Gets the function registered to read inputs of an objectType, or None if there is none."""
+    return _readers.get(object_type)
+
+
+def get_object_type(command_input: adsk.core.CommandInput) -> str:
+    """Gets the objectType of a command input, usually without a call into Fusion."""
+    input_class = type(command_input)
+    object_type = _class_types.get(input_class)
+    if object_type is None:
+        object_type = _class_types[input_class] = input_class.classType()
+    if object_type not in _formatters and object_type not in _child_inputs:
+        # Returned as a base class, ask the input itself
+        object_type = command_input.objectType
+    return object_type
+
+
+def format_command_input(command_input: adsk.core.CommandInput, object_type: str = None) -> str:
+    """Formats the user input of a command input, or 'N/A' if its type has no formatter."""
+    formatter = _formatters.get(object_type or get_object_type(command_input))
+    return formatter(command_input) if formatter else 'N/A'
+
+
+def iter_command_inputs(inputs: adsk.core.CommandInputs, depth: int = 0):
+    """Yields every command input with the depth it is nested at, walking into groups and tables.
+
+    Arguments:
+    inputs -- The inputs of a command or group, or any iterable of inputs.
+    depth -- The depth of the inputs given, 0 for the command's own inputs.
+
+    :returns:
+        A generator of (command_input, object_type, depth) tuples, parents before their children.
+    """
+    for command_input in inputs:
+        object_type = get_object_type(command_input)
+        yield command_input, object_type, depth
+        children = _child_inputs.get(object_type)
+        if children:
+            yield from iter_command_inputs(children(command_input), depth + 1)
+
+
+def describe_command_inputs(inputs: adsk.core.CommandInputs) -> list:
+    """Gets the state of every input of a dialog, including those in groups and tables.
+
+    :returns:
+        A list with a dictionary per input holding its id, name, type, formatted
+        value and nesting depth, in dialog order.
+    """
+    return [
+        {
+            'id': command_input.id,
+            'name': command_input.name,
+            'type': object_type.rpartition('::')[2],
+            'value': format_command_input(command_input, object_type),
+            'depth': depth,
+        }
+        for command_input, object_type, depth in iter_command_inputs(inputs)
+    ]
+
+
+def _table_cells(table_input):
+    # A table's commandInputs is the collection its cells are created in, which isn't
+    # guaranteed to hold only its cells, so the cells are read by position. An input
+    # spanning several cells is at each of them and is only yielded once.
+    seen = set()
+    for row in range(table_input.rowCount):
+        for column in range(table_input.numberOfColumns):
+            command_input = table_input.getInputAtPosition(row, column)
+            if command_input is not None and command_input.id not in seen:
+                seen.add(command_input.id)
+                yield command_input
+
+
+# How to get the child inputs of the inputs that contain others
+_child_inputs = {
+    adsk.core.GroupCommandInput.classType(): lambda group_input: group_input.children,
+    adsk.core.TableCommandInput.classType(): _table_cells,
+}
+
+
+def _read_expression(command_input):
+    return command_input.expression
+
+
+def _read_value(command_input):
+    return command_input.value
+
+
+def _read_sliders(command_input):
+    if command_input.hasTwoSliders:
+        return command_input.valueOne, command_input.valueTwo
+    return command_input.valueOne, None
+
+
+def _read_list(command_input):
+    selected_item = command_input.selectedItem
+    return selected_item.index if selected_item else None
+
+
+def _read_direction(command_input):
+    return command_input.isDirectionFlipped
+
+
+def _read_group(command_input):
+    return command_input.isExpanded
+
+
+def _format_value(command_input):
+    return str(command_input.value)
+
+
+def _format_sliders(command_input):
+    value_one, value_two = _read_sliders(command_input)
+    display_value = f'\n    Value 1: {value_one}'
+    if value_two is not None:
+        display_value += f'\n    Value 2: {value_two}'
+    return display_value
+
+
+def _format_list(command_input):
+    selected_item = command_input.selectedItem
+    return selected_item.name if selected_item else 'Nothing selected'
+
+
+def _format_direction(command_input):
+    return f'{_read_direction(command_input)} (Is Direction Flipped?)'
+
+
+def _format_selection(command_input):
+    if not command_input.selectionCount:
+        return 'Nothing selected'
+    selected_entity = command_input.selection(0).entity
+    object_type = selected_entity.objectType
+    if object_type == adsk.fusion.ConstructionPlane.classType():
+        return f'A Construction Plane named: {selected_entity.name}'
+    if object_type == adsk.fusion.BRepFace.classType():
+        return f'A planar face from {selected_entity.body.parentComponent.name}'
+    return f'A {object_type.rpartition("::")[2]}'
+
+
+def _format_text_box(command_input):
+    return command_input.text
+
+
+def _format_table(command_input):
+    return f'{command_input.rowCount} rows'
+
+
+for _input_class in (adsk.core.ValueCommandInput, adsk.core.DistanceValueCommandInput,
+                     adsk.core.AngleValueCommandInput, adsk.core.FloatSpinnerCommandInput):
+    register_input_reader(_input_class, _read_expression)
+    register_input_formatter(_input_class, _read_expression)
+for _input_class in (adsk.core.StringValueCommandInput, adsk.core.BoolValueCommandInput,
+                     adsk.core.IntegerSpinnerCommandInput):
+    register_input_reader(_input_class, _read_value)
+    register_input_formatter(_input_class, _format_value)
+for _input_class in (adsk.core.FloatSliderCommandInput, adsk.core.IntegerSliderCommandInput):
+    register_input_reader(_input_class, _read_sliders)
+    register_input_formatter(_input_class, _format_sliders)
+for _input_class in (adsk.core.ButtonRowCommandInput, adsk.core.DropDownCommandInput,
+                     adsk.core.RadioButtonGroupCommandInput):
+    register_input_reader(_input_class, _read_list)
+    register_input_formatter(_input_class, _format_list)
+register_input_reader(adsk.core.DirectionCommandInput, _read_direction)
+register_input_formatter(adsk.core.DirectionCommandInput, _format_direction)
+register_input_reader(adsk.core.GroupCommandInput, _read_group)
+register_input_formatter(adsk.core.SelectionCommandInput, _format_selection)
+register_input_formatter(adsk.core.TextBoxCommandInput, _format_text_box)
+register_input_formatter(adsk.core.TableCommandInput, _format_table)
@@ -0,0 +1,259 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+# Structured JSON Lines log file with size-based rotation, and a reader for it.
+# This module doesn't depend on adsk, so the reader can also be run outside Fusion:
+#
+#     python jsonl_log.py LOG_FILE [--command CareyJack_python_Table] [--level error] [--tail 50]
+
+import json
+import mmap
+import os
+import sys
+import time
+
+# Names written for adsk.core.LogLevels values
+LEVEL_NAMES = {0: 'info', 1: 'warning', 2: 'error'}
+
+# The open sink, if any, and the handler currently being dispatched along with the id of its command
+_sink = None
+_current_handler = None
+_current_command = None
+
+
+class JsonlLogSink:
+    """Writes one JSON record per line through a buffered file, rotating it by size.
+
+    When a write would take the file past max_bytes it is renamed to path.1, any
+    older path.1 to path.N are shifted up by one, and path.N is discarded,
+    N being backup_count.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5,
+                 buffer_size: int = 64 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_size = buffer_size
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._open()
+
+    def _open(self):
+        self._file = open(self.path, 'ab', buffering=self.buffer_size)
+        self._size = self._file.tell()
+
+    def write(self, record: dict):
+        # Compact separators keep records small and give the reader a fixed '"key":value' layout to search for.
+        line = json.dumps(record, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+        # Rotate before a write that would overflow the file, so the current file is never left empty.
+        if self._size and self._size + len(line) > self.max_bytes:
+            self.rotate()
+        self._file.write(line)
+        self._size += len(line)
+
+    def rotate(self):
+        self._file.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f'{self.path}.{index}'
+                if os.path.exists(source):
+                    os.replace(source, f'{self.path}.{index + 1}')
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def start_log_file(path: str, max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5) -> JsonlLogSink:
+    """Starts writing every logged message and handler call to a JSON Lines file.
+
+    Arguments:
+    path -- The log file. Rotated files are named path.1, path.2 and so on.
+    max_bytes -- The size at which the file is rotated.
+    backup_count -- The number of rotated files kept.
+
+    :returns:
+        The sink writing the file.
+    """
+    global _sink
+    stop_log_file()
+    _sink = JsonlLogSink(path, max_bytes, backup_count)
+    return _sink
+
+
+def stop_log_file():
+    """Flushes and closes the log file, if one is open."""
+    global _sink
+    if _sink is not None:
+        _sink.close()
+        _sink = None
+
+
+def write_log_record(message: str, level: int, **fields):
+    """Writes a log message to the open log file along with the handler being dispatched."""
+    record = {'ts': round(time.time(), 6), 'level': LEVEL_NAMES.get(level, level), 'msg': message}
+    if _current_handler is not None:
+        record['handler'] = _current_handler
+    if _current_command is not None:
+        record['command'] = _current_command
+    record.update(fields)
+    _sink.write(record)
+    if level == 2:
+        _sink.flush()
+
+
+def write_dispatch_record(handler_name: str, command_id: str, duration: float):
+    """Writes the duration of a handler call to the open log file.
+
+    Arguments:
+    handler_name -- The name of the handler, e.g. 'Table.command_input_changed'.
+    command_id -- The id of the command the handler belongs to, or None if it belongs to none.
+    duration -- The time the call took, in seconds.
+    """
+    record = {'ts': round(time.time(), 6), 'level': 'info', 'event': 'dispatch', 'handler': handler_name}
+    if command_id is not None:
+        record['command'] = command_id
+    record['duration'] = round(duration, 6)
+    _sink.write(record)
+
+
+def log_files(path: str, include_rotated: bool = True) -> list:
+    """Gets a log file and its rotated files, oldest first."""
+    files = []
+    if include_rotated:
+        index = 1
+        while os.path.exists(f'{path}.{index}'):
+            files.insert(0, f'{path}.{index}')
+            index += 1
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def read_log(path: str, *, command: str = None, level: str = None, handler: str = None,
+             include_rotated: bool = True):
+    """Reads the records of a log file that match every filter given, oldest first.
+
+    The files are memory-mapped and searched for the exact bytes of the most
+    selective filter, so only candidate lines are parsed. That keeps filtering fast on
+    files that are hundreds of megabytes.
+
+    Arguments:
+    path -- The log file.
+    command -- Only records logged while a handler of the command with this id was running.
+    level -- Only records of this level: 'info', 'warning' or 'error'.
+    handler -- Only records of this handler, e.g. 'Table.command_input_changed'.
+    include_rotated -- Also reads path.1, path.2 and so on.
+
+    :returns:
+        A generator of record dictionaries.
+    """
+    filters = {key: value for key, value in (('command', command), ('level', level), ('handler', handler))
+               if value is not None}
+    # Search for the filter likely to match the fewest lines, the others are checked after parsing.
+    # Most records are info, so an info level filter is tried last.
+    ranked = sorted(filters, key=lambda key: ('handler', 'level', 'command').index(key))
+    if level == 'info':
+        ranked.append(ranked.pop(ranked.index('level')))
+    needle = f'"{ranked[0]}":{json.dumps(filters[ranked[0]])}'.encode('utf-8') if ranked else None
+
+    for file_path in log_files(path, include_rotated):
+        for line in _matching_lines(file_path, needle):
+            record = json.loads(line)
+            if all(record.get(key) == value for key, value in filters.items()):
+                yield record
+
+
+def tail_log(path: str, count: int = 50) -> list:
+    """Gets the last records of a log file without reading the rest of it.
+
+    If the current file holds fewer than count records, e.g. just after it
+    was rotated, the rest are read from the end of path.1, path.2 and so on.
+
+    Arguments:
+    path -- The log file.
+    count -- The number of records to return.
+    """
+    lines = []
+    for file_path in reversed(log_files(path)):
+        if len(lines) >= count:
+            break
+        lines.extend(_last_lines(file_path, count - len(lines)))
+    return [json.loads(line) for line in reversed(lines)]
+
+
+def _last_lines(file_path, count):
+    # The last count non-empty lines of a file, newest first.
+    lines = []
+    if os.path.getsize(file_path) == 0:
+        return lines
+    with open(file_path, 'rb') as log_file, mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        end = len(data)
+        while end > 0 and len(lines) < count:
+            start = data.rfind(b'\n', 0, end) + 1
+            if end > start:
+                lines.append(data[start:end])
+            end = start - 1
+    return lines
+
+
+def _matching_lines(file_path, needle):
+    if os.path.getsize(file_path) == 0:
+        return
+    with open(file_path, 'rb') as log_file, mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if needle is None:
+            start = 0
+            while start < len(data):
+                end = data.find(b'\n', start)
+                end = len(data) if end < 0 else end
+                if end > start:
+                    yield data[start:end]
+                start = end + 1
+            return
+
+        position = data.find(needle)
+        while position >= 0:
+            start = data.rfind(b'\n', 0, position) + 1
+            end = data.find(b'\n', position)
+            end = len(data) if end < 0 else end
+            yield data[start:end]
+            position = data.find(needle, end)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Filter or tail a JSON Lines log written by fusionAddInUtils.')
+    parser.add_argument('path')
+    parser.add_argument('--command')
+    parser.add_argument('--level', choices=sorted(LEVEL_NAMES.values()))
+    parser.add_argument('--handler')
+    parser.add_argument('--tail', type=int, help='Only print the last TAIL records')
+    options = parser.parse_args(argv)
+
+    if options.tail:
+        records = tail_log(options.path, options.tail)
+    else:
+        records = read_log(options.path, command=options.command, level=options.level, handler=options.handler)
+    for record in records:
+        sys.stdout.write(json.dumps(record) + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+#  Copyright 2022 by Autodesk, Inc.
+#  Permission to use, copy, modify, and distribute this software in object code form
+#  for any purpose and without fee is hereby granted, provided that the above copyright
+#  notice appears in all copies and that both that copyright notice and the limited
+#  warranty and restricted rights notice below appear in all supporting documentation.
+#
+#  AUTODESK PROVIDES THIS PROGRAM "AS IS" AND WITH ALL FAULTS. AUTODESK SPECIFICALLY
+#  DISCLAIMS ANY IMPLIED WARRANTY OF MERCHANTABILITY OR FITNESS FOR A PARTICULAR USE.
+#  AUTODESK, INC. DOES NOT WARRANT THAT THE OPERATION OF THE PROGRAM WILL BE
+#  UNINTERRUPTED OR ERROR FREE.
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from .general_utils import log
+
+# Attempt to read the profiling settings from parent config.
+try:
+    from ... import config
+    PROFILE = config.PROFILE
+    PROFILE_FOLDER = config.PROFILE_FOLDER
+except:
+    PROFILE = False
+    PROFILE_FOLDER = ''
+
+# Completed spans as (name, category, start, wall, cpu) tuples, times in seconds.
+# Start times are relative to _origin so the trace starts at zero.
+_spans = []
+_origin = time.perf_counter()
+
+
+@contextmanager
+def timed(name: str, category: str = 'lifecycle'):
+    """Records the wall-clock and CPU time of the enclosed block when profiling is on.
+
+    Arguments:
+    name -- A name for the span, e.g. the module imported or the command registered.
+    category -- Groups spans in the report and the trace, e.g. 'import' or 'ui'.
+    """
+    if not PROFILE:
+        yield
+        return
+
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    try:
+        yield
+    finally:
+        cpu = time.thread_time() - cpu_start
+        wall = time.perf_counter() - wall_start
+        _spans.append((name, category, wall_start - _origin, wall, cpu))
+
+
+def get_spans() -> list:
+    """Gets the spans recorded since the last report, as (name, category, start, wall, cpu) tuples."""
+    return list(_spans)
+
+
+def clear_spans():
+    """Discards the recorded spans."""
+    _spans.clear()
+
+
+def write_profile_report(phase: str, folder: str = None) -> str:
+    """Logs the recorded spans slowest first and writes them as a Chrome trace.
+
+    The trace is a JSON file that can be opened with chrome://tracing or
+    https://ui.perfetto.dev. The recorded spans are cleared afterwards.
+
+    Arguments:
+    phase -- Names the report and the trace file, e.g. 'startup' or 'shutdown'.
+    folder -- The folder to write the trace to. Defaults to config.PROFILE_FOLDER.
+
+    :returns:
+        The path of the trace file, or None if profiling is off or nothing was recorded.
+    """
+    if not PROFILE or not _spans:
+        return None
+
+    log(f'===== {phase} timing report (wall ms / cpu ms) =====', force_console=True)
+    for name, category, _, wall, cpu in sorted(_spans, key=lambda span: span[3], reverse=True):
+        log(f'{wall * 1000:10.2f} {cpu * 1000:10.2f}  [{category}] {name}', force_console=True)
+
+    folder = folder or PROFILE_FOLDER
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, f'{phase}_trace.json')
+    with open(path, 'w') as trace_file:
+        json.dump(_chrome_trace(_spans), trace_file)
+
+    log(f'{phase} trace written to {path}', force_console=True)
+    clear_spans()
+    return path
+
+
+def _chrome_trace(spans):
+    # Complete ('X') events with microsecond timestamps, see the Trace Event Format.
+    pid = os.getpid()
+    tid = threading.get_ident()
+    events = [
+        {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': round(start * 1e6, 3),
+            'dur': round(wall * 1e6, 3),
+            'pid': pid,
+            'tid': tid,
+            'args': {'cpu_ms': round(cpu * 1000, 3)},
+        }
+        for name, category, start, wall, cpu in spans
+    ]
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}